@@ -94,9 +94,36 @@ CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
 CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "1") == "1"
 CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_ROUTES = {
+    "pipeline.tasks.render_chunk_task": {"queue": "render_chunks"},
+    "pipeline.tasks.concat_chunks_task": {"queue": "render_chunks"},
+}
 
 VIDEO_MAX_DURATION_SECONDS = int(os.getenv("VIDEO_MAX_DURATION_SECONDS", "60"))
 TARGET_WIDTH = int(os.getenv("TARGET_WIDTH", "1080"))
 TARGET_HEIGHT = int(os.getenv("TARGET_HEIGHT", "1920"))
 TARGET_FPS = int(os.getenv("TARGET_FPS", "30"))
 AUTO_FALLBACK_TEMPLATE_ON_RENDER_FAIL = os.getenv("AUTO_FALLBACK_TEMPLATE_ON_RENDER_FAIL", "1") == "1"
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+MEDIA_STORE_MAX_BYTES = int(os.getenv("MEDIA_STORE_MAX_BYTES", str(10 * 1024 * 1024 * 1024)))
+RENDER_SEGMENT_SECONDS = float(os.getenv("RENDER_SEGMENT_SECONDS", "2"))
+TEXT_OVERLAY_BACKEND = os.getenv("TEXT_OVERLAY_BACKEND", "drawtext")
+PREVIEW_RENDER_TIER = os.getenv("PREVIEW_RENDER_TIER", "proxy")
+DEFAULT_EXPORT_PROFILE = os.getenv("DEFAULT_EXPORT_PROFILE", "reels_standard")
+FILTERGRAPH_TIME_SPLIT = os.getenv("FILTERGRAPH_TIME_SPLIT", "0") == "1"
+RENDER_CHUNK_MODE = os.getenv("RENDER_CHUNK_MODE", "off")
+RENDER_CHUNK_SECONDS = float(os.getenv("RENDER_CHUNK_SECONDS", "10"))
+RENDER_CHUNK_WORKERS = int(os.getenv("RENDER_CHUNK_WORKERS", str(os.cpu_count() or 2)))
+RENDER_CHUNK_TIMEOUT_SECONDS = int(os.getenv("RENDER_CHUNK_TIMEOUT_SECONDS", "900"))
+MEDIA_TIMEOUT_SECONDS = int(os.getenv("MEDIA_TIMEOUT_SECONDS", "1800"))
+MEDIA_CPU_LIMIT_SECONDS = int(os.getenv("MEDIA_CPU_LIMIT_SECONDS", "0"))
+FFPROBE_TIMEOUT_SECONDS = int(os.getenv("FFPROBE_TIMEOUT_SECONDS", "30"))
+MEDIA_PROGRESS_INTERVAL_SECONDS = float(os.getenv("MEDIA_PROGRESS_INTERVAL_SECONDS", "1"))
+MEDIA_STDERR_TAIL_LINES = int(os.getenv("MEDIA_STDERR_TAIL_LINES", "200"))
+INGEST_WAIT_SECONDS = int(os.getenv("INGEST_WAIT_SECONDS", "300"))
+FILMSTRIP_INTERVAL_SECONDS = float(os.getenv("FILMSTRIP_INTERVAL_SECONDS", "1"))
+FILMSTRIP_TILE_WIDTH = int(os.getenv("FILMSTRIP_TILE_WIDTH", "160"))
+ANALYSIS_FPS = float(os.getenv("ANALYSIS_FPS", "10"))
+ANALYSIS_FRAME_WIDTH = int(os.getenv("ANALYSIS_FRAME_WIDTH", "96"))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(4 * 1024 * 1024 * 1024)))
+UPLOAD_CHUNK_MAX_BYTES = int(os.getenv("UPLOAD_CHUNK_MAX_BYTES", str(16 * 1024 * 1024)))
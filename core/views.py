@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import json
-from pathlib import Path
 from urllib.parse import urlencode
 
 from django.conf import settings
@@ -12,10 +11,10 @@ from django.views import View
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from pipeline.context import save_video_context
 from pipeline.ai import edit_overlays_with_prompt
-from pipeline.services import PipelineError, ffprobe_metadata, rerender_draft
-from pipeline.tasks import export_final_task, generate_draft_task
+from pipeline.profiles import ENCODER_PROFILES, OUTPUT_FORMATS
+from pipeline.services import PipelineError, probe_upload, rerender_draft
+from pipeline.tasks import export_batch_task, export_final_task, generate_draft_task, start_ingest
 from projects.models import Asset, Draft, ExportArtifact, Job, Project
 from projects.schemas import DraftTimeline
 
@@ -54,10 +53,15 @@ class WorkspaceView(View):
                 "draft": draft,
                 "jobs": jobs,
                 "exports": exports,
+                "export_profiles": sorted(ENCODER_PROFILES),
+                "default_export_profile": settings.DEFAULT_EXPORT_PROFILE,
                 "assets": project.assets.order_by("-created_at"),
                 "video_context": video_context,
                 "latest_plan": latest_plan,
                 "versions": versions,
+                "filmstrip": versions[0].filmstrip_json if versions else {},
+                "waveform": video_context.context_json.get("audio", {}).get("waveform", []) if video_context else [],
+                "media_url": settings.MEDIA_URL,
                 "max_duration": settings.VIDEO_MAX_DURATION_SECONDS,
                 "overlay_json": overlay_json,
                 "error_message": request.GET.get("error", ""),
@@ -72,13 +76,11 @@ class WorkspaceView(View):
             upload = request.FILES.get("source_video")
             if upload:
                 asset = Asset.objects.create(project=project, asset_type=Asset.AssetType.SOURCE_VIDEO, file=upload)
-                metadata = ffprobe_metadata(Path(asset.file.path))
+                metadata = probe_upload(asset)
                 if metadata["duration_sec"] > settings.VIDEO_MAX_DURATION_SECONDS:
                     asset.delete()
                 else:
-                    asset.metadata = metadata
-                    asset.save(update_fields=["metadata", "updated_at"])
-                    save_video_context(project, asset, metadata)
+                    start_ingest(asset)
 
         elif action == "upload_logo":
             upload = request.FILES.get("logo")
@@ -99,8 +101,15 @@ class WorkspaceView(View):
                 draft.save(update_fields=["approved", "updated_at"])
 
         elif action == "export_final":
-            job = Job.objects.create(project=project, job_type=Job.JobType.EXPORT_FINAL)
-            task = export_final_task.delay(str(job.id))
+            profile = request.POST.get("profile", "")
+            payload = {"profile": profile} if profile in ENCODER_PROFILES else {}
+            if request.POST.get("all_formats") == "1":
+                payload["formats"] = list(OUTPUT_FORMATS)
+                job = Job.objects.create(project=project, job_type=Job.JobType.EXPORT_BATCH, payload_json=payload)
+                task = export_batch_task.delay(str(job.id))
+            else:
+                job = Job.objects.create(project=project, job_type=Job.JobType.EXPORT_FINAL, payload_json=payload)
+                task = export_final_task.delay(str(job.id))
             if not job.task_id:
                 job.task_id = getattr(task, "id", "") or ""
                 job.save(update_fields=["task_id", "updated_at"])
@@ -125,7 +134,7 @@ class WorkspaceView(View):
                         "copy_variants": timeline.get("copy_variants", {}),
                     }
                 )
-                rerender_draft(project, draft, timeline, source="manual_json_edit")
+                rerender_draft(project, draft, timeline, source="manual_json_edit", tier=settings.PREVIEW_RENDER_TIER)
             except (ValueError, json.JSONDecodeError, PipelineError) as exc:
                 error_qs = urlencode({"error": str(exc)})
                 return HttpResponseRedirect(f"{reverse('workspace', kwargs={'project_id': project.id})}?{error_qs}")
@@ -151,7 +160,7 @@ class WorkspaceView(View):
                         "copy_variants": timeline.get("copy_variants", {}),
                     }
                 )
-                rerender_draft(project, draft, timeline, source="prompt_patch")
+                rerender_draft(project, draft, timeline, source="prompt_patch", tier=settings.PREVIEW_RENDER_TIER)
             except (ValueError, json.JSONDecodeError, PipelineError, RuntimeError) as exc:
                 error_qs = urlencode({"error": str(exc)})
                 return HttpResponseRedirect(f"{reverse('workspace', kwargs={'project_id': project.id})}?{error_qs}")
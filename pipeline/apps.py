@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PipelineConfig(AppConfig):
     name = 'pipeline'
+
+    def ready(self):
+        from pipeline import signals  # noqa: F401
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from typing import Any
+
+TEXT_TYPES = {"headline", "callout", "cta"}
+
+_NAMED_COLORS = {
+    "white": "FFFFFF",
+    "black": "000000",
+    "red": "FF0000",
+    "green": "008000",
+    "blue": "0000FF",
+    "yellow": "FFFF00",
+    "orange": "FFA500",
+    "gray": "808080",
+    "grey": "808080",
+}
+
+_STYLE_FORMAT = (
+    "Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, "
+    "Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, "
+    "MarginL, MarginR, MarginV, Encoding"
+)
+_EVENT_FORMAT = "Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"
+
+
+def ass_color(value: str, default: str = "FFFFFF") -> str:
+    raw = (value or "").strip().lower()
+    opacity = 1.0
+    if "@" in raw:
+        raw, _, alpha = raw.partition("@")
+        try:
+            opacity = min(1.0, max(0.0, float(alpha)))
+        except ValueError:
+            opacity = 1.0
+    if raw.startswith("#") and len(raw) == 7:
+        rgb = raw[1:]
+    elif raw.startswith("0x") and len(raw) == 8:
+        rgb = raw[2:]
+    else:
+        rgb = _NAMED_COLORS.get(raw, default)
+    rgb = rgb.upper()
+    transparency = round((1.0 - opacity) * 255)
+    return f"&H{transparency:02X}{rgb[4:6]}{rgb[2:4]}{rgb[0:2]}"
+
+
+def _timestamp(seconds: float) -> str:
+    centis = max(0, round(seconds * 100))
+    hours, rem = divmod(centis, 360000)
+    minutes, rem = divmod(rem, 6000)
+    secs, cs = divmod(rem, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{cs:02d}"
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}").replace("\n", "\\N")
+
+
+def _alignment(anchor: str) -> int:
+    return {"left": 4, "right": 6}.get(anchor, 5)
+
+
+def ass_placeable(overlay: dict[str, Any]) -> bool:
+    # drawtext centers text at (w-text_w)*x, which depends on the rendered width; an5 at
+    # width*x only agrees at x == 0.5, so other centered overlays stay on drawtext.
+    if overlay.get("type", "callout") not in TEXT_TYPES:
+        return False
+    pos = overlay.get("position", {})
+    if pos.get("anchor", "center") in ("left", "right"):
+        return True
+    return float(pos.get("x", 0.5)) == 0.5
+
+
+def _rgb(value: str, default: str) -> str:
+    raw = (value or "").strip().lstrip("#")
+    if len(raw) == 6 and all(ch in "0123456789abcdefABCDEF" for ch in raw):
+        return raw
+    return default
+
+
+def compile_ass(
+    overlays: list[dict[str, Any]],
+    width: int,
+    height: int,
+    primary_color: str,
+) -> str:
+    styles: dict[tuple, str] = {}
+    events: list[str] = []
+
+    for overlay in overlays:
+        if not ass_placeable(overlay):
+            continue
+        otype = overlay.get("type", "callout")
+        start = _timestamp(float(overlay.get("start_sec", 0)))
+        end = _timestamp(float(overlay.get("end_sec", 1)))
+        pos = overlay.get("position", {})
+        style = overlay.get("style", {})
+        x = float(pos.get("x", 0.5))
+        y = float(pos.get("y", 0.5))
+
+        if otype == "cta":
+            bg = ass_color(f"{style.get('bg', primary_color)}@0.92", default=_rgb(primary_color, "00A86B"))
+            x0, x1 = round(width * 0.16), round(width * 0.84)
+            y0, y1 = round(height * (y - 0.055)), round(height * (y + 0.055))
+            events.append(
+                f"Dialogue: 0,{start},{end},box,,0,0,0,,"
+                f"{{\\an7\\pos(0,0)\\bord0\\shad0\\1c&H{bg[4:]}&\\1a&H{bg[2:4]}&\\p1}}"
+                f"m {x0} {y0} l {x1} {y0} {x1} {y1} {x0} {y1}{{\\p0}}"
+            )
+
+        style_key = (
+            int(style.get("font_size", 64)),
+            ass_color(str(style.get("color", "white"))),
+            ass_color(str(style.get("box", "black@0.4"))),
+            int(style.get("box_border", 18)),
+            _alignment(pos.get("anchor", "center")),
+        )
+        name = styles.setdefault(style_key, f"s{len(styles)}")
+        events.append(
+            f"Dialogue: 1,{start},{end},{name},,0,0,0,,"
+            f"{{\\pos({round(width * x)},{round(height * y)})}}{_escape(str(overlay.get('text', '')))}"
+        )
+
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 2",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        f"Format: {_STYLE_FORMAT}",
+        "Style: box,Sans,20,&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,0,0,7,0,0,0,1",
+    ]
+    for (font_size, color, box, border, alignment), name in styles.items():
+        lines.append(
+            f"Style: {name},Sans,{font_size},{color},{color},{box},{box},0,0,0,0,100,100,0,0,3,{border},0,"
+            f"{alignment},0,0,0,1"
+        )
+    lines.extend(["", "[Events]", f"Format: {_EVENT_FORMAT}", *events, ""])
+    return "\n".join(lines)
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+SAMPLE_RATE = 22050
+HOP = 512
+FRAME = 1024
+BLOCK_HOPS = 2048
+SILENCE_DB = -50.0
+ONSET_PEAK_SEC = 0.05
+ONSET_AVG_SEC = 0.1
+ONSET_DELTA = 0.07
+ONSET_MIN_GAP_SEC = 0.1
+TEMPO_MIN_BPM = 60.0
+TEMPO_MAX_BPM = 200.0
+TEMPO_PRIOR_BPM = 120.0
+BEAT_MIN_CONFIDENCE = 0.3
+BEAT_MIN_SUPPORT = 0.5
+BEAT_ONSET_HOPS = 2
+LOUDNESS_WINDOW_SEC = 1.0
+LOUDNESS_RISE_DB = 6.0
+LOUDNESS_PEAKS_MAX = 8
+WAVEFORM_POINTS = 200
+
+ANALYSIS_PARAMS = {"sample_rate": SAMPLE_RATE, "hop": HOP, "frame": FRAME, "waveform_points": WAVEFORM_POINTS}
+
+
+def open_pcm(path: Path) -> np.ndarray:
+    # Mono float32 samples as written by ffmpeg's f32le muxer, mapped read-only.
+    if path.stat().st_size < 4:
+        # np.memmap cannot map an empty file.
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode="r", shape=(path.stat().st_size // 4,))
+
+
+def audio_envelopes(samples: np.ndarray, block_hops: int = BLOCK_HOPS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-hop RMS, absolute peak and onset strength, each HOP samples apart.
+
+    Onset strength is the positive spectral flux of the log magnitude spectrum over FRAME-sample Hann windows,
+    each centred on its hop. Samples are read block_hops hops at a time, and the last spectrum of each block
+    carries into the next, so memory stays bounded by the block rather than the length of the audio.
+    """
+    count = len(samples) // HOP
+    rms = np.zeros(count, dtype=np.float32)
+    peak = np.zeros(count, dtype=np.float32)
+    onset = np.zeros(count, dtype=np.float32)
+    window = np.hanning(FRAME).astype(np.float32)
+    half = FRAME // 2
+    previous = None
+    for first in range(0, count, block_hops):
+        hops = min(block_hops, count - first)
+        start, end = first * HOP - half, (first + hops - 1) * HOP + half
+        chunk = np.asarray(samples[max(0, start) : end], dtype=np.float32)
+        chunk = np.pad(chunk, (max(0, -start), end - start - max(0, -start) - len(chunk)))
+        frames = np.lib.stride_tricks.sliding_window_view(chunk, FRAME)[::HOP]
+        rms[first : first + hops] = np.sqrt(np.mean(frames**2, axis=1))
+        hop_samples = np.asarray(samples[first * HOP : (first + hops) * HOP], dtype=np.float32)
+        peak[first : first + hops] = np.abs(hop_samples).reshape(hops, HOP).max(axis=1)
+        spectrum = np.log1p(100.0 * np.abs(np.fft.rfft(frames * window, axis=1)))
+        if previous is not None:
+            spectrum = np.concatenate([previous, spectrum])
+        flux = np.maximum(np.diff(spectrum, axis=0), 0.0).mean(axis=1)
+        onset[first + hops - len(flux) : first + hops] = flux
+        previous = spectrum[-1:]
+    # The first windows reach into the zero padding before the audio; their flux is the padding, not an onset.
+    onset[: FRAME // HOP] = 0.0
+    return rms, peak, onset
+
+
+def _window_view(values: np.ndarray, half: int) -> np.ndarray:
+    return np.lib.stride_tricks.sliding_window_view(np.pad(values, half, mode="edge"), 2 * half + 1)
+
+
+def pick_onsets(strength: np.ndarray, rate: float) -> list[int]:
+    # Local maxima that also clear the local mean by ONSET_DELTA of the strongest onset, at least a gap apart.
+    if not len(strength) or strength.max() <= 0:
+        return []
+    norm = strength / strength.max()
+    is_max = norm >= _window_view(norm, max(1, round(ONSET_PEAK_SEC * rate))).max(axis=1)
+    above = norm >= _window_view(norm, max(1, round(ONSET_AVG_SEC * rate))).mean(axis=1) + ONSET_DELTA
+    gap = max(1, round(ONSET_MIN_GAP_SEC * rate))
+    onsets: list[int] = []
+    for index in np.flatnonzero(is_max & above):
+        if not onsets or index - onsets[-1] >= gap:
+            onsets.append(int(index))
+    return onsets
+
+
+def estimate_tempo(strength: np.ndarray, rate: float) -> tuple[float, float, float]:
+    """Tempo in BPM, its confidence in [0, 1] and the period in hops, from the onset autocorrelation.
+
+    Lags between TEMPO_MIN_BPM and TEMPO_MAX_BPM are weighted by a log-normal prior around TEMPO_PRIOR_BPM,
+    an octave wide, which settles the usual half/double-tempo ambiguity toward moderate tempos.
+    """
+    shortest, longest = round(60.0 * rate / TEMPO_MAX_BPM), round(60.0 * rate / TEMPO_MIN_BPM)
+    if len(strength) < 2 * longest:
+        return 0.0, 0.0, 0.0
+    # A short smoothing spreads each onset over neighbouring lags, so periods between whole hops still peak.
+    smoothed = np.convolve(strength, np.hanning(7)[1:-1] / np.hanning(7)[1:-1].sum(), mode="same")
+    centered = smoothed - smoothed.mean()
+    size = 1 << int(2 * len(centered) - 1).bit_length()
+    acf = np.fft.irfft(np.abs(np.fft.rfft(centered, size)) ** 2, size)[: longest + 2]
+    if acf[0] <= 0:
+        return 0.0, 0.0, 0.0
+    acf = acf / acf[0]
+    lags = np.arange(shortest, longest + 1)
+    prior = np.exp(-0.5 * np.log2(60.0 * rate / lags / TEMPO_PRIOR_BPM) ** 2)
+    lag = int(lags[np.argmax(acf[lags] * prior)])
+    # Parabolic interpolation between neighbouring lags recovers tempos that fall between whole hops.
+    left, mid, right = acf[lag - 1], acf[lag], acf[lag + 1]
+    curve = left - 2 * mid + right
+    period = lag + (0.5 * (left - right) / curve if curve < 0 else 0.0)
+    return float(60.0 * rate / period), float(max(0.0, mid)), float(period)
+
+
+def beat_grid(strength: np.ndarray, period: float) -> np.ndarray:
+    # The phase whose evenly spaced grid collects the most onset strength.
+    phases = np.arange(max(1, int(np.ceil(period))))
+    steps = np.arange(int(len(strength) / period) + 1) * period
+    grid = (phases[:, None] + steps[None, :]).round().astype(np.intp)
+    valid = grid < len(strength)
+    totals = np.where(valid, strength[np.minimum(grid, len(strength) - 1)], 0.0).sum(axis=1)
+    best = int(np.argmax(totals))
+    return grid[best][valid[best]]
+
+
+def loudness_peaks(rms_db: np.ndarray, rate: float) -> list[int]:
+    # The loudest moments: local maxima over a second either side that stand out from the typical level.
+    if not len(rms_db):
+        return []
+    is_max = rms_db >= _window_view(rms_db, max(1, round(LOUDNESS_WINDOW_SEC * rate))).max(axis=1)
+    floor = max(SILENCE_DB, float(np.median(rms_db)) + LOUDNESS_RISE_DB)
+    candidates = np.flatnonzero(is_max & (rms_db >= floor))
+    gap = max(1, round(LOUDNESS_WINDOW_SEC * rate))
+    peaks: list[int] = []
+    for index in candidates[np.argsort(-rms_db[candidates], kind="stable")]:
+        if all(abs(int(index) - other) >= gap for other in peaks):
+            peaks.append(int(index))
+        if len(peaks) == LOUDNESS_PEAKS_MAX:
+            break
+    return sorted(peaks)
+
+
+def waveform_peaks(peak: np.ndarray, points: int = WAVEFORM_POINTS) -> list[int]:
+    # Evenly spaced maxima scaled to 0-255, enough to draw the waveform without fetching any audio.
+    if not len(peak):
+        return []
+    edges = np.linspace(0, len(peak), num=min(points, len(peak)) + 1).round().astype(np.intp)
+    buckets = np.maximum.reduceat(peak, edges[:-1])
+    return [int(v) for v in np.clip(buckets * 255.0, 0, 255).round()]
+
+
+def analyze_samples(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> dict[str, Any]:
+    """Summary of a mono track for the video context: onsets, beats, loudness peaks and waveform peaks."""
+    rate = sample_rate / HOP
+    rms, peak, strength = audio_envelopes(samples)
+    rms_db = 20.0 * np.log10(np.maximum(rms, 1e-5))
+    # Silence has no beats; only frames above SILENCE_DB contribute onset strength.
+    strength = np.where(rms_db > SILENCE_DB, strength, 0.0)
+    onsets = pick_onsets(strength, rate)
+    tempo, confidence, period = estimate_tempo(strength, rate)
+    beats = beat_grid(strength, period) if confidence >= BEAT_MIN_CONFIDENCE else np.zeros(0, dtype=np.intp)
+    # A couple of isolated hits also autocorrelate; a real pulse has onsets on most of its beats.
+    if len(beats) and onsets:
+        distance = np.abs(beats[:, None] - np.array(onsets)[None, :]).min(axis=1)
+        if np.mean(distance <= BEAT_ONSET_HOPS) < BEAT_MIN_SUPPORT:
+            beats = beats[:0]
+    waveform = waveform_peaks(peak)
+    return {
+        "duration_sec": round(len(samples) / sample_rate, 3),
+        "tempo_bpm": round(tempo, 1) if len(beats) else None,
+        "tempo_confidence": round(confidence, 3),
+        "beats": [round(int(i) / rate, 3) for i in beats],
+        "onsets": [round(i / rate, 3) for i in onsets],
+        "loudness_peaks": [
+            {"t": round(i / rate, 3), "db": round(float(rms_db[i]), 1)} for i in loudness_peaks(rms_db, rate)
+        ],
+        "loudness_db": round(float(rms_db.max()), 1) if len(rms_db) else None,
+        "waveform": waveform,
+        "waveform_interval_sec": round(len(peak) / rate / len(waveform), 4) if waveform else 0.0,
+    }
+
+
+def silent_analysis() -> dict[str, Any]:
+    # What a source without an audio stream contributes: no onsets, no beats, a flat waveform.
+    return analyze_samples(np.zeros(0, dtype=np.float32))
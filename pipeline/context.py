@@ -1,35 +1,179 @@
 from __future__ import annotations
 
+from itertools import pairwise
 from typing import Any
 
+import numpy as np
+
+from pipeline.frames import BATCH_FRAMES, FrameStore
 from projects.models import Asset, Project, VideoContext
 
+HIST_BINS = 32
+MIN_SCENE_SEC = 1.0
+CUT_WINDOW_SEC = 2.0
+CUT_MAD_FACTOR = 6.0
+CUT_FLOOR = 0.2
+MOTION_GRID = 4
+MOTION_MIN_TEXTURE = 1e-10
+MOTION_STATIC_PX = 0.25
+MOTION_ENERGY_SCALE = 0.03
+BEAT_SNAP_SEC = 0.5
+
+
+def frame_deltas(frames: FrameStore, batch_size: int = BATCH_FRAMES) -> np.ndarray:
+    """Per-frame change from the previous frame in [0, 1]; index 0 is always 0.
+
+    Geometric mean of the histogram distance (tonal change) and the mean absolute pixel difference
+    (structural change): a cut moves both, while fades move mostly the histogram and pans mostly the pixels.
+    Computed one batch of frames at a time, so memory stays bounded by the batch rather than the video.
+    """
+    deltas = np.zeros(len(frames), dtype=np.float32)
+    shift = 8 - (HIST_BINS.bit_length() - 1)
+    for start, batch in frames.batches(batch_size, overlap=1):
+        count = len(batch)
+        if count < 2:
+            continue
+        pixels = batch.reshape(count, -1)
+        bins = (pixels >> shift).astype(np.intp) + (np.arange(count, dtype=np.intp) * HIST_BINS)[:, None]
+        hist = np.bincount(bins.ravel(), minlength=count * HIST_BINS).reshape(count, HIST_BINS) / pixels.shape[1]
+        hist_delta = 0.5 * np.abs(np.diff(hist, axis=0)).sum(axis=1)
+        mad = np.abs(np.diff(pixels.astype(np.int16), axis=0)).mean(axis=1) / 255.0
+        deltas[start + 1 : start + count] = np.sqrt(hist_delta * mad)
+    return deltas
+
+
+def detect_cuts(deltas: np.ndarray, fps: float) -> list[int]:
+    """Frame indices where a new shot starts.
+
+    A frame is a candidate when its delta clears both a floor and the local median plus a multiple of the
+    local median absolute deviation, so steady motion raises its own bar. Candidates closer than
+    MIN_SCENE_SEC to a stronger cut, or to either end, are dropped.
+    """
+    count = len(deltas)
+    min_gap = max(1, round(MIN_SCENE_SEC * fps))
+    if count <= 2 * min_gap:
+        return []
+    half = max(1, round(CUT_WINDOW_SEC * fps / 2))
+    windows = np.lib.stride_tricks.sliding_window_view(np.pad(deltas, half, mode="edge"), 2 * half + 1)
+    median = np.median(windows, axis=1)
+    spread = np.median(np.abs(windows - median[:, None]), axis=1)
+    threshold = np.maximum(CUT_FLOOR, median + CUT_MAD_FACTOR * 1.4826 * spread)
+    candidates = np.flatnonzero(deltas > threshold)
+    candidates = candidates[(candidates >= min_gap) & (candidates <= count - min_gap)]
+    cuts: list[int] = []
+    for index in candidates[np.argsort(-deltas[candidates], kind="stable")]:
+        if all(abs(int(index) - cut) >= min_gap for cut in cuts):
+            cuts.append(int(index))
+    return sorted(cuts)
+
+
+def _cell_sums(values: np.ndarray) -> np.ndarray:
+    count, rows, cols = values.shape
+    grid = values.reshape(count, MOTION_GRID, rows // MOTION_GRID, MOTION_GRID, cols // MOTION_GRID)
+    return grid.sum(axis=(2, 4))
 
-def _scene_segments(duration_sec: float, segments: int = 4) -> list[dict[str, Any]]:
+
+def motion_field(frames: FrameStore, batch_size: int = BATCH_FRAMES) -> tuple[np.ndarray, np.ndarray]:
+    """Per-frame motion energy in [0, 1] and coarse (dx, dy) motion in analysis pixels per frame.
+
+    Energy is the mean absolute difference from the previous frame. Direction is a Lucas-Kanade solve per
+    cell of a MOTION_GRID x MOTION_GRID grid, averaged over the cells with enough texture to trust.
+    Both are computed a batch at a time over the mapped frames.
+    """
+    energy = np.zeros(len(frames), dtype=np.float32)
+    flow = np.zeros((len(frames), 2), dtype=np.float32)
+    for start, batch in frames.batches(batch_size, overlap=1):
+        count = len(batch)
+        if count < 2:
+            continue
+        gray = batch.astype(np.float32) if batch.ndim == 3 else batch.astype(np.float32).mean(axis=3)
+        rows, cols = (gray.shape[1] // MOTION_GRID) * MOTION_GRID, (gray.shape[2] // MOTION_GRID) * MOTION_GRID
+        gray = gray[:, :rows, :cols] / 255.0
+        dt = np.diff(gray, axis=0)
+        energy[start + 1 : start + count] = np.abs(dt).mean(axis=(1, 2))
+        mid = 0.5 * (gray[1:] + gray[:-1])
+        dy, dx = np.gradient(mid, axis=(1, 2))
+        sxx, syy, sxy = _cell_sums(dx * dx), _cell_sums(dy * dy), _cell_sums(dx * dy)
+        sxt, syt = _cell_sums(dx * dt), _cell_sums(dy * dt)
+        det = sxx * syy - sxy * sxy
+        trusted = det > MOTION_MIN_TEXTURE * (rows * cols / MOTION_GRID**2) ** 2
+        safe = np.where(trusted, det, 1.0)
+        u = np.where(trusted, (-syy * sxt + sxy * syt) / safe, 0.0)
+        v = np.where(trusted, (sxy * sxt - sxx * syt) / safe, 0.0)
+        weight = np.maximum(trusted.sum(axis=(1, 2)), 1)
+        flow[start + 1 : start + count, 0] = u.sum(axis=(1, 2)) / weight
+        flow[start + 1 : start + count, 1] = v.sum(axis=(1, 2)) / weight
+    return energy, flow
+
+
+def _motion_direction(dx: float, dy: float) -> str:
+    if max(abs(dx), abs(dy)) < MOTION_STATIC_PX:
+        return "static"
+    if abs(dx) >= abs(dy):
+        return "right" if dx > 0 else "left"
+    return "down" if dy > 0 else "up"
+
+
+def _scene_segments(
+    duration_sec: float, cut_times: list[float], frames: FrameStore | None = None
+) -> list[dict[str, Any]]:
     if duration_sec <= 0:
         return []
-    count = max(1, min(segments, int(duration_sec // 3) + 1))
-    chunk = duration_sec / count
+    bounds = [0.0, *[t for t in cut_times if 0 < t < duration_sec], duration_sec]
+    energy, flow = motion_field(frames) if frames else (None, None)
     out = []
-    for i in range(count):
-        start = round(i * chunk, 2)
-        end = round(duration_sec if i == count - 1 else (i + 1) * chunk, 2)
-        out.append(
-            {
-                "scene_id": f"scene_{i+1}",
-                "start_sec": start,
-                "end_sec": end,
-                "summary": "High motion gameplay segment",
-                "ad_score": round(0.7 + (0.2 * (i % 2)), 2),
-            }
-        )
+    for i, (start, end) in enumerate(pairwise(bounds)):
+        scene = {
+            "scene_id": f"scene_{i + 1}",
+            "start_sec": round(start, 2),
+            "end_sec": round(end, 2),
+            "summary": "Unanalyzed segment",
+            "ad_score": None,
+        }
+        if frames and energy is not None and flow is not None:
+            # The first frame's delta is the cut itself, not motion inside the scene.
+            first = min(frames.index_at(start) + 1, len(frames) - 1)
+            last = max(first + 1, min(len(frames), round(end * frames.fps)))
+            mean_energy = float(energy[first:last].mean())
+            dx, dy = (float(x) for x in flow[first:last].mean(axis=0))
+            # Saturating map onto [0, 1], absolute rather than relative so scores compare across sources.
+            score = round(1.0 - float(np.exp(-mean_energy / MOTION_ENERGY_SCALE)), 3)
+            level = "High" if score >= 0.6 else "Moderate" if score >= 0.3 else "Low"
+            scene.update(
+                summary=f"{level} motion segment",
+                ad_score=score,
+                motion_energy=round(mean_energy, 4),
+                motion_vector=[round(dx, 3), round(dy, 3)],
+                motion_direction=_motion_direction(dx, dy),
+            )
+        out.append(scene)
     return out
 
 
-def build_video_context(project: Project, metadata: dict[str, Any]) -> dict[str, Any]:
+def _snap(target: float, cut_times: list[float], tolerance: float) -> float:
+    nearest = min(cut_times, key=lambda t: abs(t - target), default=None)
+    return nearest if nearest is not None and abs(nearest - target) <= tolerance else target
+
+
+def snap_to_beat(at_sec: float, video_context: dict[str, Any]) -> float:
+    # Only sources with a steady tempo carry beats; anything else keeps its time.
+    return _snap(at_sec, video_context.get("audio", {}).get("beats", []), BEAT_SNAP_SEC)
+
+
+def build_video_context(
+    project: Project,
+    metadata: dict[str, Any],
+    frames: FrameStore | None = None,
+    audio: dict[str, Any] | None = None,
+) -> dict[str, Any]:
     duration = float(metadata.get("duration_sec", 0.0))
-    scenes = _scene_segments(duration)
+    # Without decoded frames there is nothing to cut on, and the whole source is one scene.
+    cut_times = [round(i / frames.fps, 3) for i in detect_cuts(frame_deltas(frames), frames.fps)] if frames else []
+    scenes = _scene_segments(duration, cut_times, frames)
     hook_window_end = round(min(max(2.0, duration * 0.2), duration), 2) if duration else 2.0
+    # Windows move onto a nearby cut so the hook ends, and the CTA starts, on a shot change.
+    hook_window_end = round(_snap(hook_window_end, [t for t in cut_times if t >= 1.0], 1.5), 2)
+    cta_start = round(_snap(duration * 0.74, cut_times, 1.5), 2)
     return {
         "project_id": str(project.id),
         "template_id": project.template_id,
@@ -44,14 +188,22 @@ def build_video_context(project: Project, metadata: dict[str, Any]) -> dict[str,
         },
         "recommended_windows": {
             "hook": {"start_sec": 0.0, "end_sec": hook_window_end},
-            "cta": {"start_sec": round(duration * 0.74, 2), "end_sec": round(duration, 2)},
+            "cta": {"start_sec": cta_start, "end_sec": round(duration, 2)},
         },
         "scenes": scenes,
+        "cuts": cut_times,
+        "audio": audio or {},
     }
 
 
-def save_video_context(project: Project, source_asset: Asset, metadata: dict[str, Any]) -> VideoContext:
-    context = build_video_context(project, metadata)
+def save_video_context(
+    project: Project,
+    source_asset: Asset,
+    metadata: dict[str, Any],
+    frames: FrameStore | None = None,
+    audio: dict[str, Any] | None = None,
+) -> VideoContext:
+    context = build_video_context(project, metadata, frames, audio)
     row, _ = VideoContext.objects.update_or_create(
         project=project,
         defaults={
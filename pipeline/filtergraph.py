@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+Window = tuple[float, float]
+
+
+@dataclass(frozen=True)
+class Filter:
+    name: str
+    args: tuple[str, ...] = ()
+
+    def render(self, window: Window | None = None) -> str:
+        args = list(self.args)
+        if window is not None:
+            args.append(f"enable='between(t,{window[0]},{window[1]})'")
+        return f"{self.name}={':'.join(args)}" if args else self.name
+
+
+@dataclass
+class Node:
+    kind: str
+    inputs: list[str]
+    filters: list[Filter]
+    outputs: list[str]
+    window: Window | None = None
+
+    def render(self) -> str:
+        pads_in = "".join(f"[{label}]" for label in self.inputs)
+        pads_out = "".join(f"[{label}]" for label in self.outputs)
+        return f"{pads_in}{','.join(f.render(self.window) for f in self.filters)}{pads_out}"
+
+
+@dataclass
+class FilterGraph:
+    nodes: list[Node] = field(default_factory=list)
+    output: str = ""
+    prefix: str = ""
+    passes: list[str] = field(default_factory=list)
+    next_tag: int = 0
+
+    def tick(self) -> int:
+        tag = self.next_tag
+        self.next_tag += 1
+        return tag
+
+    def label(self, stem: str) -> str:
+        return f"{self.prefix}{stem}{self.tick()}"
+
+    def add(self, node: Node) -> Node:
+        self.nodes.append(node)
+        return node
+
+    def producer(self, label: str) -> Node | None:
+        return next((node for node in self.nodes if label in node.outputs), None)
+
+    def consumers(self, label: str) -> list[Node]:
+        return [node for node in self.nodes if label in node.inputs]
+
+    def main_chain(self) -> list[Node]:
+        chain = []
+        node = self.producer(self.output)
+        while node is not None:
+            chain.append(node)
+            node = self.producer(node.inputs[0]) if node.inputs else None
+        return chain[::-1]
+
+    def render(self) -> list[str]:
+        return [node.render() for node in self.nodes]
+
+    def describe(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "kind": node.kind,
+                "inputs": node.inputs,
+                "filters": [f.name for f in node.filters],
+                "outputs": node.outputs,
+                "window": node.window,
+            }
+            for node in self.nodes
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "nodes": len(self.nodes),
+            "filters": sum(len(node.filters) for node in self.nodes),
+            "windowed": sum(len(node.filters) for node in self.nodes if node.window is not None),
+            "passes": list(self.passes),
+        }
+
+
+def _rewire(graph: FilterGraph, old: str, new: str) -> None:
+    for node in graph.nodes:
+        node.inputs = [new if label == old else label for label in node.inputs]
+    if graph.output == old:
+        graph.output = new
+
+
+def _remove_orphans(graph: FilterGraph, labels: list[str]) -> None:
+    for label in labels:
+        producer = graph.producer(label)
+        if producer is not None and not any(graph.consumers(out) for out in producer.outputs):
+            graph.nodes.remove(producer)
+
+
+def drop_empty_windows(graph: FilterGraph, duration_sec: float | None = None) -> None:
+    dropped = False
+    for node in list(graph.nodes):
+        if node.window is None or len(node.outputs) != 1:
+            continue
+        start, end = node.window
+        # between(t,s,e) is inclusive, so a window with s == e still draws the frame at s; a segment or chunk
+        # cut exactly where an overlay ends keeps it on its first frame, as the full render does.
+        if end >= max(start, 0.0) and (duration_sec is None or start < duration_sec):
+            continue
+        graph.nodes.remove(node)
+        _rewire(graph, node.outputs[0], node.inputs[0])
+        _remove_orphans(graph, node.inputs[1:])
+        dropped = True
+    if dropped:
+        graph.passes.append("drop_empty_windows")
+
+
+def dedupe_logo_scales(graph: FilterGraph) -> None:
+    groups: dict[tuple, list[Node]] = {}
+    for node in graph.nodes:
+        if node.kind == "logo_scale":
+            groups.setdefault((tuple(node.inputs), tuple(node.filters)), []).append(node)
+    deduped = False
+    for nodes in groups.values():
+        if len(nodes) < 2:
+            continue
+        keep = nodes[0]
+        keep.outputs = [out for node in nodes for out in node.outputs]
+        keep.filters = [*keep.filters, Filter("split", (str(len(keep.outputs)),))]
+        for node in nodes[1:]:
+            graph.nodes.remove(node)
+        deduped = True
+    if deduped:
+        graph.passes.append("dedupe_logo_scales")
+
+
+def merge_matching_windows(graph: FilterGraph) -> None:
+    merged = False
+    idx = 0
+    while idx < len(graph.nodes):
+        node = graph.nodes[idx]
+        consumers = graph.consumers(node.outputs[0]) if len(node.outputs) == 1 else []
+        if node.window is not None and len(node.inputs) == 1 and len(consumers) == 1:
+            nxt = consumers[0]
+            if nxt.window == node.window and len(nxt.inputs) == 1:
+                node.kind = f"{node.kind}+{nxt.kind}"
+                node.filters = [*node.filters, *nxt.filters]
+                node.outputs = nxt.outputs
+                graph.nodes.remove(nxt)
+                merged = True
+                continue
+        idx += 1
+    if merged:
+        graph.passes.append("merge_matching_windows")
+
+
+def split_at_time_boundaries(graph: FilterGraph, duration_sec: float | None = None) -> None:
+    chain = graph.main_chain()
+    last_global = max((idx for idx, node in enumerate(chain) if node.window is None), default=-1)
+    timed = chain[last_global + 1 :]
+    if last_global < 0 or not timed:
+        return
+    limit = duration_sec if duration_sec is not None else float("inf")
+    cuts = sorted({round(t, 6) for node in timed for t in node.window if 0.0 < t < limit})
+    if not cuts:
+        return
+
+    # Frames are routed by timestamp: each interval only carries the filters whose window touches it,
+    # and filters that cover the whole interval lose their per-frame enable expression.
+    bounds = list(zip([0.0, *cuts], [*cuts, None], strict=True))
+    source = chain[last_global].outputs[0]
+    branches = [graph.label("ts") for _ in bounds]
+    new_nodes = [Node("time_split", [source], [Filter("split", (str(len(bounds)),))], branches)]
+    tails = []
+    for (start, end), branch in zip(bounds, branches, strict=True):
+        trim_args = ([f"start={start}"] if start > 0 else []) + ([f"end={end}"] if end is not None else [])
+        current = graph.label("tr")
+        rebase = [Filter("trim", tuple(trim_args)), Filter("setpts", ("PTS-STARTPTS",))]
+        new_nodes.append(Node("interval", [branch], rebase, [current]))
+        stop = end if end is not None else limit
+        for node in timed:
+            w_start, w_end = node.window
+            if not (w_start < stop and w_end >= start):
+                continue
+            covers = w_start <= start and w_end >= stop
+            window = None if covers else (round(max(w_start - start, 0.0), 6), round(w_end - start, 6))
+            extra = []
+            for label in node.inputs[1:]:
+                producer = graph.producer(label)
+                fresh = graph.label("lg")
+                filters = [f for f in producer.filters if f.name != "split"]
+                new_nodes.append(Node(producer.kind, list(producer.inputs), filters, [fresh]))
+                extra.append(fresh)
+            out = graph.label("tv")
+            new_nodes.append(replace(node, inputs=[current, *extra], outputs=[out], window=window))
+            current = out
+        tails.append(current)
+
+    output = graph.label("tc")
+    new_nodes.append(Node("concat", tails, [Filter("concat", (f"n={len(tails)}", "v=1", "a=0"))], [output]))
+    for node in timed:
+        graph.nodes.remove(node)
+        _remove_orphans(graph, node.inputs[1:])
+    graph.nodes.extend(new_nodes)
+    graph.output = output
+    graph.passes.append("split_at_time_boundaries")
+
+
+def optimize(graph: FilterGraph, duration_sec: float | None = None, time_split: bool = False) -> FilterGraph:
+    drop_empty_windows(graph, duration_sec)
+    dedupe_logo_scales(graph)
+    merge_matching_windows(graph)
+    if time_split:
+        split_at_time_boundaries(graph, duration_sec)
+    return graph
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+CHANNELS = {"gray": 1, "rgb24": 3}
+BATCH_FRAMES = 256
+
+
+def frame_layout(width: int, height: int, target_width: int, fps: float, pix_fmt: str = "gray") -> dict[str, Any]:
+    out_width = max(2, target_width - target_width % 2)
+    out_height = max(2, round(out_width * height / max(width, 1) / 2) * 2)
+    return {"width": out_width, "height": out_height, "fps": float(fps), "pix_fmt": pix_fmt}
+
+
+@dataclass(frozen=True)
+class FrameStore:
+    """Decoded analysis frames, (frames, H, W) for gray or (frames, H, W, 3) for RGB, mapped read-only.
+
+    Every accessor returns a view onto the mapping, so analyzers share the page cache instead of holding
+    copies, and resident memory follows what is being read rather than the length of the video.
+    """
+
+    frames: np.ndarray
+    fps: float
+
+    @classmethod
+    def open(cls, path: Path, layout: dict[str, Any]) -> FrameStore:
+        channels = CHANNELS[layout["pix_fmt"]]
+        height, width = int(layout["height"]), int(layout["width"])
+        count = path.stat().st_size // (height * width * channels)
+        shape = (count, height, width, channels) if channels > 1 else (count, height, width)
+        if count == 0:
+            # np.memmap cannot map an empty file.
+            return cls(np.zeros(shape, dtype=np.uint8), float(layout["fps"]))
+        return cls(np.memmap(path, dtype=np.uint8, mode="r", shape=shape), float(layout["fps"]))
+
+    def __len__(self) -> int:
+        return int(self.frames.shape[0])
+
+    @property
+    def duration_sec(self) -> float:
+        return len(self) / self.fps
+
+    def index_at(self, at_sec: float) -> int:
+        return min(max(round(at_sec * self.fps), 0), max(len(self) - 1, 0))
+
+    def window(self, start_sec: float, end_sec: float) -> np.ndarray:
+        start = self.index_at(start_sec)
+        return self.frames[start : max(start + 1, round(end_sec * self.fps))]
+
+    def batches(self, size: int = BATCH_FRAMES, overlap: int = 0) -> Iterator[tuple[int, np.ndarray]]:
+        # overlap repeats the last frames of the previous batch, so frame-to-frame deltas cross batch edges.
+        for start in range(0, len(self), size):
+            first = max(0, start - overlap)
+            yield first, self.frames[first : start + size]
+
+    def sample(self, start_sec: float, end_sec: float, count: int) -> np.ndarray:
+        # A handful of evenly spaced frames; fancy indexing copies only those frames.
+        first = self.index_at(start_sec)
+        last = max(first, min(self.index_at(end_sec), round(end_sec * self.fps) - 1))
+        return self.frames[np.unique(np.linspace(first, last, num=max(count, 1)).round().astype(np.intp))]
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pipeline import services
+from projects.models import Project
+
+
+def _synthetic_overlays(count: int, duration_sec: float) -> list[dict]:
+    kinds = ["headline", "callout", "cta"]
+    span = duration_sec / max(1, count)
+    overlays = []
+    for idx in range(count):
+        start = round(idx * span, 3)
+        overlays.append(
+            {
+                "id": f"bench_{idx}",
+                "type": kinds[idx % len(kinds)],
+                "start_sec": start,
+                "end_sec": round(min(duration_sec, start + max(span, 1.0)), 3),
+                "text": f"Overlay {idx}",
+                "position": {"x": 0.5, "y": 0.15 + 0.7 * ((idx % 8) / 8), "anchor": "center"},
+                "style": {"font_size": 64, "color": "white", "box": "black@0.45", "box_border": 18},
+            }
+        )
+    return overlays
+
+
+class Command(BaseCommand):
+    help = "Compare drawtext and ASS text overlay backends at increasing overlay counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--counts", default="3,30,300")
+        parser.add_argument("--duration", type=float, default=10.0)
+        parser.add_argument("--dry-run", action="store_true", help="Only report filter graph sizes.")
+
+    def handle(self, *args, **options):
+        counts = [int(c) for c in options["counts"].split(",") if c.strip()]
+        duration = float(options["duration"])
+        project = Project(name="bench", primary_color="#00A86B")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            src = workdir / "source.mp4"
+            if not options["dry_run"]:
+                subprocess.run(
+                    [
+                        "ffmpeg",
+                        "-y",
+                        "-f",
+                        "lavfi",
+                        "-i",
+                        f"testsrc2=s={settings.TARGET_WIDTH}x{settings.TARGET_HEIGHT}:r={settings.TARGET_FPS}:d={duration}",
+                        "-c:v",
+                        "libx264",
+                        "-preset",
+                        "ultrafast",
+                        str(src),
+                    ],
+                    check=True,
+                    capture_output=True,
+                )
+
+            self.stdout.write(f"{'backend':<10}{'overlays':>10}{'filters':>10}{'graph_chars':>14}{'seconds':>10}")
+            for count in counts:
+                overlays = _synthetic_overlays(count, duration)
+                for backend in ("drawtext", "ass"):
+                    dst = workdir / f"{backend}_{count}.mp4"
+                    ass_path = workdir / "overlays.ass" if backend == "ass" else None
+                    cmd = services._render_command(src, dst, overlays, project, ass_path=ass_path)
+                    graph = cmd[cmd.index("-filter_complex") + 1]
+                    elapsed = "-"
+                    if not options["dry_run"]:
+                        previous = settings.TEXT_OVERLAY_BACKEND
+                        settings.TEXT_OVERLAY_BACKEND = backend
+                        started = time.perf_counter()
+                        try:
+                            services.render_with_overlays(src, dst, {"overlays": overlays}, project)
+                        finally:
+                            settings.TEXT_OVERLAY_BACKEND = previous
+                        elapsed = f"{time.perf_counter() - started:.2f}"
+                    self.stdout.write(
+                        f"{backend:<10}{count:>10}{len(graph.split(';')):>10}{len(graph):>14}{elapsed:>10}"
+                    )
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import errno
+import hashlib
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = 1024 * 1024
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+_UNSUPPORTED = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EINVAL, errno.ENOSYS, errno.EPERM, errno.ENOTTY}
+
+
+@dataclass(frozen=True)
+class Materialized:
+    method: str
+    size_bytes: int
+    sha256: str | None = None
+
+
+def _hardlink(src: Path, dst: Path) -> None:
+    os.link(src, dst)
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    import fcntl
+
+    with src.open("rb") as fin, dst.open("wb") as fout:
+        fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+
+
+def _kernel_copy(src: Path, dst: Path) -> None:
+    with src.open("rb") as fin, dst.open("wb") as fout:
+        remaining = os.fstat(fin.fileno()).st_size
+        copy = getattr(os, "copy_file_range", None)
+        while remaining > 0:
+            if copy is not None:
+                try:
+                    sent = copy(fin.fileno(), fout.fileno(), min(remaining, 1 << 30))
+                except OSError as exc:
+                    if exc.errno not in _UNSUPPORTED:
+                        raise
+                    copy = None
+                    continue
+            else:
+                sent = os.sendfile(fout.fileno(), fin.fileno(), None, min(remaining, 1 << 30))
+            if sent == 0:
+                break
+            remaining -= sent
+        if remaining:
+            raise OSError(errno.EIO, f"short kernel copy of {src}")
+
+
+def _stream_copy(src: Path, dst: Path) -> str:
+    digest = hashlib.sha256()
+    with src.open("rb") as fin, dst.open("wb") as fout:
+        while chunk := fin.read(CHUNK_BYTES):
+            digest.update(chunk)
+            fout.write(chunk)
+    return digest.hexdigest()
+
+
+def _checksum(path: Path) -> str:
+    with path.open("rb") as fh:
+        return hashlib.file_digest(fh, "sha256").hexdigest()
+
+
+def materialize(src: Path, dst: Path, checksum: bool = False, allow_link: bool = True) -> Materialized:
+    # Cheapest method first; every path runs in constant memory and publishes dst with an atomic rename.
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:8]}.tmp")
+    strategies = [("hardlink", _hardlink)] if allow_link else []
+    strategies += [("reflink", _reflink), ("kernel_copy", _kernel_copy)]
+    try:
+        for method, strategy in strategies:
+            try:
+                strategy(src, tmp)
+            except (OSError, AttributeError, ImportError) as exc:
+                tmp.unlink(missing_ok=True)
+                if isinstance(exc, OSError) and exc.errno == errno.ENOENT:
+                    raise
+                logger.debug("materialize %s via %s unavailable: %s", src.name, method, exc)
+                continue
+            digest = _checksum(tmp) if checksum else None
+            break
+        else:
+            method = "stream_copy"
+            digest = _stream_copy(src, tmp)
+        size = tmp.stat().st_size
+        os.replace(tmp, dst)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return Materialized(method=method, size_bytes=size, sha256=digest)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q, Sum
+from django.utils import timezone
+
+from pipeline.materialize import materialize
+from projects.models import Asset, Draft, Job, StoredMedia
+
+logger = logging.getLogger(__name__)
+
+NORMALIZED = "normalized"
+PROBE = "probe"
+PROXY = "proxy"
+THUMBNAIL = "thumbnail"
+SPRITE = "sprite"
+SPRITE_INDEX = "sprite_index"
+FRAMES = "frames"
+AUDIO = "audio"
+
+SUFFIXES = {
+    NORMALIZED: ".mp4",
+    PROBE: ".json",
+    PROXY: ".mp4",
+    THUMBNAIL: ".jpg",
+    SPRITE: ".jpg",
+    SPRITE_INDEX: ".json",
+    FRAMES: ".raw",
+    AUDIO: ".json",
+}
+
+
+def variant_key(params: dict[str, Any]) -> str:
+    raw = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class MediaStore:
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def path(self, digest: str, kind: str, variant: str = "") -> Path:
+        name = f"{kind}-{variant}" if variant else kind
+        return self.root / digest[:2] / digest / f"{name}{SUFFIXES.get(kind, '')}"
+
+    def _relative(self, path: Path) -> str:
+        return str(path.relative_to(Path(settings.MEDIA_ROOT)))
+
+    def fetch(self, digest: str, kind: str, variant: str = "") -> Path | None:
+        path = self.path(digest, kind, variant)
+        rows = StoredMedia.objects.filter(digest=digest, kind=kind, variant=variant)
+        if not path.exists():
+            rows.delete()
+            return None
+        if not rows.update(last_used_at=timezone.now()):
+            # Written by a worker that died before recording it; adopt the file rather than rebuild it.
+            self._record(digest, kind, variant, path)
+        return path
+
+    def _record(self, digest: str, kind: str, variant: str, path: Path) -> None:
+        StoredMedia.objects.update_or_create(
+            digest=digest,
+            kind=kind,
+            variant=variant,
+            defaults={"path": self._relative(path), "size_bytes": path.stat().st_size, "last_used_at": timezone.now()},
+        )
+
+    @contextmanager
+    def write(self, digest: str, kind: str, variant: str = "") -> Iterator[Path]:
+        # Producers write a private sibling (same suffix, so ffmpeg picks the right muxer) that is only
+        # renamed into place once complete; readers never observe a partial entry.
+        final = self.path(digest, kind, variant)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        staging = final.with_name(f".{final.stem}.{uuid.uuid4().hex[:8]}{final.suffix}")
+        try:
+            yield staging
+            os.replace(staging, final)
+        finally:
+            staging.unlink(missing_ok=True)
+        self._record(digest, kind, variant, final)
+        self.evict(keep=final)
+
+    def put(self, digest: str, kind: str, src: Path, variant: str = "") -> Path:
+        with self.write(digest, kind, variant) as staging:
+            materialize(src, staging)
+        return self.path(digest, kind, variant)
+
+    def fetch_json(self, digest: str, kind: str, variant: str = "") -> dict | None:
+        path = self.fetch(digest, kind, variant)
+        if path is None:
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def store_json(self, digest: str, kind: str, payload: dict, variant: str = "") -> Path:
+        with self.write(digest, kind, variant) as staging:
+            staging.write_text(json.dumps(payload, sort_keys=True), encoding="utf-8")
+        return self.path(digest, kind, variant)
+
+    def refcount(self, digest: str) -> int:
+        return Asset.objects.filter(sha256=digest).count() + Draft.objects.filter(source_sha256=digest).count()
+
+    def _delete(self, row: StoredMedia) -> None:
+        (Path(settings.MEDIA_ROOT) / row.path).unlink(missing_ok=True)
+        row.delete()
+
+    def release(self, digest: str) -> int:
+        if self.refcount(digest):
+            return 0
+        rows = list(StoredMedia.objects.filter(digest=digest))
+        for row in rows:
+            self._delete(row)
+        return len(rows)
+
+    def _in_use(self) -> set[str]:
+        # Digests that pending or running jobs read back by path: an ingest's later stages read what its earlier
+        # ones stored, and draft and export jobs (and the chunk workers they hand off to) read their project's
+        # stored intermediates.
+        live = Job.objects.filter(status__in=[Job.Status.PENDING, Job.Status.RUNNING])
+        ingests = live.filter(job_type=Job.JobType.INGEST_SOURCE)
+        asset_ids = [asset_id for asset_id in ingests.values_list("payload_json__asset_id", flat=True) if asset_id]
+        projects = live.exclude(job_type=Job.JobType.INGEST_SOURCE).values("project_id")
+        sources = Asset.objects.filter(
+            Q(id__in=asset_ids) | Q(project__in=projects, asset_type=Asset.AssetType.SOURCE_VIDEO)
+        )
+        digests = set(sources.exclude(sha256="").values_list("sha256", flat=True))
+        drafts = Draft.objects.filter(project__in=projects).exclude(source_sha256="")
+        return digests | set(drafts.values_list("source_sha256", flat=True))
+
+    def evict(self, keep: Path | None = None) -> None:
+        if self.max_bytes <= 0:
+            return
+        total = StoredMedia.objects.aggregate(total=Sum("size_bytes"))["total"] or 0
+        if total <= self.max_bytes:
+            return
+        # Unreferenced entries go first, then the least recently used referenced ones: every entry can be
+        # rebuilt from its upload, so the quota wins over keeping a hot artifact around. Entries a live job
+        # still needs are never candidates; the quota may overshoot until it finishes.
+        referenced = Exists(Asset.objects.filter(sha256=OuterRef("digest"))) | Exists(
+            Draft.objects.filter(source_sha256=OuterRef("digest"))
+        )
+        rows = (
+            StoredMedia.objects.exclude(digest__in=self._in_use())
+            .annotate(referenced=referenced)
+            .order_by("referenced", "last_used_at")
+        )
+        keep_path = self._relative(keep) if keep is not None else None
+        for row in rows:
+            if total <= self.max_bytes:
+                break
+            if row.path == keep_path:
+                continue
+            self._delete(row)
+            total -= row.size_bytes
+            logger.info("media store evicted %s %s (%s bytes)", row.kind, row.digest[:12], row.size_bytes)
+
+    def stats(self) -> dict[str, int]:
+        totals = StoredMedia.objects.aggregate(total=Sum("size_bytes"))
+        return {"entries": StoredMedia.objects.count(), "bytes": totals["total"] or 0, "max_bytes": self.max_bytes}
+
+
+def get_media_store() -> MediaStore:
+    return MediaStore(Path(settings.MEDIA_ROOT) / "store", int(settings.MEDIA_STORE_MAX_BYTES))
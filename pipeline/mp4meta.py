@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import struct
+from collections import Counter
+from collections.abc import Iterator
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, cast
+
+# Matches what ffprobe reports for its mov demuxer, so cached and fallback probes look the same.
+FORMAT_NAME = "mov,mp4,m4a,3gp,3g2,mj2"
+
+TOP_LEVEL_START = {b"ftyp", b"moov", b"free", b"skip", b"wide", b"mdat", b"pnot", b"uuid"}
+
+VIDEO_CODECS = {b"avc1": "h264", b"avc3": "h264", b"hvc1": "hevc", b"hev1": "hevc"}
+AUDIO_CODECS = {b"Opus": "opus", b"ac-3": "ac3", b"ec-3": "eac3", b"alac": "alac", b"fLaC": "flac"}
+# MPEG-4 objectTypeIndication values carried by mp4a sample entries.
+MP4A_OBJECT_TYPES = {0x40: "aac", 0x66: "aac", 0x67: "aac", 0x68: "aac", 0x69: "mp3", 0x6B: "mp3"}
+
+# H.264 profiles whose SPS carries chroma_format_idc and bit depths (7.3.2.1.1).
+_H264_CHROMA_PROFILES = {100, 110, 122, 244, 44, 83, 86, 118, 128, 138, 139, 134, 135}
+# H.264 Table E-1.
+_H264_SAR = [
+    None,
+    (1, 1),
+    (12, 11),
+    (10, 11),
+    (16, 11),
+    (40, 33),
+    (24, 11),
+    (20, 11),
+    (32, 11),
+    (80, 33),
+    (18, 11),
+    (15, 11),
+    (64, 33),
+    (160, 99),
+    (4, 3),
+    (3, 2),
+    (2, 1),
+]
+_CHROMA = {0: "gray", 1: "yuv420p", 2: "yuv422p", 3: "yuv444p"}
+
+
+class Mp4ParseError(ValueError):
+    pass
+
+
+def _boxes(buf: mmap.mmap, start: int, end: int, partial: bool = False) -> Iterator[tuple[bytes, int, int]]:
+    # partial: the file is still arriving, so a box running past the end stops the walk instead of failing it.
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", buf, pos)
+        header = 8
+        if size == 1:
+            if partial and pos + 16 > end:
+                return
+            (size,) = struct.unpack_from(">Q", buf, pos + 8)
+            header = 16
+        elif size == 0:
+            if partial:
+                return
+            size = end - pos
+        if size < header:
+            raise Mp4ParseError(f"invalid {kind!r} box size at offset {pos}")
+        if pos + size > end:
+            if partial:
+                return
+            raise Mp4ParseError(f"truncated {kind!r} box at offset {pos}")
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _child(buf: mmap.mmap, start: int, end: int, *path: bytes) -> tuple[int, int] | None:
+    for kind, child_start, child_end in _boxes(buf, start, end):
+        if kind == path[0]:
+            return (child_start, child_end) if len(path) == 1 else _child(buf, child_start, child_end, *path[1:])
+    return None
+
+
+class _Bits:
+    def __init__(self, data: bytes):
+        # Emulation prevention bytes are not part of the RBSP.
+        self.data = data.replace(b"\x00\x00\x03", b"\x00\x00")
+        self.pos = 0
+
+    def u(self, count: int) -> int:
+        value = 0
+        for _ in range(count):
+            value = (value << 1) | ((self.data[self.pos >> 3] >> (7 - (self.pos & 7))) & 1)
+            self.pos += 1
+        return value
+
+    def ue(self) -> int:
+        zeros = 0
+        while not self.u(1):
+            zeros += 1
+            if zeros > 31:
+                raise Mp4ParseError("invalid exp-golomb code")
+        return (1 << zeros) - 1 + self.u(zeros)
+
+    def se(self) -> int:
+        value = self.ue()
+        return (value + 1) // 2 if value % 2 else -(value // 2)
+
+
+def _parse_h264_sps(nal: bytes) -> dict[str, Any]:
+    bits = _Bits(nal[1:])
+    profile = bits.u(8)
+    bits.u(16)  # constraint flags, level_idc
+    bits.ue()  # seq_parameter_set_id
+    chroma, bit_depth = 1, 8
+    if profile in _H264_CHROMA_PROFILES:
+        chroma = bits.ue()
+        if chroma == 3:
+            bits.u(1)  # separate_colour_plane_flag
+        bit_depth = bits.ue() + 8
+        bits.ue()  # bit_depth_chroma_minus8
+        bits.u(1)  # qpprime_y_zero_transform_bypass_flag
+        if bits.u(1):  # seq_scaling_matrix_present_flag
+            for index in range(8 if chroma != 3 else 12):
+                if bits.u(1):
+                    last = nxt = 8
+                    for _ in range(16 if index < 6 else 64):
+                        if nxt:
+                            nxt = (last + bits.se() + 256) % 256
+                        last = nxt or last
+    bits.ue()  # log2_max_frame_num_minus4
+    poc_type = bits.ue()
+    if poc_type == 0:
+        bits.ue()
+    elif poc_type == 1:
+        bits.u(1)
+        bits.se()
+        bits.se()
+        for _ in range(bits.ue()):
+            bits.se()
+    bits.ue()  # max_num_ref_frames
+    bits.u(1)  # gaps_in_frame_num_value_allowed_flag
+    bits.ue()  # pic_width_in_mbs_minus1
+    bits.ue()  # pic_height_in_map_units_minus1
+    if not bits.u(1):  # frame_mbs_only_flag
+        bits.u(1)
+    bits.u(1)  # direct_8x8_inference_flag
+    if bits.u(1):  # frame_cropping_flag
+        for _ in range(4):
+            bits.ue()
+    sar, full_range = None, False
+    if bits.u(1):  # vui_parameters_present_flag
+        if bits.u(1):  # aspect_ratio_info_present_flag
+            idc = bits.u(8)
+            if idc == 255:
+                sar = (bits.u(16), bits.u(16))
+            elif idc < len(_H264_SAR):
+                sar = _H264_SAR[idc]
+        if bits.u(1):  # overscan_info_present_flag
+            bits.u(1)
+        if bits.u(1):  # video_signal_type_present_flag
+            bits.u(3)
+            full_range = bool(bits.u(1))
+    return {"chroma": chroma, "bit_depth": bit_depth, "sar": sar, "full_range": full_range}
+
+
+def _pix_fmt(chroma: int, bit_depth: int, full_range: bool = False) -> str:
+    base = _CHROMA.get(chroma)
+    if base is None:
+        raise Mp4ParseError(f"unsupported chroma format {chroma}")
+    if bit_depth > 8:
+        return f"{base}{bit_depth}le"
+    # ffmpeg's H.264 decoder reports full-range 8-bit YUV as the deprecated yuvj* formats.
+    return base.replace("yuv", "yuvj") if full_range and chroma else base
+
+
+def _video_entry(buf: mmap.mmap, kind: bytes, start: int, end: int) -> dict[str, Any]:
+    width, height = struct.unpack_from(">HH", buf, start + 24)
+    info: dict[str, Any] = {"codec_name": VIDEO_CODECS[kind], "width": width, "height": height}
+    sar = None
+    children = {child: (child_start, child_end) for child, child_start, child_end in _boxes(buf, start + 78, end)}
+    if kind in (b"avc1", b"avc3"):
+        if b"avcC" not in children:
+            raise Mp4ParseError("avc sample entry without avcC")
+        config_start, config_end = children[b"avcC"]
+        if not buf[config_start + 5] & 0x1F:
+            raise Mp4ParseError("avcC without SPS")
+        (sps_len,) = struct.unpack_from(">H", buf, config_start + 6)
+        if config_start + 8 + sps_len > config_end:
+            raise Mp4ParseError("truncated SPS")
+        sps = _parse_h264_sps(buf[config_start + 8 : config_start + 8 + sps_len])
+        info["pix_fmt"] = _pix_fmt(sps["chroma"], sps["bit_depth"], sps["full_range"])
+        sar = sps["sar"]
+    else:
+        if b"hvcC" not in children:
+            raise Mp4ParseError("hevc sample entry without hvcC")
+        config_start, _ = children[b"hvcC"]
+        info["pix_fmt"] = _pix_fmt(buf[config_start + 16] & 0x03, (buf[config_start + 17] & 0x07) + 8)
+    if sar is None and b"pasp" in children:
+        sar = struct.unpack_from(">II", buf, children[b"pasp"][0])
+    info["sample_aspect_ratio"] = f"{sar[0]}:{sar[1]}" if sar else None
+    return info
+
+
+def _descriptor(buf: mmap.mmap, pos: int) -> tuple[int, int, int]:
+    tag, pos, length = buf[pos], pos + 1, 0
+    for _ in range(4):
+        byte = buf[pos]
+        pos += 1
+        length = (length << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            break
+    return tag, pos, length
+
+
+def _mp4a_codec(buf: mmap.mmap, start: int, end: int) -> str:
+    # QuickTime files wrap the descriptor in a wave atom.
+    esds = _child(buf, start, end, b"esds") or _child(buf, start, end, b"wave", b"esds")
+    if esds is None:
+        raise Mp4ParseError("mp4a sample entry without esds")
+    tag, pos, _ = _descriptor(buf, esds[0] + 4)
+    if tag != 0x03:
+        raise Mp4ParseError("esds without ES descriptor")
+    flags = buf[pos + 2]
+    pos += 3
+    if flags & 0x80:
+        pos += 2
+    if flags & 0x40:
+        pos += 1 + buf[pos]
+    if flags & 0x20:
+        pos += 2
+    tag, pos, _ = _descriptor(buf, pos)
+    codec = MP4A_OBJECT_TYPES.get(buf[pos]) if tag == 0x04 else None
+    if codec is None:
+        raise Mp4ParseError("unsupported mp4a object type")
+    return codec
+
+
+def _audio_entry(buf: mmap.mmap, kind: bytes, start: int, end: int) -> str:
+    if kind in AUDIO_CODECS:
+        return AUDIO_CODECS[kind]
+    if kind != b"mp4a":
+        raise Mp4ParseError(f"unsupported audio sample entry {kind!r}")
+    # QuickTime sound description versions 1 and 2 extend the entry before its child boxes.
+    (version,) = struct.unpack_from(">H", buf, start + 8)
+    return _mp4a_codec(buf, start + 28 + {0: 0, 1: 16, 2: 36}.get(version, 0), end)
+
+
+def _rotation(buf: mmap.mmap, start: int) -> int:
+    version = buf[start]
+    a, b, _, c, d = struct.unpack_from(">5i", buf, start + (52 if version == 1 else 40))
+    if not (math.hypot(a, c) and math.hypot(b, d)):
+        return 0
+    # Same convention as av_display_rotation_get, which ffprobe reports.
+    angle = math.degrees(math.atan2(b / math.hypot(b, d), a / math.hypot(a, c)))
+    return round(-angle) or 0
+
+
+def _media_header(buf: mmap.mmap, start: int) -> tuple[int, int]:
+    if buf[start] == 1:
+        return struct.unpack_from(">IQ", buf, start + 20)
+    return struct.unpack_from(">II", buf, start + 12)
+
+
+def _track(buf: mmap.mmap, start: int, end: int) -> dict[str, Any] | None:
+    tkhd = _child(buf, start, end, b"tkhd")
+    mdia = _child(buf, start, end, b"mdia")
+    if tkhd is None or mdia is None:
+        return None
+    hdlr = _child(buf, *mdia, b"hdlr")
+    mdhd = _child(buf, *mdia, b"mdhd")
+    stbl = _child(buf, *mdia, b"minf", b"stbl")
+    if hdlr is None or mdhd is None or stbl is None:
+        return None
+    handler = bytes(buf[hdlr[0] + 8 : hdlr[0] + 12])
+    if handler not in (b"vide", b"soun"):
+        return None
+    timescale, duration = _media_header(buf, mdhd[0])
+    stsd = _child(buf, *stbl, b"stsd")
+    if stsd is None or not timescale:
+        raise Mp4ParseError("track without sample description")
+    kind, entry_start, entry_end = next(_boxes(buf, stsd[0] + 8, stsd[1]))
+    track: dict[str, Any] = {"handler": handler, "timescale": timescale, "duration": duration}
+    if handler == b"vide":
+        if kind not in VIDEO_CODECS:
+            raise Mp4ParseError(f"unsupported video sample entry {kind!r}")
+        track.update(_video_entry(buf, kind, entry_start, entry_end))
+        track["rotation"] = _rotation(buf, tkhd[0])
+        stts = _child(buf, *stbl, b"stts")
+        if stts is None:
+            raise Mp4ParseError("video track without stts")
+        (count,) = struct.unpack_from(">I", buf, stts[0] + 4)
+        deltas: Counter[int] = Counter()
+        for index in range(count):
+            samples, delta = struct.unpack_from(">II", buf, stts[0] + 8 + index * 8)
+            deltas[delta] += samples
+        delta = deltas.most_common(1)[0][0] if deltas else 0
+        if not delta:
+            raise Mp4ParseError("video track without sample durations")
+        rate = Fraction(timescale, delta)
+        track["fps"] = f"{rate.numerator}/{rate.denominator}"
+    else:
+        track["audio_codec"] = _audio_entry(buf, kind, entry_start, entry_end)
+        stsz = _child(buf, *stbl, b"stsz")
+        total = 0
+        if stsz is not None:
+            sample_size, count = struct.unpack_from(">II", buf, stsz[0] + 4)
+            total = sample_size * count if sample_size else sum(struct.unpack_from(f">{count}I", buf, stsz[0] + 12))
+        track["audio_bit_rate"] = round(total * 8 * timescale / duration) if duration else 0
+    return track
+
+
+def _parse(buf: mmap.mmap, size: int, partial: bool = False) -> dict[str, Any] | None:
+    if buf[4:8] not in TOP_LEVEL_START:
+        # Checked up front because a partial walk stops quietly at a first box that runs past the data.
+        raise Mp4ParseError("not an ISO base media file")
+    moov = None
+    for kind, start, end in _boxes(buf, 0, size, partial):
+        if kind == b"moof":
+            raise Mp4ParseError("fragmented file")
+        if kind == b"moov":
+            moov = (start, end)
+    if moov is None:
+        if partial:
+            return None
+        raise Mp4ParseError("no moov box")
+    mvhd = _child(buf, *moov, b"mvhd")
+    if mvhd is None:
+        raise Mp4ParseError("no mvhd box")
+    timescale, duration = _media_header(buf, mvhd[0])
+    if not timescale or not duration:
+        raise Mp4ParseError("movie has no duration")
+    video = audio = None
+    for kind, start, end in _boxes(buf, *moov):
+        if kind != b"trak":
+            continue
+        track = _track(buf, start, end)
+        if track is None:
+            continue
+        if track["handler"] == b"vide" and video is None:
+            video = track
+        elif track["handler"] == b"soun" and audio is None:
+            audio = track
+    if video is None:
+        raise Mp4ParseError("no video track")
+    return {
+        "duration_sec": duration / timescale,
+        "width": video["width"],
+        "height": video["height"],
+        "fps": video["fps"],
+        "codec_name": video["codec_name"],
+        "format_name": FORMAT_NAME,
+        "pix_fmt": video["pix_fmt"],
+        "sample_aspect_ratio": video["sample_aspect_ratio"],
+        "rotation": video["rotation"],
+        "audio_codec": audio["audio_codec"] if audio else None,
+        "audio_bit_rate": audio["audio_bit_rate"] if audio else 0,
+    }
+
+
+def _read(path: Path, partial: bool) -> dict[str, Any] | None:
+    # Only header boxes are touched through the mapping; mdat is skipped by its size field, so probing a
+    # large upload faults in a few pages instead of reading the payload.
+    with path.open("rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size < 8:
+            raise Mp4ParseError("file too small")
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if hasattr(mmap, "MADV_RANDOM"):
+                buf.madvise(mmap.MADV_RANDOM)
+            try:
+                return _parse(buf, size, partial)
+            except (struct.error, IndexError, StopIteration) as exc:
+                raise Mp4ParseError(f"malformed box structure: {exc}") from exc
+
+
+def read_mp4_metadata(path: Path) -> dict[str, Any]:
+    # A complete file either has a moov box or raises, so the result is never None here.
+    return cast(dict[str, Any], _read(path, partial=False))
+
+
+def read_partial_mp4_metadata(path: Path) -> dict[str, Any] | None:
+    # For files still being written: None until a complete moov box has arrived (never, for files that put
+    # it after mdat), metadata once it has, and Mp4ParseError as soon as the bytes cannot be ISO-BMFF.
+    return _read(path, partial=True)
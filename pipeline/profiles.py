@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RenderTier:
+    name: str
+    scale: float
+    preset: str
+    crf: int
+
+    def dimensions(self, width: int, height: int) -> tuple[int, int]:
+        return _even(width * self.scale), _even(height * self.scale)
+
+    def scaled(self, value: float) -> int:
+        return max(1, round(value * self.scale))
+
+
+def _even(value: float) -> int:
+    return max(2, round(value / 2) * 2)
+
+
+FULL = RenderTier(name="full", scale=1.0, preset="veryfast", crf=23)
+PROXY = RenderTier(name="proxy", scale=0.5, preset="ultrafast", crf=28)
+
+RENDER_TIERS = {tier.name: tier for tier in (FULL, PROXY)}
+
+
+def get_render_tier(name: str) -> RenderTier:
+    tier = RENDER_TIERS.get(name)
+    if tier is None:
+        raise ValueError(f"Unknown render tier: {name}")
+    return tier
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    name: str
+    video_codec: str
+    preset: str
+    crf: int
+    maxrate_kbps: int
+    bufsize_kbps: int
+    gop_sec: float
+    audio_bitrate_kbps: int
+    faststart: bool = True
+
+    def video_args(self, fps: int) -> list[str]:
+        gop = max(1, round(self.gop_sec * fps))
+        return [
+            "-c:v",
+            self.video_codec,
+            "-preset",
+            self.preset,
+            "-crf",
+            str(self.crf),
+            "-maxrate",
+            f"{self.maxrate_kbps}k",
+            "-bufsize",
+            f"{self.bufsize_kbps}k",
+            "-g",
+            str(gop),
+            "-keyint_min",
+            str(gop),
+            "-pix_fmt",
+            "yuv420p",
+        ]
+
+    def audio_args(self) -> list[str]:
+        return ["-c:a", "aac", "-b:a", f"{self.audio_bitrate_kbps}k"]
+
+    def container_args(self) -> list[str]:
+        return ["-movflags", "+faststart"] if self.faststart else []
+
+
+TIKTOK_HIGH = EncoderProfile(
+    name="tiktok_high",
+    video_codec="libx264",
+    preset="slow",
+    crf=20,
+    maxrate_kbps=8000,
+    bufsize_kbps=16000,
+    gop_sec=2.0,
+    audio_bitrate_kbps=192,
+)
+REELS_STANDARD = EncoderProfile(
+    name="reels_standard",
+    video_codec="libx264",
+    preset="medium",
+    crf=23,
+    maxrate_kbps=5000,
+    bufsize_kbps=10000,
+    gop_sec=2.0,
+    audio_bitrate_kbps=128,
+)
+PREVIEW_FAST = EncoderProfile(
+    name="preview_fast",
+    video_codec="libx264",
+    preset="veryfast",
+    crf=26,
+    maxrate_kbps=2500,
+    bufsize_kbps=5000,
+    gop_sec=2.0,
+    audio_bitrate_kbps=96,
+)
+
+ENCODER_PROFILES = {profile.name: profile for profile in (TIKTOK_HIGH, REELS_STANDARD, PREVIEW_FAST)}
+
+
+def get_encoder_profile(name: str) -> EncoderProfile:
+    profile = ENCODER_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Unknown encoder profile: {name}")
+    return profile
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    name: str
+    label: str
+    ratio_w: int
+    ratio_h: int
+    # "pad" keeps the whole frame (letterbox); "crop" fills the frame and trims the overflow.
+    fit: str
+
+    def dimensions(self, width: int, height: int) -> tuple[int, int]:
+        # The short edge is kept, so pixel-sized overlay styles read the same in every format.
+        short = min(width, height)
+        if self.ratio_w >= self.ratio_h:
+            return _even(short * self.ratio_w / self.ratio_h), _even(short)
+        return _even(short), _even(short * self.ratio_h / self.ratio_w)
+
+
+VERTICAL = OutputFormat(name="9x16", label="9:16", ratio_w=9, ratio_h=16, fit="pad")
+SQUARE = OutputFormat(name="1x1", label="1:1", ratio_w=1, ratio_h=1, fit="crop")
+LANDSCAPE = OutputFormat(name="16x9", label="16:9", ratio_w=16, ratio_h=9, fit="pad")
+
+OUTPUT_FORMATS = {fmt.name: fmt for fmt in (VERTICAL, SQUARE, LANDSCAPE)}
+
+
+def get_output_format(name: str) -> OutputFormat:
+    fmt = OUTPUT_FORMATS.get(name)
+    if fmt is None:
+        raise ValueError(f"Unknown output format: {name}")
+    return fmt
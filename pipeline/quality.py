@@ -2,6 +2,39 @@ from __future__ import annotations
 
 from typing import Any
 
+import numpy as np
+
+from pipeline.frames import FrameStore
+
+TEXT_KINDS = {"headline", "callout", "cta"}
+# Advance widths in ems, roughly those of the DejaVu Sans face drawtext falls back to.
+CHAR_WIDTHS = {**dict.fromkeys("ijlI.,:;'!|", 0.3), **dict.fromkeys("ftr ", 0.38), **dict.fromkeys("mwMW", 0.92)}
+CHAR_WIDTH = 0.6
+CAPITAL_WIDTH = 0.68
+LINE_HEIGHT = 1.2
+LEGIBILITY_SAMPLES = 5
+CONTRAST_WARN = 3.0
+CONTRAST_CRITICAL = 1.5
+CLUTTER_WARN = 0.08
+SAFE_ZONE_OVERLAP = 0.3
+LUMA = np.array([0.2126, 0.7152, 0.0722])
+NAMED_COLORS = {
+    "white": (255, 255, 255),
+    "black": (0, 0, 0),
+    "gray": (128, 128, 128),
+    "grey": (128, 128, 128),
+    "red": (255, 0, 0),
+    "green": (0, 128, 0),
+    "blue": (0, 0, 255),
+    "yellow": (255, 255, 0),
+}
+# Parts of a vertical frame that TikTok, Reels and Shorts cover with their own UI, as (x0, y0, x1, y1) fractions.
+SAFE_ZONE_MASKS = {
+    "status bar": (0.0, 0.0, 1.0, 0.06),
+    "caption": (0.0, 0.88, 0.8, 1.0),
+    "action buttons": (0.86, 0.45, 1.0, 0.88),
+}
+
 
 def _as_float(value: Any, default: float = 0.0) -> float:
     try:
@@ -10,9 +43,125 @@ def _as_float(value: Any, default: float = 0.0) -> float:
         return default
 
 
-def validate_plan_quality(overlays: list[dict[str, Any]], duration_sec: float) -> dict[str, list[str]]:
+def _color(spec: Any) -> tuple[float, float] | None:
+    # Relative luminance and alpha of an ffmpeg colour such as "white", "#00A86B" or "black@0.55".
+    name, _, alpha = str(spec).strip().lower().partition("@")
+    if name.startswith(("#", "0x")):
+        digits = name.removeprefix("#").removeprefix("0x")
+        if len(digits) != 6:
+            return None
+        try:
+            rgb = tuple(int(digits[i : i + 2], 16) for i in (0, 2, 4))
+        except ValueError:
+            return None
+    elif name in NAMED_COLORS:
+        rgb = NAMED_COLORS[name]
+    else:
+        return None
+    luminance = float(((np.array(rgb) / 255.0) ** 2.2) @ LUMA)
+    return luminance, min(max(_as_float(alpha, 1.0) if alpha else 1.0, 0.0), 1.0)
+
+
+def _text_width(text: str) -> float:
+    return sum(
+        CHAR_WIDTHS.get(char, CAPITAL_WIDTH if char.isupper() or char.isdigit() else CHAR_WIDTH) for char in text
+    )
+
+
+def text_box(overlay: dict[str, Any], canvas: tuple[int, int]) -> tuple[float, float, float, float]:
+    """Estimated (x0, y0, x1, y1) of an overlay's text in canvas pixels, placed the way the renderer places it."""
+    width, height = canvas
+    pos = overlay.get("position", {}) if isinstance(overlay.get("position"), dict) else {}
+    style = overlay.get("style", {}) if isinstance(overlay.get("style"), dict) else {}
+    font_size = _as_float(style.get("font_size"), 64)
+    text_w = _text_width(str(overlay.get("text", ""))) * font_size
+    text_h = font_size * LINE_HEIGHT
+    x = _as_float(pos.get("x"), 0.5)
+    anchor = pos.get("anchor", "center")
+    left = width * x if anchor == "left" else width * x - text_w if anchor == "right" else (width - text_w) * x
+    top = height * _as_float(pos.get("y"), 0.5) - text_h / 2
+    return left, top, left + text_w, top + text_h
+
+
+def _background_layers(overlay: dict[str, Any], primary_color: str) -> list[tuple[float, float]]:
+    # What the renderer paints between the video and the text: the CTA plate, then each text's own box.
+    style = overlay.get("style", {}) if isinstance(overlay.get("style"), dict) else {}
+    layers = []
+    if overlay.get("type") == "cta":
+        plate = _color(style.get("bg", primary_color))
+        if plate is not None:
+            layers.append((plate[0], 0.92))
+    box = _color(style.get("box", "black@0.4"))
+    if box is not None:
+        layers.append(box)
+    return layers
+
+
+def _contrast(a: np.ndarray, b: float) -> np.ndarray:
+    return (np.maximum(a, b) + 0.05) / (np.minimum(a, b) + 0.05)
+
+
+def sampled_legibility(
+    frames: FrameStore,
+    box: tuple[float, float, float, float],
+    canvas: tuple[int, int],
+    window: tuple[float, float],
+    text_luminance: float,
+    layers: list[tuple[float, float]],
+) -> tuple[float, float]:
+    """Worst contrast ratio of the text against its background, and how busy that background is.
+
+    A few frames from the overlay's window are cropped to its box on the analysis frames. The brightest and
+    darkest tenth of the background bound how close it gets to the text colour, after compositing the
+    overlay's own boxes over it. Clutter is the mean gradient left visible through those boxes.
+    """
+    samples = frames.sample(window[0], window[1], LEGIBILITY_SAMPLES)
+    if samples.ndim == 4:
+        samples = samples @ LUMA
+    rows, cols = samples.shape[1:3]
+    x0 = min(max(int(box[0] / canvas[0] * cols), 0), cols - 1)
+    y0 = min(max(int(box[1] / canvas[1] * rows), 0), rows - 1)
+    x1 = max(min(int(np.ceil(box[2] / canvas[0] * cols)), cols), x0 + 1)
+    y1 = max(min(int(np.ceil(box[3] / canvas[1] * rows)), rows), y0 + 1)
+    region = samples[:, y0:y1, x0:x1].astype(np.float32) / 255.0
+    background = np.percentile((region**2.2).reshape(len(region), -1), [10, 90], axis=1)
+    visible = 1.0
+    for luminance, alpha in layers:
+        background = alpha * luminance + (1.0 - alpha) * background
+        visible *= 1.0 - alpha
+    contrast = float(_contrast(background, text_luminance).min())
+    gradient = np.abs(np.diff(region, axis=1)).mean() if y1 - y0 > 1 else 0.0
+    gradient += np.abs(np.diff(region, axis=2)).mean() if x1 - x0 > 1 else 0.0
+    return contrast, float(gradient) * visible
+
+
+def _zone_overlaps(box: tuple[float, float, float, float], canvas: tuple[int, int]) -> list[str]:
+    width, height = canvas
+    area = max((box[2] - box[0]) * (box[3] - box[1]), 1e-9)
+    hits = []
+    for name, (zx0, zy0, zx1, zy1) in SAFE_ZONE_MASKS.items():
+        overlap_w = min(box[2], zx1 * width) - max(box[0], zx0 * width)
+        overlap_h = min(box[3], zy1 * height) - max(box[1], zy0 * height)
+        if overlap_w > 0 and overlap_h > 0 and overlap_w * overlap_h / area >= SAFE_ZONE_OVERLAP:
+            hits.append(name)
+    return hits
+
+
+def validate_plan_quality(
+    overlays: list[dict[str, Any]],
+    duration_sec: float,
+    frames: FrameStore | None = None,
+    canvas: tuple[int, int] = (1080, 1920),
+    primary_color: str = "#00A86B",
+) -> dict[str, Any]:
+    """Critical problems and warnings for an overlay plan, before anything is rendered.
+
+    With the source's analysis frames, text overlays are also checked against the footage under them,
+    and each one's measured contrast and clutter is listed under "legibility".
+    """
     critical: list[str] = []
     warnings: list[str] = []
+    legibility: list[dict[str, Any]] = []
 
     has_cta = False
     has_hook_text = False
@@ -39,12 +188,36 @@ def validate_plan_quality(overlays: list[dict[str, Any]], duration_sec: float) -
 
         style = overlay.get("style", {}) if isinstance(overlay.get("style"), dict) else {}
         font_size = _as_float(style.get("font_size"), 0)
-        if kind in {"headline", "callout", "cta"} and font_size and font_size < 36:
+        if kind in TEXT_KINDS and font_size and font_size < 36:
             warnings.append(f"overlay[{idx}] font_size is low ({int(font_size)})")
+        if kind not in TEXT_KINDS or not str(overlay.get("text", "")).strip():
+            continue
+
+        box = text_box(overlay, canvas)
+        if box[0] < 0 or box[1] < 0 or box[2] > canvas[0] or box[3] > canvas[1]:
+            warnings.append(f"overlay[{idx}] text runs off the frame")
+        if canvas[1] > canvas[0]:
+            warnings.extend(f"overlay[{idx}] is under the platform {zone} area" for zone in _zone_overlaps(box, canvas))
+        text_color = _color(style.get("color", "white"))
+        if frames is None or not len(frames) or text_color is None or end <= start:
+            continue
+        contrast, clutter = sampled_legibility(
+            frames, box, canvas, (start, end), text_color[0], _background_layers(overlay, primary_color)
+        )
+        legibility.append({"overlay": idx, "contrast": round(contrast, 2), "clutter": round(clutter, 3)})
+        if contrast < CONTRAST_CRITICAL:
+            critical.append(f"overlay[{idx}] text is unreadable over the video (contrast {contrast:.1f}:1)")
+        elif contrast < CONTRAST_WARN:
+            warnings.append(f"overlay[{idx}] text has low contrast over the video ({contrast:.1f}:1)")
+        if clutter > CLUTTER_WARN:
+            warnings.append(f"overlay[{idx}] text sits on a busy background")
 
     if not has_cta:
         critical.append("missing cta overlay")
     if not has_hook_text:
         critical.append("missing headline/callout overlay")
 
-    return {"critical": critical, "warnings": warnings}
+    report: dict[str, Any] = {"critical": critical, "warnings": warnings}
+    if frames is not None:
+        report["legibility"] = legibility
+    return report
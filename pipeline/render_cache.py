@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+
+from pipeline.materialize import Materialized, materialize
+
+logger = logging.getLogger(__name__)
+
+_RENDER_FIELDS = ("type", "start_sec", "end_sec", "text", "position", "style", "asset_ref")
+_DIGEST_MEMO_LIMIT = 1024
+
+_digest_memo: dict[tuple[str, int, int], str] = {}
+_caches: dict[tuple[str, int, str], RenderCache] = {}
+
+
+def file_digest(path: Path) -> str:
+    stat = path.stat()
+    memo_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    cached = _digest_memo.get(memo_key)
+    if cached:
+        return cached
+    with path.open("rb") as fh:
+        digest = hashlib.file_digest(fh, "sha256").hexdigest()
+    if len(_digest_memo) >= _DIGEST_MEMO_LIMIT:
+        _digest_memo.clear()
+    _digest_memo[memo_key] = digest
+    return digest
+
+
+def _canonical_overlay(overlay: dict[str, Any]) -> dict[str, Any]:
+    row = {field: overlay[field] for field in _RENDER_FIELDS if field in overlay}
+    for field in ("start_sec", "end_sec"):
+        if field in row:
+            row[field] = round(float(row[field]), 3)
+    position = row.get("position")
+    if isinstance(position, dict):
+        row["position"] = {
+            k: (round(float(v), 4) if isinstance(v, (int, float)) else v) for k, v in position.items()
+        }
+    return row
+
+
+def render_cache_key(
+    source_digest: str,
+    overlays: list[dict[str, Any]],
+    logo_digests: dict[str, str],
+    encoder: dict[str, Any],
+) -> str:
+    payload = {
+        "source": source_digest,
+        "overlays": [_canonical_overlay(overlay) for overlay in overlays],
+        "logos": logo_digests,
+        "encoder": encoder,
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, root: Path, max_bytes: int, suffix: str = ".mp4"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _entry(self, key: str) -> Path:
+        return self.root / f"{key}{self.suffix}"
+
+    def fetch(self, key: str, dst: Path, checksum: bool = False) -> Materialized | None:
+        entry = self._entry(key)
+        try:
+            if not self.enabled or not entry.exists():
+                raise FileNotFoundError(entry)
+            os.utime(entry)
+            result = materialize(entry, dst, checksum=checksum)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        logger.info("render cache hit %s (hits=%s misses=%s)", key[:12], self.hits, self.misses)
+        return result
+
+    def store(self, key: str, src: Path, checksum: bool = False) -> Materialized | None:
+        if not self.enabled:
+            return None
+        self.root.mkdir(parents=True, exist_ok=True)
+        result = materialize(src, self._entry(key), checksum=checksum)
+        self.evict()
+        return result
+
+    def evict(self) -> None:
+        entries = []
+        for path in self.root.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort(key=lambda row: row[0])
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def stats(self) -> dict[str, int]:
+        entries = [path.stat().st_size for path in self.root.glob(f"*{self.suffix}")] if self.root.exists() else []
+        return {"hits": self.hits, "misses": self.misses, "entries": len(entries), "bytes": sum(entries)}
+
+
+def get_render_cache(name: str = "render_cache", suffix: str = ".mp4") -> RenderCache:
+    root = Path(settings.MEDIA_ROOT) / name
+    max_bytes = int(settings.RENDER_CACHE_MAX_BYTES)
+    key = (str(root), max_bytes, suffix)
+    cache = _caches.get(key)
+    if cache is None:
+        cache = RenderCache(root, max_bytes, suffix=suffix)
+        _caches[key] = cache
+    return cache
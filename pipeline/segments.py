@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import copy
+import math
+from typing import Any
+
+
+def _window(overlay: dict[str, Any]) -> tuple[float, float]:
+    return float(overlay.get("start_sec", 0.0)), float(overlay.get("end_sec", 0.0))
+
+
+def segment_count(duration_sec: float, segment_sec: float) -> int:
+    if duration_sec <= 0 or segment_sec <= 0:
+        return 0
+    return max(1, math.ceil(round(duration_sec / segment_sec, 6)))
+
+
+def segment_bounds(index: int, duration_sec: float, segment_sec: float) -> tuple[float, float]:
+    start = round(index * segment_sec, 6)
+    end = round(min(duration_sec, (index + 1) * segment_sec), 6)
+    return start, end
+
+
+def segments_for_window(start_sec: float, end_sec: float, duration_sec: float, segment_sec: float) -> range:
+    total = segment_count(duration_sec, segment_sec)
+    if total == 0 or end_sec < start_sec:
+        return range(0)
+    # between(t,start,end) is inclusive, so a window ending on a boundary still touches the next segment.
+    first = max(0, math.floor(start_sec / segment_sec))
+    last = min(total - 1, math.floor(end_sec / segment_sec))
+    return range(first, last + 1)
+
+
+def dirty_segments(diff: dict[str, list[dict]], duration_sec: float, segment_sec: float) -> list[int]:
+    windows: list[tuple[float, float]] = []
+    for row in diff.get("added", []):
+        windows.append(_window(row["overlay"]))
+    for row in diff.get("removed", []):
+        windows.append(_window(row["overlay"]))
+    for row in diff.get("updated", []):
+        windows.append(_window(row["before"]))
+        windows.append(_window(row["after"]))
+
+    dirty: set[int] = set()
+    for start, end in windows:
+        dirty.update(segments_for_window(start, end, duration_sec, segment_sec))
+    return sorted(dirty)
+
+
+def clip_overlays(overlays: list[dict[str, Any]], start_sec: float, end_sec: float) -> list[dict[str, Any]]:
+    clipped = []
+    for overlay in overlays:
+        o_start, o_end = _window(overlay)
+        if o_end < start_sec or o_start >= end_sec:
+            continue
+        row = copy.deepcopy(overlay)
+        row["start_sec"] = round(max(o_start, start_sec) - start_sec, 6)
+        row["end_sec"] = round(min(o_end, end_sec) - start_sec, 6)
+        clipped.append(row)
+    return clipped
+
+
+def chunk_ranges(duration_sec: float, chunk_sec: float, keyframe_sec: float = 0.0) -> list[tuple[float, float]]:
+    if keyframe_sec > 0:
+        # Whole keyframe intervals only, so every chunk starts on an IDR frame and concat can stream-copy.
+        chunk_sec = max(1, math.ceil(round(chunk_sec / keyframe_sec, 6))) * keyframe_sec
+    return [segment_bounds(i, duration_sec, chunk_sec) for i in range(segment_count(duration_sec, chunk_sec))]
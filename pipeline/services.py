@@ -1,30 +1,104 @@
 from __future__ import annotations
 
+import contextvars
+import hashlib
 import json
-import subprocess
+import logging
+import math
+import os
+import tempfile
+import time
 import uuid
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict
 from datetime import UTC, datetime
 from pathlib import Path
+from typing import IO
 
 from django.conf import settings
 
 from pipeline.ai import CreativeBriefInput, get_provider
+from pipeline.ass import ass_placeable, compile_ass
+from pipeline.audio import ANALYSIS_PARAMS, SAMPLE_RATE, analyze_samples, open_pcm, silent_analysis
+from pipeline.context import save_video_context, snap_to_beat
+from pipeline.filtergraph import Filter, FilterGraph, Node, optimize
+from pipeline.frames import FrameStore, frame_layout
+from pipeline.media_store import (
+    AUDIO,
+    FRAMES,
+    NORMALIZED,
+    PROBE,
+    SPRITE,
+    SPRITE_INDEX,
+    THUMBNAIL,
+    get_media_store,
+    variant_key,
+)
+from pipeline.media_store import PROXY as STORED_PROXY
+from pipeline.mp4meta import Mp4ParseError, read_mp4_metadata
 from pipeline.planner import build_edit_plan, persist_edit_plan
+from pipeline.profiles import FULL, PROXY, EncoderProfile, OutputFormat, RenderTier, get_render_tier
 from pipeline.quality import validate_plan_quality
+from pipeline.render_cache import file_digest, get_render_cache, render_cache_key
+from pipeline.segments import chunk_ranges, clip_overlays, dirty_segments, segment_bounds, segment_count
+from pipeline.stream_plan import (
+    COPY,
+    ENCODE,
+    ENCODE_ALL,
+    StreamPlan,
+    missing_keyframes,
+    plan_audio,
+    plan_streams,
+    video_mismatches,
+)
+from pipeline.supervisor import report_stage, run_supervised
 from projects.models import Asset, Draft, DraftVersion, Overlay, Project
 
+logger = logging.getLogger(__name__)
+
 
 class PipelineError(Exception):
     pass
 
 
-def _run(cmd: list[str]) -> None:
-    proc = subprocess.run(cmd, capture_output=True, text=True)
+class InputRejected(PipelineError):
+    pass
+
+
+class SourceNotReady(PipelineError):
+    pass
+
+
+RENDER_VIDEO_CODEC = "libx264"
+RENDER_AUDIO_CODEC = "aac"
+POSTER_HEIGHT = 480
+FILMSTRIP_COLUMNS = 10
+FRAME_FORMATS = {"jpeg": (".jpg", ["-q:v", "3"]), "png": (".png", [])}
+
+
+def _run(cmd: list[str], timeout_sec: float | None = None, stdout_file: IO[bytes] | None = None) -> None:
+    timeout_sec = timeout_sec or settings.MEDIA_TIMEOUT_SECONDS
+    proc = run_supervised(
+        cmd, timeout_sec=timeout_sec, cpu_limit_sec=settings.MEDIA_CPU_LIMIT_SECONDS, stdout_file=stdout_file
+    )
+    if proc.timed_out:
+        raise PipelineError(f"{Path(cmd[0]).name} timed out after {timeout_sec}s\n{proc.stderr_tail}".strip())
     if proc.returncode != 0:
-        raise PipelineError(proc.stderr.strip() or "subprocess command failed")
+        raise PipelineError(proc.stderr_tail.strip() or "subprocess command failed")
 
 
 def ffprobe_metadata(path: Path) -> dict:
+    # Most uploads are MP4/MOV, whose header boxes answer everything below without spawning ffprobe.
+    try:
+        return read_mp4_metadata(path)
+    except (Mp4ParseError, OSError) as exc:
+        logger.debug("container header probe of %s fell back to ffprobe: %s", path, exc)
+    return _ffprobe(path)
+
+
+def _ffprobe(path: Path) -> dict:
     cmd = [
         "ffprobe",
         "-v",
@@ -35,13 +109,20 @@ def ffprobe_metadata(path: Path) -> dict:
         "json",
         str(path),
     ]
-    proc = subprocess.run(cmd, capture_output=True, text=True)
+    proc = run_supervised(cmd, timeout_sec=settings.FFPROBE_TIMEOUT_SECONDS, capture_stdout=True)
+    if proc.timed_out:
+        raise PipelineError(f"ffprobe timed out after {settings.FFPROBE_TIMEOUT_SECONDS}s")
     if proc.returncode != 0:
-        raise PipelineError(proc.stderr.strip() or "ffprobe failed")
+        raise PipelineError(proc.stderr_tail.strip() or "ffprobe failed")
     data = json.loads(proc.stdout)
     video_stream = next((s for s in data.get("streams", []) if s.get("codec_type") == "video"), None)
     if not video_stream:
         raise PipelineError("No video stream found")
+    audio_stream = next((s for s in data.get("streams", []) if s.get("codec_type") == "audio"), None)
+    audio_bit_rate = str((audio_stream or {}).get("bit_rate", ""))
+    rotation = next((d.get("rotation") for d in video_stream.get("side_data_list", []) if "rotation" in d), None)
+    if rotation is None:
+        rotation = video_stream.get("tags", {}).get("rotate", 0)
     duration = float(data.get("format", {}).get("duration", 0.0))
     return {
         "duration_sec": duration,
@@ -50,33 +131,424 @@ def ffprobe_metadata(path: Path) -> dict:
         "fps": video_stream.get("r_frame_rate", "0/1"),
         "codec_name": video_stream.get("codec_name"),
         "format_name": data.get("format", {}).get("format_name"),
+        "pix_fmt": video_stream.get("pix_fmt"),
+        "sample_aspect_ratio": video_stream.get("sample_aspect_ratio"),
+        "rotation": int(float(rotation or 0)),
+        "audio_codec": audio_stream.get("codec_name") if audio_stream else None,
+        "audio_bit_rate": int(audio_bit_rate) if audio_bit_rate.isdigit() else 0,
     }
 
 
-def normalize_video(src: Path, dst: Path) -> None:
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    vf = (
-        f"scale={settings.TARGET_WIDTH}:{settings.TARGET_HEIGHT}:force_original_aspect_ratio=decrease,"
-        f"pad={settings.TARGET_WIDTH}:{settings.TARGET_HEIGHT}:(ow-iw)/2:(oh-ih)/2,format=yuv420p"
-    )
+def probe_keyframes(path: Path) -> list[float]:
     cmd = [
-        "ffmpeg",
-        "-y",
-        "-i",
-        str(src),
-        "-vf",
-        vf,
-        "-r",
-        str(settings.TARGET_FPS),
-        "-c:v",
-        "libx264",
-        "-preset",
-        "veryfast",
-        "-c:a",
-        "aac",
-        str(dst),
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time,flags",
+        "-of",
+        "csv=p=0",
+        str(path),
     ]
+    # Packet flags come from the demuxer alone, so this stays cheap even for long sources.
+    proc = run_supervised(cmd, timeout_sec=settings.FFPROBE_TIMEOUT_SECONDS, capture_stdout=True)
+    if proc.timed_out or proc.returncode != 0:
+        raise PipelineError(proc.stderr_tail.strip() or "ffprobe keyframe scan failed")
+    keyframes = []
+    for line in proc.stdout.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            keyframes.append(float(pts))
+    return keyframes
+
+
+def _fit_filter(width: int, height: int, fit: str = "pad") -> str:
+    if fit == "crop":
+        return f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},setsar=1"
+    return (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+    )
+
+
+def _normalize_filter() -> str:
+    return f"{_fit_filter(settings.TARGET_WIDTH, settings.TARGET_HEIGHT)},format=yuv420p"
+
+
+def plan_normalize(src: Path, metadata: dict | None) -> StreamPlan:
+    if not metadata:
+        return ENCODE_ALL
+    audio, audio_reason = plan_audio(metadata)
+    mismatches = video_mismatches(metadata, settings.TARGET_WIDTH, settings.TARGET_HEIGHT, settings.TARGET_FPS)
+    if not mismatches:
+        missing = missing_keyframes(
+            probe_keyframes(src),
+            float(metadata.get("duration_sec") or 0.0),
+            float(settings.RENDER_SEGMENT_SECONDS),
+            settings.TARGET_FPS,
+        )
+        if missing:
+            mismatches.append(f"no keyframe at {len(missing)} segment boundaries")
+    if mismatches:
+        return StreamPlan(video=ENCODE, audio=audio, reasons=(f"video: {', '.join(mismatches)}", audio_reason))
+    return StreamPlan(video=COPY, audio=audio, reasons=("video conforms to target", audio_reason))
+
+
+def normalize_video(src: Path, dst: Path, metadata: dict | None = None, plan: StreamPlan | None = None) -> dict:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    plan = plan or plan_normalize(src, metadata)
+    cmd = ["ffmpeg", "-y", "-i", str(src), "-map", "0:v:0", "-map", "0:a:0?"]
+    if plan.video == COPY:
+        cmd.extend(["-c:v", "copy"])
+    else:
+        cmd.extend(["-vf", _normalize_filter(), "-r", str(settings.TARGET_FPS)])
+        cmd.extend(["-c:v", "libx264", "-preset", "veryfast", *_keyframe_args()])
+    cmd.extend(["-c:a", "copy"] if plan.audio == COPY else ["-c:a", "aac"])
+    cmd.append(str(dst))
     _run(cmd)
+    logger.info("normalized %s via %s (%s)", src.name, plan.mode, "; ".join(plan.reasons))
+    return plan.as_dict()
+
+
+def asset_digest(asset: Asset) -> str:
+    if not asset.sha256:
+        asset.sha256 = file_digest(Path(asset.file.path))
+        asset.save(update_fields=["sha256", "updated_at"])
+    return asset.sha256
+
+
+def normalize_variant() -> str:
+    return variant_key(
+        {
+            "width": settings.TARGET_WIDTH,
+            "height": settings.TARGET_HEIGHT,
+            "fps": settings.TARGET_FPS,
+            "segment_sec": float(settings.RENDER_SEGMENT_SECONDS),
+        }
+    )
+
+
+def normalized_source(asset: Asset, metadata: dict | None = None) -> tuple[Path, dict]:
+    # Keyed by upload content, so every project sharing a source shares one intermediate, and a project that
+    # uploads a new source can never pick up the previous one's.
+    store = get_media_store()
+    digest, variant = asset_digest(asset), normalize_variant()
+    stored = store.fetch(digest, NORMALIZED, variant)
+    if stored is not None:
+        return stored, {"mode": "stored", "digest": digest}
+    with store.write(digest, NORMALIZED, variant) as staging:
+        info = normalize_video(Path(asset.file.path), staging, metadata or asset.metadata)
+    return store.path(digest, NORMALIZED, variant), {**info, "digest": digest}
+
+
+def _file_stamp(path: Path) -> dict[str, int]:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def cached_probe(path: Path, digest: str, variant: str = "") -> dict:
+    # The digest names the content; size and mtime catch a file rewritten (or a stored entry rebuilt) since.
+    store = get_media_store()
+    stamp = _file_stamp(path)
+    cached = store.fetch_json(digest, PROBE, variant)
+    if cached and cached.get("stamp") == stamp:
+        return cached["metadata"]
+    metadata = ffprobe_metadata(path)
+    store.store_json(digest, PROBE, {"stamp": stamp, "metadata": metadata}, variant)
+    return metadata
+
+
+def probe_asset(asset: Asset) -> dict:
+    path = Path(asset.file.path)
+    stamp = _file_stamp(path)
+    if asset.metadata.get("file_stamp") == stamp:
+        return asset.metadata
+    asset.metadata = {**cached_probe(path, asset_digest(asset)), "file_stamp": stamp}
+    asset.save(update_fields=["metadata", "updated_at"])
+    return asset.metadata
+
+
+def normalized_metadata(asset: Asset, normalized: Path) -> dict:
+    variant = variant_key({"kind": NORMALIZED, "variant": normalize_variant()})
+    return cached_probe(normalized, asset_digest(asset), variant)
+
+
+def check_source_duration(metadata: dict) -> None:
+    if metadata["duration_sec"] > settings.VIDEO_MAX_DURATION_SECONDS:
+        raise InputRejected(f"Input too long: {metadata['duration_sec']:.2f}s")
+
+
+def probe_upload(asset: Asset) -> dict:
+    # Runs on the request thread: a header probe only, stamped so ingest reuses it; hashing waits for ingest.
+    path = Path(asset.file.path)
+    asset.metadata = {**ffprobe_metadata(path), "file_stamp": _file_stamp(path)}
+    asset.save(update_fields=["metadata", "updated_at"])
+    return asset.metadata
+
+
+def proxy_variant() -> str:
+    width, height = PROXY.dimensions(settings.TARGET_WIDTH, settings.TARGET_HEIGHT)
+    return variant_key(
+        {
+            "width": width,
+            "height": height,
+            "fps": settings.TARGET_FPS,
+            "segment_sec": float(settings.RENDER_SEGMENT_SECONDS),
+            "preset": PROXY.preset,
+            "crf": PROXY.crf,
+        }
+    )
+
+
+def proxy_source(asset: Asset, normalized: Path) -> Path:
+    store = get_media_store()
+    digest, variant = asset_digest(asset), proxy_variant()
+    stored = store.fetch(digest, STORED_PROXY, variant)
+    if stored is not None:
+        return stored
+    width, height = PROXY.dimensions(settings.TARGET_WIDTH, settings.TARGET_HEIGHT)
+    with store.write(digest, STORED_PROXY, variant) as staging:
+        cmd = ["ffmpeg", "-y", "-i", str(normalized), "-map", "0:v:0", "-map", "0:a:0?"]
+        cmd.extend(["-vf", f"scale={width}:{height}"])
+        cmd.extend(["-c:v", RENDER_VIDEO_CODEC, "-preset", PROXY.preset, "-crf", str(PROXY.crf), *_keyframe_args()])
+        cmd.extend(["-c:a", "copy", str(staging)])
+        _run(cmd)
+    return store.path(digest, STORED_PROXY, variant)
+
+
+def stored_proxy(asset: Asset) -> tuple[Path, dict] | None:
+    digest = asset_digest(asset)
+    path = get_media_store().fetch(digest, STORED_PROXY, proxy_variant())
+    if path is None:
+        return None
+    return path, cached_probe(path, digest, variant_key({"kind": STORED_PROXY, "variant": proxy_variant()}))
+
+
+def filmstrip_layout(duration_sec: float, width: int, height: int) -> dict:
+    interval = float(settings.FILMSTRIP_INTERVAL_SECONDS)
+    count = max(1, math.ceil(round(duration_sec / interval, 3)))
+    columns = min(count, FILMSTRIP_COLUMNS)
+    tile_width = int(settings.FILMSTRIP_TILE_WIDTH)
+    return {
+        "interval_sec": interval,
+        "count": count,
+        "columns": columns,
+        "rows": math.ceil(count / columns),
+        "tile_width": tile_width,
+        "tile_height": max(2, round(tile_width * height / max(width, 1) / 2) * 2),
+    }
+
+
+def filmstrip(digest: str, video: Path, metadata: dict) -> dict:
+    # Poster and tiled sprite come out of one decode; the JSON index tells the timeline where each tile sits.
+    store = get_media_store()
+    duration_sec = float(metadata["duration_sec"])
+    layout = filmstrip_layout(duration_sec, int(metadata["width"]), int(metadata["height"]))
+    at_sec = round(min(1.0, duration_sec / 2), 3)
+    poster_variant = variant_key({"at_sec": at_sec, "height": POSTER_HEIGHT})
+    sprite_variant = variant_key(layout)
+    index = store.fetch_json(digest, SPRITE_INDEX)
+    if (
+        index is not None
+        and {key: index.get(key) for key in layout} == layout
+        and store.fetch(digest, THUMBNAIL, poster_variant) is not None
+        and store.fetch(digest, SPRITE, sprite_variant) is not None
+    ):
+        return index
+
+    graph = (
+        f"[0:v]split=2[p][s];[p]trim=start={at_sec},setpts=PTS-STARTPTS,scale=-2:{POSTER_HEIGHT}[poster];"
+        f"[s]fps=1/{layout['interval_sec']}:eof_action=pass,scale={layout['tile_width']}:{layout['tile_height']},"
+        f"setsar=1,tile={layout['columns']}x{layout['rows']}[sprite]"
+    )
+    with (
+        store.write(digest, THUMBNAIL, poster_variant) as poster,
+        store.write(digest, SPRITE, sprite_variant) as sprite,
+    ):
+        cmd = ["ffmpeg", "-y", "-i", str(video), "-filter_complex", graph]
+        cmd.extend(["-map", "[poster]", "-frames:v", "1", "-q:v", "3", "-update", "1", str(poster)])
+        cmd.extend(["-map", "[sprite]", "-frames:v", "1", "-q:v", "4", "-update", "1", str(sprite)])
+        _run(cmd)
+
+    media_root = Path(settings.MEDIA_ROOT)
+    columns, interval = layout["columns"], layout["interval_sec"]
+    index = {
+        **layout,
+        "poster": str(store.path(digest, THUMBNAIL, poster_variant).relative_to(media_root)),
+        "poster_at_sec": at_sec,
+        "sprite": str(store.path(digest, SPRITE, sprite_variant).relative_to(media_root)),
+        "tiles": [
+            {
+                "t": round(i * interval, 3),
+                "x": (i % columns) * layout["tile_width"],
+                "y": (i // columns) * layout["tile_height"],
+            }
+            for i in range(layout["count"])
+        ],
+    }
+    store.store_json(digest, SPRITE_INDEX, index)
+    return index
+
+
+def stored_filmstrip(digest: str) -> dict | None:
+    return get_media_store().fetch_json(digest, SPRITE_INDEX) if digest else None
+
+
+def version_filmstrip(version: DraftVersion) -> dict:
+    # Best effort: a missing filmstrip only costs the timeline its thumbnails, never the render.
+    if not version.draft_video_name:
+        return {}
+    path = Path(settings.MEDIA_ROOT) / version.draft_video_name
+    try:
+        digest = file_digest(path)
+        return {**filmstrip(digest, path, ffprobe_metadata(path)), "digest": digest}
+    except (PipelineError, OSError, KeyError) as exc:
+        logger.warning("filmstrip for draft version %s failed: %s", version.id, exc)
+        return {}
+
+
+def current_version_filmstrip(version: DraftVersion) -> dict:
+    # A draft filmstrip is stored under the draft video's digest, which no asset or draft references, so the
+    # store evicts it early. Once its files are gone the saved index is stale and is rebuilt in the background.
+    saved = version.filmstrip_json or {}
+    if not saved:
+        return {}
+    index = stored_filmstrip(saved.get("digest", ""))
+    media_root = Path(settings.MEDIA_ROOT)
+    if index is not None and all((media_root / index[key]).exists() for key in ("poster", "sprite")):
+        return {**index, "digest": saved["digest"]}
+    from pipeline.tasks import queue_version_filmstrip
+
+    queue_version_filmstrip(version)
+    return {}
+
+
+def stored_normalized(asset: Asset) -> Path | None:
+    # Only an intermediate ingest already published; an unhashed asset cannot have one yet.
+    if not asset.sha256:
+        return None
+    return get_media_store().fetch(asset.sha256, NORMALIZED, normalize_variant())
+
+
+def _analysis_layout(metadata: dict, pix_fmt: str) -> dict:
+    width, height = int(metadata["width"]), int(metadata["height"])
+    return frame_layout(width, height, int(settings.ANALYSIS_FRAME_WIDTH), float(settings.ANALYSIS_FPS), pix_fmt)
+
+
+def stored_frames(asset: Asset, pix_fmt: str = "gray") -> FrameStore | None:
+    # Only what ingest already decoded: callers on the render path must not pay for a decode.
+    store = get_media_store()
+    proxy = stored_proxy(asset)
+    if proxy is not None:
+        metadata = proxy[1]
+    else:
+        normalized = stored_normalized(asset)
+        if normalized is None:
+            return None
+        metadata = normalized_metadata(asset, normalized)
+    layout = _analysis_layout(metadata, pix_fmt)
+    path = store.fetch(asset_digest(asset), FRAMES, variant_key(layout))
+    return FrameStore.open(path, layout) if path is not None else None
+
+
+def source_frames(asset: Asset, pix_fmt: str = "gray") -> FrameStore:
+    # Decoded once per upload into a raw frame file that scene, motion and legibility analysis all map.
+    proxy = stored_proxy(asset)
+    if proxy is not None:
+        video, metadata = proxy
+    else:
+        video, _ = normalized_source(asset)
+        metadata = normalized_metadata(asset, video)
+    layout = _analysis_layout(metadata, pix_fmt)
+    store = get_media_store()
+    digest, variant = asset_digest(asset), variant_key(layout)
+    path = store.fetch(digest, FRAMES, variant)
+    if path is None:
+        with store.write(digest, FRAMES, variant) as staging, staging.open("wb") as sink:
+            scale = f"fps={layout['fps']},scale={layout['width']}:{layout['height']}:flags=area"
+            cmd = ["ffmpeg", "-y", "-i", str(video), "-an", "-vf", scale]
+            _run([*cmd, "-f", "rawvideo", "-pix_fmt", pix_fmt, "pipe:1"], stdout_file=sink)
+        path = store.path(digest, FRAMES, variant)
+    return FrameStore.open(path, layout)
+
+
+def plan_quality(project: Project, source_asset: Asset | None, plan_json: dict, duration_sec: float) -> dict:
+    # An asset ingest never hashed has no analysis frames; the gate then checks the plan alone.
+    frames = stored_frames(source_asset) if source_asset is not None and source_asset.sha256 else None
+    return validate_plan_quality(
+        plan_json.get("overlays", []),
+        duration_sec,
+        frames,
+        (settings.TARGET_WIDTH, settings.TARGET_HEIGHT),
+        project.primary_color,
+    )
+
+
+def source_audio(asset: Asset) -> dict:
+    # Mono PCM is piped from ffmpeg into a scratch file and analyzed in blocks through a memmap; only the
+    # summary is kept, stored by content hash.
+    store = get_media_store()
+    digest, variant = asset_digest(asset), variant_key(ANALYSIS_PARAMS)
+    cached = store.fetch_json(digest, AUDIO, variant)
+    if cached is not None:
+        return cached
+    video, _ = normalized_source(asset)
+    if normalized_metadata(asset, video).get("audio_codec"):
+        with tempfile.TemporaryDirectory() as tmp:
+            pcm = Path(tmp) / "audio.f32"
+            with pcm.open("wb") as sink:
+                cmd = ["ffmpeg", "-y", "-i", str(video), "-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE)]
+                _run([*cmd, "-f", "f32le", "pipe:1"], stdout_file=sink)
+            analysis = analyze_samples(open_pcm(pcm))
+    else:
+        analysis = silent_analysis()
+    store.store_json(digest, AUDIO, analysis, variant)
+    return analysis
+
+
+def ingest_source(asset: Asset) -> dict:
+    stages: dict[str, float] = {}
+
+    @contextmanager
+    def stage(name: str) -> Iterator[None]:
+        report_stage(name)
+        started = time.monotonic()
+        yield
+        stages[name] = round(time.monotonic() - started, 3)
+
+    with stage("probe"):
+        metadata = probe_asset(asset)
+        check_source_duration(metadata)
+    with stage("hash"):
+        digest = asset_digest(asset)
+    with stage("normalize"):
+        normalized, normalize_info = normalized_source(asset, metadata)
+    with stage("proxy"):
+        proxy = proxy_source(asset, normalized)
+    with stage("thumbnails"):
+        strip = filmstrip(digest, normalized, normalized_metadata(asset, normalized))
+    with stage("frames"):
+        frames = source_frames(asset)
+    with stage("audio"):
+        audio = source_audio(asset)
+    with stage("context"):
+        # A newer upload may have replaced this one while it was ingesting; its context wins.
+        if source_video_asset(asset.project).id == asset.id:
+            save_video_context(asset.project, asset, metadata, frames, audio)
+    media_root = Path(settings.MEDIA_ROOT)
+    return {
+        "asset_id": str(asset.id),
+        "digest": digest,
+        "normalize": normalize_info,
+        "proxy": str(proxy.relative_to(media_root)),
+        "poster": strip["poster"],
+        "sprite": strip["sprite"],
+        "frames": len(frames),
+        "beats": len(audio["beats"]),
+        "stages": stages,
+    }
 
 
 def generate_copy(prompt: str, template_id: str) -> dict:
@@ -90,12 +562,22 @@ def _logo_asset(project: Project) -> Asset | None:
     return project.assets.filter(asset_type=Asset.AssetType.LOGO).order_by("-created_at").first()
 
 
+def _overlay_id(project: Project, slot: str) -> str:
+    return f"ovl_{hashlib.sha1(f'{project.id}:{slot}'.encode()).hexdigest()[:8]}"
+
+
+def _section_start(project: Project, at_sec: float) -> float:
+    # Section changes land on the nearest beat when the source's audio has a steady one.
+    video_context = getattr(project, "video_context", None)
+    return round(snap_to_beat(at_sec, video_context.context_json if video_context else {}), 2)
+
+
 def _template_hook_benefit_cta(project: Project, duration_sec: float, copy: dict) -> list[dict]:
-    section_a = round(duration_sec * 0.22, 2)
-    section_b = round(duration_sec * 0.74, 2)
+    section_a = _section_start(project, duration_sec * 0.22)
+    section_b = _section_start(project, duration_sec * 0.74)
     overlays = [
         {
-            "id": f"ovl_{uuid.uuid4().hex[:8]}",
+            "id": _overlay_id(project, "headline"),
             "type": "headline",
             "start_sec": 0.0,
             "end_sec": max(2.0, section_a),
@@ -104,7 +586,7 @@ def _template_hook_benefit_cta(project: Project, duration_sec: float, copy: dict
             "style": {"font_size": 96, "color": "white", "box": "black@0.55", "box_border": 22},
         },
         {
-            "id": f"ovl_{uuid.uuid4().hex[:8]}",
+            "id": _overlay_id(project, "callout"),
             "type": "callout",
             "start_sec": section_a,
             "end_sec": max(section_a + 1.5, section_b),
@@ -113,12 +595,12 @@ def _template_hook_benefit_cta(project: Project, duration_sec: float, copy: dict
             "style": {"font_size": 64, "color": "white", "box": "black@0.45", "box_border": 18},
         },
         {
-            "id": f"ovl_{uuid.uuid4().hex[:8]}",
+            "id": _overlay_id(project, "cta"),
             "type": "cta",
             "start_sec": section_b,
             "end_sec": duration_sec,
             "text": copy["cta"],
-            "position": {"x": 0.5, "y": 0.9, "anchor": "center"},
+            "position": {"x": 0.5, "y": 0.82, "anchor": "center"},
             "style": {"font_size": 82, "color": "white", "bg": project.primary_color},
         },
     ]
@@ -126,11 +608,11 @@ def _template_hook_benefit_cta(project: Project, duration_sec: float, copy: dict
 
 
 def _template_problem_solution_cta(project: Project, duration_sec: float, copy: dict) -> list[dict]:
-    section_a = round(duration_sec * 0.30, 2)
-    section_b = round(duration_sec * 0.76, 2)
+    section_a = _section_start(project, duration_sec * 0.30)
+    section_b = _section_start(project, duration_sec * 0.76)
     overlays = [
         {
-            "id": f"ovl_{uuid.uuid4().hex[:8]}",
+            "id": _overlay_id(project, "headline"),
             "type": "headline",
             "start_sec": 0.0,
             "end_sec": max(2.2, section_a),
@@ -139,7 +621,7 @@ def _template_problem_solution_cta(project: Project, duration_sec: float, copy:
             "style": {"font_size": 88, "color": "white", "box": "black@0.6", "box_border": 24},
         },
         {
-            "id": f"ovl_{uuid.uuid4().hex[:8]}",
+            "id": _overlay_id(project, "callout"),
             "type": "callout",
             "start_sec": section_a,
             "end_sec": max(section_a + 1.2, section_b),
@@ -148,12 +630,12 @@ def _template_problem_solution_cta(project: Project, duration_sec: float, copy:
             "style": {"font_size": 62, "color": "white", "box": "black@0.45", "box_border": 16},
         },
         {
-            "id": f"ovl_{uuid.uuid4().hex[:8]}",
+            "id": _overlay_id(project, "cta"),
             "type": "cta",
             "start_sec": section_b,
             "end_sec": duration_sec,
             "text": copy["cta"],
-            "position": {"x": 0.5, "y": 0.9, "anchor": "center"},
+            "position": {"x": 0.5, "y": 0.82, "anchor": "center"},
             "style": {"font_size": 78, "color": "white", "bg": project.primary_color},
         },
     ]
@@ -193,7 +675,7 @@ def build_timeline(project: Project, duration_sec: float, copy: dict) -> dict:
     if logo:
         overlays.append(
             {
-                "id": f"ovl_{uuid.uuid4().hex[:8]}",
+                "id": _overlay_id(project, "logo"),
                 "type": "logo",
                 "start_sec": 0.0,
                 "end_sec": duration_sec,
@@ -274,118 +756,804 @@ def compute_overlay_diff(previous: list[dict], current: list[dict]) -> dict:
     return {"added": added, "removed": removed, "updated": updated}
 
 
-def persist_draft_version(draft: Draft, timeline: dict, source: str) -> DraftVersion:
+def persist_draft_version(draft: Draft, timeline: dict, source: str, render_json: dict | None = None) -> DraftVersion:
     latest = draft.versions.first()
     previous_overlays = latest.timeline_json.get("overlays", []) if latest else []
     current_overlays = timeline.get("overlays", [])
     next_version = (latest.version + 1) if latest else 1
     diff = compute_overlay_diff(previous_overlays, current_overlays)
-    return DraftVersion.objects.create(
+    version = DraftVersion.objects.create(
         draft=draft,
         version=next_version,
         source=source,
         timeline_json=timeline,
         overlay_diff_json=diff,
         draft_video_name=draft.draft_video.name if draft.draft_video else "",
+        render_tier=draft.render_tier,
+        render_json=render_json or {},
     )
+    if version.draft_video_name:
+        # The filmstrip decodes the whole draft; it is filled in after the edit has been answered.
+        from pipeline.tasks import queue_version_filmstrip
 
+        queue_version_filmstrip(version)
+    return version
 
-def render_with_overlays(src: Path, dst: Path, timeline: dict, project: Project) -> None:
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    overlays = timeline.get("overlays", [])
-
-    cmd = ["ffmpeg", "-y", "-i", str(src)]
-    logo_inputs: dict[str, int] = {}
 
+def _logo_paths(overlays: list[dict], project: Project) -> dict[str, Path]:
+    paths: dict[str, Path] = {}
     for overlay in overlays:
         if overlay.get("type") != "logo":
             continue
         asset_ref = str(overlay.get("asset_ref", "")).strip()
-        if not asset_ref or asset_ref in logo_inputs:
+        if not asset_ref or asset_ref in paths:
             continue
         asset = project.assets.filter(id=asset_ref, asset_type=Asset.AssetType.LOGO).first()
         if asset and asset.file:
-            logo_inputs[asset_ref] = len(cmd)  # placeholder not used directly
-            cmd.extend(["-i", asset.file.path])
+            paths[asset_ref] = Path(asset.file.path)
+    return paths
 
-    filters: list[str] = ["[0:v]format=yuv420p[v0]"]
-    current = "v0"
-    tag_idx = 1
+
+def _keyframe_args() -> list[str]:
+    segment_sec = float(settings.RENDER_SEGMENT_SECONDS)
+    if segment_sec <= 0:
+        return []
+    gop = max(1, round(segment_sec * settings.TARGET_FPS))
+    return [
+        "-g",
+        str(gop),
+        "-keyint_min",
+        str(gop),
+        "-sc_threshold",
+        "0",
+        "-force_key_frames",
+        f"expr:gte(t,n_forced*{segment_sec})",
+    ]
+
+
+def _escape_filter_path(path: Path) -> str:
+    escaped = str(path).replace("\\", "\\\\").replace(":", "\\:")
+    return f"'{escaped}'"
+
+
+def _overlay_graph(
+    overlays: list[dict],
+    logo_refs: list[str],
+    primary_color: str,
+    ass_path: Path | None = None,
+    tier: RenderTier = FULL,
+    source: str = "0:v",
+    label: str = "",
+) -> FilterGraph:
+    graph = FilterGraph(prefix=label)
+    base = [Filter("format", ("yuv420p",))]
+    if tier.scale != 1.0:
+        width, height = tier.dimensions(settings.TARGET_WIDTH, settings.TARGET_HEIGHT)
+        base.insert(0, Filter("scale", (str(width), str(height))))
+    current = f"{label}v{graph.tick()}"
+    graph.add(Node("base", [source], base, [current]))
+
+    if ass_path is not None:
+        out_tag = f"{label}v{graph.tick()}"
+        graph.add(Node("ass", [current], [Filter("ass", (f"filename={_escape_filter_path(ass_path)}",))], [out_tag]))
+        current = out_tag
 
     for overlay in overlays:
         otype = overlay.get("type", "callout")
-        start = float(overlay.get("start_sec", 0))
-        end = float(overlay.get("end_sec", 1))
+        if ass_path is not None and ass_placeable(overlay):
+            continue
+        window = (float(overlay.get("start_sec", 0)), float(overlay.get("end_sec", 1)))
         pos = overlay.get("position", {})
         style = overlay.get("style", {})
 
         if otype == "logo":
             asset_ref = str(overlay.get("asset_ref", "")).strip()
-            if not asset_ref:
-                continue
-            input_order = list(logo_inputs.keys())
-            if asset_ref not in input_order:
+            if not asset_ref or asset_ref not in logo_refs:
                 continue
-            stream_index = input_order.index(asset_ref) + 1
-            logo_tag = f"lg{tag_idx}"
-            out_tag = f"v{tag_idx}"
-            tag_idx += 1
-            scale_width = int(style.get("scale_width", 220))
-            filters.append(f"[{stream_index}:v]scale={scale_width}:-1[{logo_tag}]")
-            filters.append(
-                f"[{current}][{logo_tag}]overlay=x=(W-w)*{float(pos.get('x', 0.04))}:"
-                f"y=(H-h)*{float(pos.get('y', 0.04))}:enable='between(t,{start},{end})'[{out_tag}]"
-            )
+            stream_index = logo_refs.index(asset_ref) + 1
+            tag = graph.tick()
+            logo_tag = f"{label}lg{tag}"
+            out_tag = f"{label}v{tag}"
+            scale_width = tier.scaled(int(style.get("scale_width", 220)))
+            resize = Filter("scale", (str(scale_width), "-1"))
+            graph.add(Node("logo_scale", [f"{stream_index}:v"], [resize], [logo_tag]))
+            place = Filter("overlay", (f"x=(W-w)*{float(pos.get('x', 0.04))}", f"y=(H-h)*{float(pos.get('y', 0.04))}"))
+            graph.add(Node("logo", [current, logo_tag], [place], [out_tag], window))
             current = out_tag
             continue
 
         text = _escape_text(overlay.get("text", ""))
-        font_size = int(style.get("font_size", 64))
+        font_size = tier.scaled(int(style.get("font_size", 64)))
         color = style.get("color", "white")
         x_expr = _text_x_expr(pos)
         y_expr = f"h*{float(pos.get('y', 0.5))}-text_h/2"
 
         if otype == "cta":
-            cta_bg = _hex_to_ffmpeg_color(str(style.get("bg", project.primary_color)))
-            box_tag = f"v{tag_idx}"
-            tag_idx += 1
-            filters.append(
-                f"[{current}]drawbox=x=iw*0.16:y=ih*{float(pos.get('y', 0.9))}-ih*0.055:"
-                f"w=iw*0.68:h=ih*0.11:color={cta_bg}@0.92:t=fill:enable='between(t,{start},{end})'[{box_tag}]"
+            cta_bg = _hex_to_ffmpeg_color(str(style.get("bg", primary_color)))
+            box_tag = f"{label}v{graph.tick()}"
+            box = Filter(
+                "drawbox",
+                (
+                    "x=iw*0.16",
+                    f"y=ih*{float(pos.get('y', 0.9))}-ih*0.055",
+                    "w=iw*0.68",
+                    "h=ih*0.11",
+                    f"color={cta_bg}@0.92",
+                    "t=fill",
+                ),
             )
+            graph.add(Node("cta_box", [current], [box], [box_tag], window))
             current = box_tag
 
-        out_tag = f"v{tag_idx}"
-        tag_idx += 1
-        box = style.get("box", "black@0.4")
-        box_border = int(style.get("box_border", 18))
-        draw = (
-            f"[{current}]drawtext=text='{text}':x={x_expr}:y={y_expr}:"
-            f"fontsize={font_size}:fontcolor={color}:box=1:boxcolor={box}:boxborderw={box_border}:"
-            f"enable='between(t,{start},{end})'[{out_tag}]"
+        out_tag = f"{label}v{graph.tick()}"
+        draw = Filter(
+            "drawtext",
+            (
+                f"text='{text}'",
+                f"x={x_expr}",
+                f"y={y_expr}",
+                f"fontsize={font_size}",
+                f"fontcolor={color}",
+                "box=1",
+                f"boxcolor={style.get('box', 'black@0.4')}",
+                f"boxborderw={tier.scaled(int(style.get('box_border', 18)))}",
+            ),
         )
-        filters.append(draw)
+        graph.add(Node("text", [current], [draw], [out_tag], window))
         current = out_tag
 
-    filter_complex = ";".join(filters)
-    cmd.extend(
-        [
-            "-filter_complex",
-            filter_complex,
-            "-map",
-            f"[{current}]",
-            "-map",
-            "0:a?",
-            "-c:v",
-            "libx264",
-            "-preset",
-            "veryfast",
-            "-c:a",
-            "aac",
-            str(dst),
-        ]
+    graph.output = current
+    return graph
+
+
+def _overlay_filters(
+    overlays: list[dict],
+    logo_refs: list[str],
+    primary_color: str,
+    ass_path: Path | None = None,
+    tier: RenderTier = FULL,
+    source: str = "0:v",
+    label: str = "",
+    duration_sec: float | None = None,
+) -> tuple[list[str], str]:
+    graph = _overlay_graph(overlays, logo_refs, primary_color, ass_path, tier, source, label)
+    optimize(graph, duration_sec, time_split=settings.FILTERGRAPH_TIME_SPLIT)
+    logger.debug("overlay filtergraph %s", graph.stats())
+    return graph.render(), graph.output
+
+
+def _has_visual_overlays(overlays: list[dict], project: Project, duration_sec: float | None = None) -> bool:
+    # Whatever survives the optimizer besides the base node changes pixels; empty windows and unknown logos do not.
+    graph = _overlay_graph(overlays, list(_logo_paths(overlays, project)), project.primary_color)
+    optimize(graph, duration_sec)
+    return any(node.kind != "base" for node in graph.nodes)
+
+
+def plan_render_streams(
+    metadata: dict | None,
+    overlays: list[dict],
+    project: Project,
+    tier: RenderTier = FULL,
+    profile: EncoderProfile | None = None,
+) -> StreamPlan:
+    if not metadata:
+        return ENCODE_ALL
+    width, height = tier.dimensions(settings.TARGET_WIDTH, settings.TARGET_HEIGHT)
+    return plan_streams(
+        metadata,
+        _has_visual_overlays(overlays, project, metadata.get("duration_sec") or None),
+        width,
+        height,
+        settings.TARGET_FPS,
+        max_audio_kbps=profile.audio_bitrate_kbps if profile is not None else None,
+        video_encode_reason="encoder profile sets rate control" if profile is not None else "",
+    )
+
+
+def _audio_args(plan: StreamPlan | None, profile: EncoderProfile | None = None) -> list[str]:
+    if plan is not None and plan.audio != ENCODE:
+        return ["-c:a", "copy"] if plan.audio == COPY else []
+    if profile is not None:
+        return profile.audio_args()
+    return ["-c:a", RENDER_AUDIO_CODEC]
+
+
+def _render_command(
+    src: Path,
+    dst: Path,
+    overlays: list[dict],
+    project: Project,
+    start_sec: float | None = None,
+    duration_sec: float | None = None,
+    include_audio: bool = True,
+    ass_path: Path | None = None,
+    tier: RenderTier = FULL,
+    profile: EncoderProfile | None = None,
+    plan: StreamPlan | None = None,
+) -> list[str]:
+    cmd = ["ffmpeg", "-y"]
+    if start_sec is not None:
+        cmd.extend(["-ss", f"{start_sec:.6f}"])
+    if duration_sec is not None:
+        cmd.extend(["-t", f"{duration_sec:.6f}"])
+    cmd.extend(["-i", str(src)])
+    if plan is not None and plan.video == COPY:
+        cmd.extend(["-map", "0:v", "-c:v", "copy"])
+    else:
+        logo_inputs = _logo_paths(overlays, project)
+        for logo_path in logo_inputs.values():
+            cmd.extend(["-i", str(logo_path)])
+        filters, current = _overlay_filters(
+            overlays, list(logo_inputs.keys()), project.primary_color, ass_path, tier, duration_sec=duration_sec
+        )
+        cmd.extend(["-filter_complex", ";".join(filters), "-map", f"[{current}]"])
+        if profile is not None:
+            cmd.extend(profile.video_args(settings.TARGET_FPS))
+        else:
+            cmd.extend(["-c:v", RENDER_VIDEO_CODEC, "-preset", tier.preset, "-crf", str(tier.crf), *_keyframe_args()])
+    if include_audio:
+        # The audio plan only looks at the first track; further tracks of an upload would ride along unplanned.
+        cmd.extend(["-map", "0:a:0?", *_audio_args(plan, profile)])
+    else:
+        cmd.append("-an")
+    if profile is not None:
+        cmd.extend(profile.container_args())
+    cmd.append(str(dst))
+    return cmd
+
+
+@contextmanager
+def _text_script(
+    overlays: list[dict], project: Project, dst: Path, size: tuple[int, int] | None = None
+) -> Iterator[Path | None]:
+    if settings.TEXT_OVERLAY_BACKEND != "ass" or not any(ass_placeable(o) for o in overlays):
+        yield None
+        return
+    width, height = size or (settings.TARGET_WIDTH, settings.TARGET_HEIGHT)
+    script = dst.parent / f".{dst.stem}.ass"
+    script.write_text(compile_ass(overlays, width, height, project.primary_color), encoding="utf-8")
+    try:
+        yield script
+    finally:
+        script.unlink(missing_ok=True)
+
+
+def _render(
+    src: Path,
+    dst: Path,
+    overlays: list[dict],
+    project: Project,
+    start_sec: float | None = None,
+    duration_sec: float | None = None,
+    include_audio: bool = True,
+    tier: RenderTier = FULL,
+    profile: EncoderProfile | None = None,
+    plan: StreamPlan | None = None,
+    timeout_sec: float | None = None,
+) -> None:
+    if plan is not None and plan.video == COPY:
+        cmd = _render_command(src, dst, overlays, project, start_sec, duration_sec, include_audio, plan=plan)
+        _run(cmd, timeout_sec)
+        return
+    with _text_script(overlays, project, dst) as ass_path:
+        _run(
+            _render_command(
+                src, dst, overlays, project, start_sec, duration_sec, include_audio, ass_path, tier, profile, plan
+            ),
+            timeout_sec,
+        )
+
+
+def render_with_overlays(
+    src: Path, dst: Path, timeline: dict, project: Project, tier: RenderTier = FULL, plan: StreamPlan | None = None
+) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    _render(src, dst, timeline.get("overlays", []), project, tier=tier, plan=plan)
+
+
+def _frame_overlays(overlays: list[dict], at_sec: float) -> list[dict]:
+    # Input-side -ss restarts timestamps at zero, so overlays showing at t get a window covering that first frame;
+    # the rest cannot change the frame and stay out of the cache key.
+    return [
+        {**overlay, "start_sec": 0.0, "end_sec": 1.0}
+        for overlay in overlays
+        if float(overlay.get("start_sec", 0)) <= at_sec <= float(overlay.get("end_sec", 1))
+    ]
+
+
+def render_frame(project: Project, overlays: list[dict], at_sec: float, fmt: str = "jpeg") -> bytes:
+    asset = source_video_asset(project)
+    # A preview never normalizes or hashes on the request thread; until ingest has stored the intermediate
+    # there is nothing cheap to seek into.
+    normalized = stored_normalized(asset)
+    if normalized is None:
+        raise SourceNotReady("Source video is still being prepared")
+    duration_sec = float(normalized_metadata(asset, normalized)["duration_sec"])
+    if not 0 <= at_sec < duration_sec:
+        raise InputRejected(f"Frame time {at_sec:.3f}s is outside the {duration_sec:.3f}s source")
+    suffix, codec_args = FRAME_FORMATS[fmt]
+    active = _frame_overlays(overlays, at_sec)
+    logo_inputs = _logo_paths(active, project)
+    encoder = {
+        "t": round(at_sec, 3),
+        "normalize": normalize_variant(),
+        "text_backend": settings.TEXT_OVERLAY_BACKEND,
+        "primary_color": project.primary_color,
+    }
+    logo_digests = {ref: file_digest(path) for ref, path in logo_inputs.items() if path.exists()}
+    key = render_cache_key(asset_digest(asset), active, logo_digests, encoder)
+    cache = get_render_cache("frame_cache", suffix=suffix)
+    with tempfile.TemporaryDirectory() as workdir:
+        dst = Path(workdir) / f"frame{suffix}"
+        if not cache.fetch(key, dst):
+            cmd = ["ffmpeg", "-y", "-ss", f"{at_sec:.6f}", "-i", str(normalized)]
+            for logo_path in logo_inputs.values():
+                cmd.extend(["-i", str(logo_path)])
+            with _text_script(active, project, dst) as ass_path:
+                filters, current = _overlay_filters(
+                    active, list(logo_inputs), project.primary_color, ass_path, duration_sec=1.0
+                )
+                cmd.extend(["-filter_complex", ";".join(filters), "-map", f"[{current}]", "-frames:v", "1"])
+                _run([*cmd, *codec_args, "-update", "1", str(dst)])
+            cache.store(key, dst)
+        return dst.read_bytes()
+
+
+def _fused_render_command(
+    src: Path,
+    normalized_dst: Path,
+    draft_dst: Path,
+    overlays: list[dict],
+    project: Project,
+    ass_path: Path | None = None,
+    audio: str = ENCODE,
+) -> list[str]:
+    cmd = ["ffmpeg", "-y", "-i", str(src)]
+    logo_inputs = _logo_paths(overlays, project)
+    for logo_path in logo_inputs.values():
+        cmd.extend(["-i", str(logo_path)])
+
+    filters = [f"[0:v]{_normalize_filter()},fps={settings.TARGET_FPS},split=2[vnorm][vsrc]"]
+    overlay_filters, current = _overlay_filters(
+        overlays, list(logo_inputs.keys()), project.primary_color, ass_path, FULL, source="vsrc"
+    )
+    filters.extend(overlay_filters)
+    cmd.extend(["-filter_complex", ";".join(filters)])
+    audio_args = ["-c:a", "copy"] if audio == COPY else ["-c:a", RENDER_AUDIO_CODEC]
+    # Only the first audio track, exactly as normalize_video keeps it, so both paths publish the same intermediate.
+    cmd.extend(["-map", "[vnorm]", "-map", "0:a:0?", "-c:v", "libx264", "-preset", "veryfast", *_keyframe_args()])
+    cmd.extend([*audio_args, str(normalized_dst)])
+    cmd.extend(["-map", f"[{current}]", "-map", "0:a:0?", "-c:v", RENDER_VIDEO_CODEC, "-preset", FULL.preset])
+    cmd.extend(["-crf", str(FULL.crf), *_keyframe_args(), *audio_args, str(draft_dst)])
+    return cmd
+
+
+def normalize_and_render(
+    src: Path, normalized_dst: Path, draft_dst: Path, timeline: dict, project: Project, metadata: dict | None = None
+) -> dict:
+    normalized_dst.parent.mkdir(parents=True, exist_ok=True)
+    draft_dst.parent.mkdir(parents=True, exist_ok=True)
+    plan = plan_normalize(src, metadata)
+    overlays = timeline.get("overlays", [])
+    if plan.video == COPY or not _has_visual_overlays(overlays, project, (metadata or {}).get("duration_sec") or None):
+        # A conforming upload needs no normalize decode, and a draft without visual overlays is a stream copy of
+        # the intermediate: normalize (or remux) first, then render the draft from what was published.
+        normalize_info = normalize_video(src, normalized_dst, plan=plan)
+        render_info = render_draft_video(
+            normalized_dst, draft_dst, timeline, project, metadata=ffprobe_metadata(normalized_dst)
+        )
+        return {**render_info, "normalize": normalize_info}
+    # The intermediate is only published once both outputs are complete, so re-renders never see a partial file.
+    staging = normalized_dst.with_name(f".{normalized_dst.stem}.{uuid.uuid4().hex[:6]}{normalized_dst.suffix}")
+    try:
+        with _text_script(overlays, project, draft_dst) as ass_path:
+            _run(_fused_render_command(src, staging, draft_dst, overlays, project, ass_path, plan.audio))
+        os.replace(staging, normalized_dst)
+    finally:
+        staging.unlink(missing_ok=True)
+
+    # Keyed and recorded the way render_draft_video plans a render of the published intermediate, so later
+    # lookups for the same timeline hit this entry.
+    render_plan = plan_render_streams(ffprobe_metadata(normalized_dst), overlays, project, FULL)
+    logo_digests, encoder = render_key_parts(timeline, project, FULL, plan=render_plan)
+    key = render_cache_key(file_digest(normalized_dst), overlays, logo_digests, encoder)
+    get_render_cache().store(key, draft_dst)
+    return {
+        "cache_key": key,
+        "tier": FULL.name,
+        "segment_sec": float(settings.RENDER_SEGMENT_SECONDS),
+        "source_digest": file_digest(normalized_dst),
+        "mode": "fused",
+        "cache": "miss",
+        "stream_plan": render_plan.as_dict(),
+        "encoder": encoder,
+        "logo_digests": logo_digests,
+        "normalize": plan.as_dict(),
+    }
+
+
+def render_first_draft(
+    asset: Asset, draft_dst: Path, timeline: dict, project: Project, metadata: dict, fused: bool = True
+) -> dict:
+    store = get_media_store()
+    digest, variant = asset_digest(asset), normalize_variant()
+    duration_sec = float(metadata.get("duration_sec", 0.0))
+    if fused and not chunk_plan(duration_sec) and store.fetch(digest, NORMALIZED, variant) is None:
+        # One decode produces both the stored intermediate (for later re-renders) and the first draft.
+        with store.write(digest, NORMALIZED, variant) as staging:
+            info = normalize_and_render(Path(asset.file.path), staging, draft_dst, timeline, project, metadata)
+        return info
+    # Long sources spread the first render across chunk workers; stored intermediates skip normalizing entirely.
+    normalized, normalize_info = normalized_source(asset, metadata)
+    info = render_draft_video(
+        normalized,
+        draft_dst,
+        timeline,
+        project,
+        duration_sec=duration_sec,
+        metadata=normalized_metadata(asset, normalized),
     )
+    return {**info, "normalize": normalize_info}
+
+
+def _split_segments(video: Path, workdir: Path, duration_sec: float, segment_sec: float) -> list[Path]:
+    total = segment_count(duration_sec, segment_sec)
+    cmd = ["ffmpeg", "-y", "-i", str(video), "-map", "0:v", "-c", "copy", "-f", "segment"]
+    if total > 1:
+        # Split half a frame early: the segment muxer misses keyframes that land exactly on the boundary.
+        half_frame = 0.5 / settings.TARGET_FPS
+        times = ",".join(
+            f"{segment_bounds(i, duration_sec, segment_sec)[0] - half_frame:.6f}" for i in range(1, total)
+        )
+        cmd.extend(["-segment_times", times])
+    cmd.extend(["-reset_timestamps", "1", str(workdir / "prev_%05d.mp4")])
     _run(cmd)
+    return sorted(workdir.glob("prev_*.mp4"))
+
+
+def _concat_segments(segments: list[Path], audio_src: Path, dst: Path) -> None:
+    listing = dst.parent / f".{dst.stem}.concat.txt"
+    listing.write_text("".join(f"file '{path.resolve()}'\n" for path in segments))
+    try:
+        _run(
+            [
+                "ffmpeg",
+                "-y",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                str(listing),
+                "-i",
+                str(audio_src),
+                "-map",
+                "0:v",
+                "-map",
+                "1:a?",
+                "-c",
+                "copy",
+                str(dst),
+            ]
+        )
+    finally:
+        listing.unlink(missing_ok=True)
+
+
+def render_incremental(
+    src: Path,
+    dst: Path,
+    timeline: dict,
+    project: Project,
+    previous: DraftVersion,
+    duration_sec: float,
+    tier: RenderTier = FULL,
+    plan: StreamPlan | None = None,
+) -> dict | None:
+    segment_sec = float(settings.RENDER_SEGMENT_SECONDS)
+    previous_render = previous.render_json or {}
+    previous_path = Path(settings.MEDIA_ROOT) / previous.draft_video_name if previous.draft_video_name else None
+    logo_digests, encoder = render_key_parts(timeline, project, tier, plan=plan)
+    # Kept segments were encoded with the previous colours, codec settings and logo files; any change there
+    # touches every segment, so only the overlay diff may differ for a partial re-render.
+    previous_logos = previous_render.get("logo_digests", {})
+    if (
+        segment_sec <= 0
+        or not previous_path
+        or not previous_path.exists()
+        or float(previous_render.get("segment_sec", 0)) != segment_sec
+        or previous_render.get("tier", FULL.name) != tier.name
+        or previous_render.get("source_digest") != file_digest(src)
+        or previous_render.get("encoder") != encoder
+        or any(previous_logos.get(ref, digest) != digest for ref, digest in logo_digests.items())
+    ):
+        return None
+
+    overlays = timeline.get("overlays", [])
+    diff = compute_overlay_diff(previous.timeline_json.get("overlays", []), overlays)
+    total = segment_count(duration_sec, segment_sec)
+    dirty = dirty_segments(diff, duration_sec, segment_sec)
+    if total == 0 or len(dirty) >= total:
+        return None
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=dst.parent) as tmp:
+        workdir = Path(tmp)
+        segments = _split_segments(previous_path, workdir, duration_sec, segment_sec)
+        if len(segments) != total:
+            return None
+        for index in dirty:
+            start, end = segment_bounds(index, duration_sec, segment_sec)
+            seg_path = workdir / f"seg_{index:05d}.mp4"
+            clipped = clip_overlays(overlays, start, end)
+            _render(src, seg_path, clipped, project, start, end - start, include_audio=False, tier=tier)
+            segments[index] = seg_path
+        _concat_segments(segments, src, dst)
+
+    return {"mode": "incremental", "segments_total": total, "segments_rendered": dirty}
+
+
+def chunk_plan(duration_sec: float) -> list[tuple[float, float]]:
+    if settings.RENDER_CHUNK_MODE == "off" or duration_sec <= 0:
+        return []
+    ranges = chunk_ranges(
+        duration_sec, float(settings.RENDER_CHUNK_SECONDS), max(0.0, float(settings.RENDER_SEGMENT_SECONDS))
+    )
+    return ranges if len(ranges) > 1 else []
+
+
+def render_chunk(
+    src: Path, dst: Path, overlays: list[dict], project: Project, start_sec: float, end_sec: float, tier: RenderTier
+) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    clipped = clip_overlays(overlays, start_sec, end_sec)
+    _render(
+        src,
+        dst,
+        clipped,
+        project,
+        start_sec,
+        end_sec - start_sec,
+        include_audio=False,
+        tier=tier,
+        timeout_sec=settings.RENDER_CHUNK_TIMEOUT_SECONDS,
+    )
+
+
+def concat_chunks(chunks: list[Path], audio_src: Path, dst: Path) -> None:
+    missing = [chunk.name for chunk in chunks if not chunk.exists()]
+    if missing:
+        raise PipelineError(f"Chunk render missing outputs: {', '.join(missing)}")
+    _concat_segments(chunks, audio_src, dst)
+
+
+def render_chunked(
+    src: Path, dst: Path, timeline: dict, project: Project, duration_sec: float, tier: RenderTier = FULL
+) -> dict | None:
+    ranges = chunk_plan(duration_sec)
+    if not ranges:
+        return None
+    overlays = timeline.get("overlays", [])
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=dst.parent) as tmp:
+        chunks = [Path(tmp) / f"chunk_{index:05d}.mp4" for index in range(len(ranges))]
+        # Callers here wait for the finished draft, so chunks render on local threads even in celery mode:
+        # only a job can hand them to a chord, whose callback then finishes it (see dispatch_chunked_draft).
+        with ExitStack() as stack:
+            commands = []
+            for (start, end), chunk in zip(ranges, chunks, strict=True):
+                clipped = clip_overlays(overlays, start, end)
+                ass_path = stack.enter_context(_text_script(clipped, project, chunk))
+                commands.append(
+                    _render_command(src, chunk, clipped, project, start, end - start, False, ass_path, tier)
+                )
+            # Each chunk is its own ffmpeg process, so threads are enough to occupy every core.
+            # Every submit carries a copy of the caller's context so chunks stay attached to its job.
+            with ThreadPoolExecutor(max_workers=max(1, int(settings.RENDER_CHUNK_WORKERS))) as pool:
+                timeout_sec = settings.RENDER_CHUNK_TIMEOUT_SECONDS
+                futures = [pool.submit(contextvars.copy_context().run, _run, cmd, timeout_sec) for cmd in commands]
+                for future in futures:
+                    future.result()
+        concat_chunks(chunks, src, dst)
+    return {"mode": "chunked", "chunk_mode": "local", "chunks": len(ranges)}
+
+
+def render_key_parts(
+    timeline: dict,
+    project: Project,
+    tier: RenderTier = FULL,
+    profile: EncoderProfile | None = None,
+    plan: StreamPlan | None = None,
+) -> tuple[dict, dict]:
+    # Logo digests and encoder settings: everything besides the source and overlays that a render depends on.
+    overlays = timeline.get("overlays", [])
+    streams = {"video": plan.video, "audio": plan.audio} if plan is not None else {}
+    logo_digests = {ref: file_digest(path) for ref, path in _logo_paths(overlays, project).items() if path.exists()}
+    if profile is not None:
+        encoder = {
+            "profile": asdict(profile),
+            "fps": settings.TARGET_FPS,
+            "text_backend": settings.TEXT_OVERLAY_BACKEND,
+            "primary_color": project.primary_color,
+            **streams,
+        }
+        return logo_digests, encoder
+    encoder = {
+        "video_codec": RENDER_VIDEO_CODEC,
+        "tier": tier.name,
+        "scale": tier.scale,
+        "preset": tier.preset,
+        "crf": tier.crf,
+        "audio_codec": RENDER_AUDIO_CODEC,
+        "text_backend": settings.TEXT_OVERLAY_BACKEND,
+        "segment_sec": float(settings.RENDER_SEGMENT_SECONDS),
+        "primary_color": project.primary_color,
+        **streams,
+    }
+    return logo_digests, encoder
+
+
+def render_cache_key_for(
+    src: Path,
+    timeline: dict,
+    project: Project,
+    tier: RenderTier = FULL,
+    profile: EncoderProfile | None = None,
+    plan: StreamPlan | None = None,
+) -> str:
+    logo_digests, encoder = render_key_parts(timeline, project, tier, profile, plan)
+    return render_cache_key(file_digest(src), timeline.get("overlays", []), logo_digests, encoder)
+
+
+def draft_render_info(
+    src: Path, timeline: dict, project: Project, tier: RenderTier = FULL, metadata: dict | None = None
+) -> tuple[StreamPlan, dict]:
+    # The stream plan and the render_json fields every draft render records, whichever way it is produced.
+    plan = plan_render_streams(metadata, timeline.get("overlays", []), project, tier)
+    logo_digests, encoder = render_key_parts(timeline, project, tier, plan=plan)
+    info = {
+        "cache_key": render_cache_key(file_digest(src), timeline.get("overlays", []), logo_digests, encoder),
+        "tier": tier.name,
+        "segment_sec": float(settings.RENDER_SEGMENT_SECONDS),
+        "source_digest": file_digest(src),
+        "stream_plan": plan.as_dict(),
+        "encoder": encoder,
+        "logo_digests": logo_digests,
+    }
+    return plan, info
+
+
+def render_draft_video(
+    src: Path,
+    dst: Path,
+    timeline: dict,
+    project: Project,
+    previous: DraftVersion | None = None,
+    duration_sec: float = 0.0,
+    tier: RenderTier = FULL,
+    metadata: dict | None = None,
+) -> dict:
+    cache = get_render_cache()
+    plan, info = draft_render_info(src, timeline, project, tier, metadata)
+    key = info["cache_key"]
+    if cache.fetch(key, dst):
+        return {**info, "cache": "hit", "mode": "cached"}
+
+    result = None
+    if plan.video == COPY:
+        # Nothing changes pixels: a stream copy is cheaper than any segment or chunk re-render.
+        render_with_overlays(src, dst, timeline, project, tier, plan)
+        result = {"mode": plan.mode}
+    if result is None and previous is not None and duration_sec > 0:
+        result = render_incremental(src, dst, timeline, project, previous, duration_sec, tier, plan)
+    if result is None:
+        result = render_chunked(src, dst, timeline, project, duration_sec, tier)
+    if result is None:
+        render_with_overlays(src, dst, timeline, project, tier, plan)
+        result = {"mode": "full"}
+    cache.store(key, dst)
+    return {**info, **result, "cache": "miss"}
+
+
+def render_export(
+    src: Path, dst: Path, timeline: dict, project: Project, profile: EncoderProfile, metadata: dict | None = None
+) -> dict:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    cache = get_render_cache("export_cache")
+    plan = plan_render_streams(metadata, timeline.get("overlays", []), project, profile=profile)
+    key = render_cache_key_for(src, timeline, project, profile=profile, plan=plan)
+    info = {"profile": profile.name, "encoder": asdict(profile), "cache_key": key, "stream_plan": plan.as_dict()}
+    # The checksum is taken while the artifact is materialized, so the export is not read a second time.
+    copied = cache.fetch(key, dst, checksum=True)
+    if copied is not None:
+        info.update(cache="hit", encode_time_sec=0.0)
+    else:
+        started = time.perf_counter()
+        _render(src, dst, timeline.get("overlays", []), project, profile=profile, plan=plan)
+        info.update(cache="miss", encode_time_sec=round(time.perf_counter() - started, 3))
+        copied = cache.store(key, dst, checksum=True)
+    if copied is None:
+        return {**info, "size_bytes": dst.stat().st_size, "sha256": file_digest(dst)}
+    return {**info, "size_bytes": copied.size_bytes, "sha256": copied.sha256}
+
+
+def _batch_export_command(
+    src: Path,
+    outputs: list[tuple[OutputFormat, Path, Path | None]],
+    overlays: list[dict],
+    project: Project,
+    profile: EncoderProfile,
+    plan: StreamPlan | None = None,
+) -> list[str]:
+    cmd = ["ffmpeg", "-y", "-i", str(src)]
+    logo_inputs = _logo_paths(overlays, project)
+    for logo_path in logo_inputs.values():
+        cmd.extend(["-i", str(logo_path)])
+
+    branches = "".join(f"[s{idx}]" for idx in range(len(outputs)))
+    filters = [f"[0:v]fps={settings.TARGET_FPS},split={len(outputs)}{branches}"]
+    tails = []
+    for idx, (fmt, _, ass_path) in enumerate(outputs):
+        width, height = fmt.dimensions(settings.TARGET_WIDTH, settings.TARGET_HEIGHT)
+        filters.append(f"[s{idx}]{_fit_filter(width, height, fmt.fit)}[f{idx}]")
+        branch, current = _overlay_filters(
+            overlays, list(logo_inputs.keys()), project.primary_color, ass_path, source=f"f{idx}", label=f"o{idx}"
+        )
+        filters.extend(branch)
+        tails.append(current)
+    cmd.extend(["-filter_complex", ";".join(filters)])
+    for (_, dst, _), current in zip(outputs, tails, strict=True):
+        cmd.extend(["-map", f"[{current}]", "-map", "0:a:0?"])
+        cmd.extend([*profile.video_args(settings.TARGET_FPS), *_audio_args(plan, profile), *profile.container_args()])
+        cmd.append(str(dst))
+    return cmd
+
+
+def render_batch_export(
+    src: Path,
+    outputs: dict[OutputFormat, Path],
+    timeline: dict,
+    project: Project,
+    profile: EncoderProfile,
+    metadata: dict | None = None,
+) -> dict:
+    overlays = timeline.get("overlays", [])
+    # Every branch reframes the picture, so only the audio stream is a copy candidate.
+    audio, audio_reason = plan_audio(metadata or {}, profile.audio_bitrate_kbps)
+    plan = StreamPlan(video=ENCODE, audio=audio, reasons=("reframing per output format", audio_reason))
+    sizes = {fmt: fmt.dimensions(settings.TARGET_WIDTH, settings.TARGET_HEIGHT) for fmt in outputs}
+    with ExitStack() as stack:
+        planned = []
+        for fmt, dst in outputs.items():
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            planned.append((fmt, dst, stack.enter_context(_text_script(overlays, project, dst, sizes[fmt]))))
+        started = time.perf_counter()
+        _run(_batch_export_command(src, planned, overlays, project, profile, plan))
+        elapsed = time.perf_counter() - started
+
+    # One process encodes every branch, so only the batch time is measured. The per-format figure is that time
+    # apportioned by pixel count: an estimate, kept under its own name so it is never compared with the
+    # measured encode_time_sec of a single export.
+    total_pixels = sum(width * height for width, height in sizes.values())
+    formats = {}
+    for fmt, dst in outputs.items():
+        width, height = sizes[fmt]
+        formats[fmt.name] = {
+            "format": fmt.label,
+            "width": width,
+            "height": height,
+            "estimated_encode_time_sec": round(elapsed * width * height / total_pixels, 3),
+            "size_bytes": dst.stat().st_size,
+            "sha256": file_digest(dst),
+        }
+    return {
+        "profile": profile.name,
+        "encoder": asdict(profile),
+        "encode_time_sec": round(elapsed, 3),
+        "timing": "apportioned_by_pixels",
+        "stream_plan": plan.as_dict(),
+        "formats": formats,
+    }
 
 
 def source_video_asset(project: Project) -> Asset:
@@ -418,18 +1586,27 @@ def rebuild_overlays(draft: Draft, timeline_json: dict) -> None:
     Overlay.objects.bulk_create(rows)
 
 
-def rerender_draft(project: Project, draft: Draft, timeline: dict, source: str = "manual_patch") -> None:
+def rerender_draft(
+    project: Project,
+    draft: Draft,
+    timeline: dict,
+    source: str = "manual_patch",
+    tier: str = FULL.name,
+) -> None:
+    render_tier = get_render_tier(tier)
     source_asset = source_video_asset(project)
-    src_path = Path(source_asset.file.path)
-    normalized = Path(settings.MEDIA_ROOT) / "normalized" / f"{project.id}.mp4"
-    if not normalized.exists():
-        normalize_video(src_path, normalized)
-    metadata = ffprobe_metadata(normalized)
+    proxy = stored_proxy(source_asset) if render_tier == PROXY else None
+    if proxy is not None:
+        # Preview renders decode the ingest proxy, already at the tier's size, instead of the full intermediate.
+        normalized, metadata = proxy
+    else:
+        normalized, _ = normalized_source(source_asset)
+        metadata = normalized_metadata(source_asset, normalized)
     video_context = getattr(project, "video_context", None)
     context_json = video_context.context_json if video_context else {}
     plan_source = source
     plan_json = build_edit_plan(project, context_json, {}, timeline, source=plan_source)
-    quality_report = validate_plan_quality(plan_json.get("overlays", []), metadata.get("duration_sec", 0.0))
+    quality_report = plan_quality(project, source_asset, plan_json, metadata.get("duration_sec", 0.0))
     if quality_report["critical"]:
         if settings.AUTO_FALLBACK_TEMPLATE_ON_RENDER_FAIL:
             copy = {
@@ -440,7 +1617,7 @@ def rerender_draft(project: Project, draft: Draft, timeline: dict, source: str =
             timeline = build_safe_fallback_timeline(project, metadata.get("duration_sec", 0.0), copy)
             plan_source = f"{source}_fallback"
             plan_json = build_edit_plan(project, context_json, copy, timeline, source=plan_source)
-            quality_report = validate_plan_quality(plan_json.get("overlays", []), metadata.get("duration_sec", 0.0))
+            quality_report = plan_quality(project, source_asset, plan_json, metadata.get("duration_sec", 0.0))
         else:
             persist_edit_plan(
                 project=project,
@@ -454,8 +1631,12 @@ def rerender_draft(project: Project, draft: Draft, timeline: dict, source: str =
             raise PipelineError(f"Quality gate failed: {'; '.join(quality_report['critical'])}")
 
     draft_path = Path(settings.MEDIA_ROOT) / "drafts" / f"{project.id}-{uuid.uuid4().hex[:6]}.mp4"
+    previous = draft.versions.first()
+    duration_sec = metadata.get("duration_sec", 0.0)
     try:
-        render_with_overlays(normalized, draft_path, timeline, project)
+        render_info = render_draft_video(
+            normalized, draft_path, timeline, project, previous, duration_sec, render_tier, metadata
+        )
     except PipelineError as exc:
         if not settings.AUTO_FALLBACK_TEMPLATE_ON_RENDER_FAIL:
             raise
@@ -467,7 +1648,7 @@ def rerender_draft(project: Project, draft: Draft, timeline: dict, source: str =
         timeline = build_safe_fallback_timeline(project, metadata.get("duration_sec", 0.0), copy)
         plan_source = f"{source}_fallback"
         plan_json = build_edit_plan(project, context_json, copy, timeline, source=plan_source)
-        quality_report = validate_plan_quality(plan_json.get("overlays", []), metadata.get("duration_sec", 0.0))
+        quality_report = plan_quality(project, source_asset, plan_json, metadata.get("duration_sec", 0.0))
         if quality_report["critical"]:
             persist_edit_plan(
                 project=project,
@@ -479,14 +1660,19 @@ def rerender_draft(project: Project, draft: Draft, timeline: dict, source: str =
                 error=f"Fallback failed: {'; '.join(quality_report['critical'])}",
             )
             raise PipelineError(f"Render failed and fallback plan invalid: {exc}") from exc
-        render_with_overlays(normalized, draft_path, timeline, project)
+        render_info = render_draft_video(normalized, draft_path, timeline, project, tier=render_tier, metadata=metadata)
     rel = draft_path.relative_to(Path(settings.MEDIA_ROOT))
 
     draft.timeline_json = timeline
     draft.draft_video.name = str(rel)
+    draft.render_tier = render_tier.name
+    draft.source_sha256 = source_asset.sha256
     draft.status = Draft.Status.READY
     draft.error = ""
-    draft.save(update_fields=["timeline_json", "draft_video", "status", "error", "updated_at"])
+    draft.save(
+        update_fields=["timeline_json", "draft_video", "render_tier", "source_sha256", "status", "error", "updated_at"]
+    )
     rebuild_overlays(draft, timeline)
+    plan_json["render_plan"] = render_info.get("stream_plan", {})
     persist_edit_plan(project, draft, plan_json, quality_report, source=plan_source)
-    persist_draft_version(draft, timeline, source=source)
+    persist_draft_version(draft, timeline, source=source, render_json=render_info)
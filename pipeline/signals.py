@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from pipeline.media_store import get_media_store
+from projects.models import Asset, Draft
+
+
+@receiver(post_delete, sender=Asset)
+def release_asset_media(sender, instance: Asset, **kwargs) -> None:
+    # Stored intermediates outlive an asset only while another asset or draft still shares its digest.
+    if instance.sha256:
+        get_media_store().release(instance.sha256)
+
+
+@receiver(post_delete, sender=Draft)
+def release_draft_media(sender, instance: Draft, **kwargs) -> None:
+    if instance.source_sha256:
+        get_media_store().release(instance.source_sha256)
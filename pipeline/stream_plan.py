@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import bisect
+import math
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Any
+
+COPY = "copy"
+ENCODE = "encode"
+NONE = "none"
+
+COPYABLE_AUDIO_CODECS = {"aac"}
+COPYABLE_VIDEO_CODECS = {"h264"}
+COPYABLE_PIX_FMTS = {"yuv420p"}
+
+
+@dataclass(frozen=True)
+class StreamPlan:
+    video: str
+    audio: str
+    reasons: tuple[str, ...] = ()
+
+    @property
+    def mode(self) -> str:
+        if self.video == COPY:
+            return "remux" if self.audio != ENCODE else "audio_transcode"
+        return "encode"
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"mode": self.mode, "video": self.video, "audio": self.audio, "reasons": list(self.reasons)}
+
+
+ENCODE_ALL = StreamPlan(video=ENCODE, audio=ENCODE, reasons=("source streams not probed",))
+
+
+def _fps(value: str | None) -> Fraction | None:
+    try:
+        return Fraction(value) if value else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def video_mismatches(metadata: dict, width: int, height: int, fps: int) -> list[str]:
+    mismatches = []
+    if metadata.get("codec_name") not in COPYABLE_VIDEO_CODECS:
+        mismatches.append(f"codec {metadata.get('codec_name')}")
+    if metadata.get("pix_fmt") not in COPYABLE_PIX_FMTS:
+        mismatches.append(f"pix_fmt {metadata.get('pix_fmt')}")
+    if (metadata.get("width"), metadata.get("height")) != (width, height):
+        mismatches.append(f"size {metadata.get('width')}x{metadata.get('height')}")
+    if _fps(metadata.get("fps")) != fps:
+        mismatches.append(f"fps {metadata.get('fps')}")
+    if metadata.get("sample_aspect_ratio") not in (None, "1:1", "0:1", "N/A"):
+        mismatches.append(f"sar {metadata['sample_aspect_ratio']}")
+    if metadata.get("rotation"):
+        mismatches.append(f"rotation {metadata['rotation']}")
+    return mismatches
+
+
+def missing_keyframes(keyframes: list[float], duration_sec: float, segment_sec: float, fps: int) -> list[float]:
+    # Incremental re-renders split the previous draft with stream copy, and a remuxed draft keeps the
+    # intermediate's GOPs: every grid boundary needs a keyframe between half a frame early (where the
+    # splitter cuts) and one frame late (where forced keyframes land).
+    if segment_sec <= 0 or duration_sec <= 0:
+        return []
+    early, late = 0.5 / fps, 1.0 / fps
+    keyframes = sorted(keyframes)
+    missing = []
+    for index in range(math.ceil(duration_sec / segment_sec - 1e-9)):
+        boundary = index * segment_sec
+        pos = bisect.bisect_left(keyframes, boundary - early)
+        if pos == len(keyframes) or keyframes[pos] > boundary + late:
+            missing.append(round(boundary, 6))
+    return missing
+
+
+def plan_audio(metadata: dict, max_bitrate_kbps: int | None = None) -> tuple[str, str]:
+    if "audio_codec" not in metadata:
+        return ENCODE, "audio stream not probed"
+    codec = metadata["audio_codec"]
+    if codec is None:
+        return NONE, "no audio stream"
+    if codec not in COPYABLE_AUDIO_CODECS:
+        return ENCODE, f"audio codec {codec} is not aac"
+    bitrate = int(metadata.get("audio_bit_rate") or 0)
+    if max_bitrate_kbps and bitrate > max_bitrate_kbps * 1000:
+        return ENCODE, f"audio bitrate {bitrate // 1000}k above {max_bitrate_kbps}k"
+    # Re-encoding AAC to AAC only loses quality; the target bitrate cannot be exceeded by copying.
+    return COPY, "audio already aac"
+
+
+def plan_streams(
+    metadata: dict | None,
+    visual: bool,
+    width: int,
+    height: int,
+    fps: int,
+    max_audio_kbps: int | None = None,
+    video_encode_reason: str = "",
+) -> StreamPlan:
+    if not metadata:
+        return ENCODE_ALL
+    audio, audio_reason = plan_audio(metadata, max_audio_kbps)
+    if video_encode_reason:
+        video, video_reason = ENCODE, video_encode_reason
+    elif visual:
+        video, video_reason = ENCODE, "visual overlays apply"
+    elif mismatches := video_mismatches(metadata, width, height, fps):
+        video, video_reason = ENCODE, f"source differs from target: {', '.join(mismatches)}"
+    else:
+        video, video_reason = COPY, "no visual overlays and source matches target"
+    return StreamPlan(video=video, audio=audio, reasons=(video_reason, audio_reason))
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any
+
+from django.conf import settings
+from django.utils import timezone
+
+from projects.models import Job
+
+POLL_SECONDS = 0.2
+KILL_GRACE_SECONDS = 2.0
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class Supervised:
+    returncode: int
+    stdout: str = ""
+    stderr_tail: str = ""
+    progress: dict[str, Any] = field(default_factory=dict)
+    timed_out: bool = False
+
+
+@dataclass
+class JobMonitor:
+    job_id: str
+    interval_sec: float
+    stage: str = ""
+
+    def report(self, progress: dict[str, Any]) -> None:
+        stage = {"stage": self.stage} if self.stage else {}
+        Job.objects.filter(id=self.job_id).update(
+            progress_json={**progress, **stage, "updated_at": timezone.now().isoformat()}
+        )
+
+    def is_cancelled(self) -> bool:
+        return Job.objects.filter(id=self.job_id, status=Job.Status.CANCELLED).exists()
+
+
+_monitor: contextvars.ContextVar[JobMonitor | None] = contextvars.ContextVar("media_job_monitor", default=None)
+
+
+@contextmanager
+def track_job(job_id: str) -> Iterator[JobMonitor]:
+    monitor = JobMonitor(str(job_id), float(settings.MEDIA_PROGRESS_INTERVAL_SECONDS))
+    token = _monitor.set(monitor)
+    try:
+        yield monitor
+    finally:
+        _monitor.reset(token)
+
+
+def raise_if_cancelled(step: str) -> None:
+    monitor = _monitor.get()
+    if monitor is not None and monitor.is_cancelled():
+        raise JobCancelled(f"Job cancelled before {step}")
+
+
+def report_stage(stage: str) -> None:
+    raise_if_cancelled(stage)
+    monitor = _monitor.get()
+    if monitor is not None:
+        monitor.stage = stage
+        monitor.report({})
+
+
+def parse_progress_block(lines: list[str]) -> dict[str, Any]:
+    raw = dict(line.split("=", 1) for line in lines if "=" in line)
+    progress: dict[str, Any] = {}
+    if raw.get("frame", "").isdigit():
+        progress["frame"] = int(raw["frame"])
+    for key, target in (("fps", "fps"), ("speed", "speed")):
+        try:
+            progress[target] = float(raw.get(key, "").strip().rstrip("x"))
+        except ValueError:
+            continue
+    if raw.get("out_time_us", "").lstrip("-").isdigit():
+        progress["out_time_sec"] = round(max(0, int(raw["out_time_us"])) / 1_000_000, 3)
+    if "progress" in raw:
+        progress["state"] = raw["progress"]
+    return progress
+
+
+def _read_progress(stream: IO[str], progress: dict[str, Any]) -> None:
+    block: list[str] = []
+    for line in stream:
+        line = line.strip()
+        block.append(line)
+        if line.startswith("progress="):
+            progress.update(parse_progress_block(block))
+            block = []
+
+
+def _read_tail(stream: IO[str], tail: deque[str]) -> None:
+    for line in stream:
+        tail.append(line.rstrip("\n"))
+
+
+def _read_all(stream: IO[str], chunks: list[str]) -> None:
+    chunks.append(stream.read())
+
+
+def _limit_cpu(pid: int, cpu_sec: int) -> None:
+    try:
+        import resource
+    except ImportError:
+        return
+    if cpu_sec <= 0 or not hasattr(resource, "prlimit"):
+        return
+    try:
+        resource.prlimit(pid, resource.RLIMIT_CPU, (cpu_sec, cpu_sec + 5))
+    except (OSError, ValueError):
+        pass
+
+
+def _kill_group(proc: subprocess.Popen) -> None:
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            proc.wait(timeout=KILL_GRACE_SECONDS)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def run_supervised(
+    cmd: list[str],
+    timeout_sec: float | None = None,
+    cpu_limit_sec: int = 0,
+    capture_stdout: bool = False,
+    stdout_file: IO[bytes] | None = None,
+) -> Supervised:
+    # stdout_file: binary output (rawvideo, PCM) is handed to the process directly and never passes through Python.
+    monitor = _monitor.get()
+    track_progress = (
+        Path(cmd[0]).name == "ffmpeg" and not capture_stdout and stdout_file is None and "-progress" not in cmd
+    )
+    if track_progress:
+        cmd = [cmd[0], "-nostats", "-progress", "pipe:1", *cmd[1:]]
+
+    # A session of its own lets cancellation and timeouts take down everything ffmpeg spawned.
+    proc = subprocess.Popen(
+        cmd,
+        stdout=stdout_file if stdout_file is not None else subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        start_new_session=True,
+    )
+    _limit_cpu(proc.pid, cpu_limit_sec)
+    tail: deque[str] = deque(maxlen=int(settings.MEDIA_STDERR_TAIL_LINES))
+    progress: dict[str, Any] = {}
+    stdout: list[str] = []
+    readers = [threading.Thread(target=_read_tail, args=(proc.stderr, tail), daemon=True)]
+    if stdout_file is None:
+        readers.append(
+            threading.Thread(
+                target=_read_progress if track_progress else _read_all,
+                args=(proc.stdout, progress if track_progress else stdout),
+                daemon=True,
+            )
+        )
+    for reader in readers:
+        reader.start()
+
+    deadline = time.monotonic() + timeout_sec if timeout_sec else None
+    next_check = time.monotonic() + (monitor.interval_sec if monitor else 0)
+    reported: dict[str, Any] = {}
+    timed_out = cancelled = False
+    while True:
+        try:
+            proc.wait(timeout=POLL_SECONDS)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            timed_out = True
+            _kill_group(proc)
+            break
+        if monitor is not None and now >= next_check:
+            next_check = now + monitor.interval_sec
+            if monitor.is_cancelled():
+                cancelled = True
+                _kill_group(proc)
+                break
+            if progress and progress != reported:
+                reported = dict(progress)
+                monitor.report({**reported, "output": Path(cmd[-1]).name})
+
+    for reader in readers:
+        reader.join(timeout=KILL_GRACE_SECONDS)
+    if cancelled:
+        raise JobCancelled(f"Job cancelled while running {Path(cmd[0]).name}")
+    return Supervised(
+        returncode=proc.returncode,
+        stdout="".join(stdout),
+        stderr_tail="\n".join(tail),
+        progress=dict(progress),
+        timed_out=timed_out,
+    )
@@ -1,32 +1,91 @@
 from __future__ import annotations
 
+import functools
+import logging
+import shutil
+import time
 import uuid
 from pathlib import Path
 
-from celery import shared_task
+from celery import chord, current_app, shared_task
 from django.conf import settings
 from django.utils import timezone
 
 from pipeline.services import (
+    InputRejected,
     PipelineError,
+    asset_digest,
     build_safe_fallback_timeline,
     build_timeline,
-    ffprobe_metadata,
+    concat_chunks,
+    draft_render_info,
+    check_source_duration,
+    chunk_plan,
     generate_copy,
-    normalize_video,
+    get_render_cache,
+    ingest_source,
+    normalized_metadata,
+    normalized_source,
     persist_draft_version,
+    plan_quality,
+    probe_asset,
     rebuild_overlays,
-    render_with_overlays,
+    render_batch_export,
+    render_chunk,
+    render_export,
+    render_first_draft,
     source_video_asset,
+    version_filmstrip,
 )
+from pipeline.context import save_video_context
 from pipeline.planner import build_edit_plan, persist_edit_plan
-from pipeline.quality import validate_plan_quality
-from projects.models import Draft, ExportArtifact, Job, Project
+from pipeline.profiles import (
+    FULL,
+    OUTPUT_FORMATS,
+    EncoderProfile,
+    get_encoder_profile,
+    get_output_format,
+    get_render_tier,
+)
+from pipeline.stream_plan import COPY
+from pipeline.supervisor import JobCancelled, raise_if_cancelled, track_job
+from projects.models import Asset, Draft, DraftVersion, ExportArtifact, Job, Project
+
+logger = logging.getLogger(__name__)
+
+INGEST_POLL_SECONDS = 1.0
+
+
+def _tracked(task):
+    # Media subprocesses started by the task report progress to its Job row and stop when the Job is cancelled.
+    @functools.wraps(task)
+    def run(self, job_id: str, *args, **kwargs):
+        with track_job(job_id):
+            return task(self, job_id, *args, **kwargs)
+
+    return run
+
+
+def _mark_cancelled(job: Job, exc: JobCancelled) -> dict:
+    job.status = Job.Status.CANCELLED
+    job.error = str(exc)
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at", "updated_at"])
+    return job.result_json
 
 
-@shared_task(bind=True, autoretry_for=(PipelineError,), retry_backoff=True, max_retries=1)
+@shared_task(
+    bind=True,
+    autoretry_for=(PipelineError,),
+    dont_autoretry_for=(InputRejected,),
+    retry_backoff=True,
+    max_retries=1,
+)
+@_tracked
 def generate_draft_task(self, job_id: str) -> dict:
     job = Job.objects.get(id=job_id)
+    if job.status == Job.Status.CANCELLED:
+        return job.result_json
     job.status = Job.Status.RUNNING
     job.started_at = timezone.now()
     job.task_id = self.request.id
@@ -35,20 +94,18 @@ def generate_draft_task(self, job_id: str) -> dict:
     try:
         project = job.project
         source_asset = source_video_asset(project)
-        src_path = Path(source_asset.file.path)
-        normalized = Path(settings.MEDIA_ROOT) / "normalized" / f"{project.id}.mp4"
-        normalize_video(src_path, normalized)
-        metadata = ffprobe_metadata(normalized)
-        if metadata["duration_sec"] > settings.VIDEO_MAX_DURATION_SECONDS:
-            raise PipelineError(f"Input too long: {metadata['duration_sec']:.2f}s")
+        _wait_for_ingest(source_asset)
+        # Rejected from the stored probe, before any decode; retrying cannot make the source shorter.
+        metadata = probe_asset(source_asset)
+        check_source_duration(metadata)
 
         copy = generate_copy(project.prompt, project.template_id)
         timeline = build_timeline(project, metadata["duration_sec"], copy)
-        video_context = getattr(project, "video_context", None)
-        context_json = video_context.context_json if video_context else {}
+        video_context = getattr(project, "video_context", None) or save_video_context(project, source_asset, metadata)
+        context_json = video_context.context_json
         plan_source = "initial_generate"
         plan_json = build_edit_plan(project, context_json, copy, timeline, source=plan_source)
-        quality_report = validate_plan_quality(plan_json.get("overlays", []), metadata["duration_sec"])
+        quality_report = plan_quality(project, source_asset, plan_json, metadata["duration_sec"])
 
         draft, _ = Draft.objects.get_or_create(project=project)
         if quality_report["critical"]:
@@ -56,7 +113,7 @@ def generate_draft_task(self, job_id: str) -> dict:
                 timeline = build_safe_fallback_timeline(project, metadata["duration_sec"], copy)
                 plan_source = "initial_generate_fallback"
                 plan_json = build_edit_plan(project, context_json, copy, timeline, source=plan_source)
-                quality_report = validate_plan_quality(plan_json.get("overlays", []), metadata["duration_sec"])
+                quality_report = plan_quality(project, source_asset, plan_json, metadata["duration_sec"])
             else:
                 persist_edit_plan(
                     project=project,
@@ -75,15 +132,27 @@ def generate_draft_task(self, job_id: str) -> dict:
         draft.save(update_fields=["timeline_json", "status", "error", "updated_at"])
 
         draft_path = Path(settings.MEDIA_ROOT) / "drafts" / f"{project.id}-{uuid.uuid4().hex[:6]}.mp4"
+        finish = {
+            "draft_path": str(draft_path),
+            "source_sha256": asset_digest(source_asset),
+            "timeline": timeline,
+            "plan_json": plan_json,
+            "quality_report": quality_report,
+            "plan_source": plan_source,
+        }
+        if dispatch_chunked_draft(job, source_asset, metadata, finish):
+            # Chunk workers render the draft; concat_chunks_task finishes this job once the last chunk lands.
+            job.refresh_from_db()
+            return job.result_json
         try:
-            render_with_overlays(normalized, draft_path, timeline, project)
+            render_info = render_first_draft(source_asset, draft_path, timeline, project, metadata)
         except PipelineError as exc:
             if not settings.AUTO_FALLBACK_TEMPLATE_ON_RENDER_FAIL:
                 raise
             timeline = build_safe_fallback_timeline(project, metadata["duration_sec"], copy)
             plan_source = "initial_generate_fallback"
             plan_json = build_edit_plan(project, context_json, copy, timeline, source=plan_source)
-            quality_report = validate_plan_quality(plan_json.get("overlays", []), metadata["duration_sec"])
+            quality_report = plan_quality(project, source_asset, plan_json, metadata["duration_sec"])
             if quality_report["critical"]:
                 persist_edit_plan(
                     project=project,
@@ -95,39 +164,212 @@ def generate_draft_task(self, job_id: str) -> dict:
                     error=f"Fallback failed: {'; '.join(quality_report['critical'])}",
                 )
                 raise PipelineError(f"Render failed and fallback plan invalid: {exc}") from exc
-            render_with_overlays(normalized, draft_path, timeline, project)
+            render_info = render_first_draft(source_asset, draft_path, timeline, project, metadata, fused=False)
+            finish.update(
+                timeline=timeline, plan_json=plan_json, quality_report=quality_report, plan_source=plan_source
+            )
 
-        rel = draft_path.relative_to(Path(settings.MEDIA_ROOT))
-        draft.draft_video.name = str(rel)
-        draft.status = Draft.Status.READY
-        draft.save(update_fields=["draft_video", "status", "updated_at"])
-        rebuild_overlays(draft, timeline)
-        persist_edit_plan(project, draft, plan_json, quality_report, source=plan_source)
-        persist_draft_version(draft, timeline, source="initial_generate")
+        return _complete_draft(job, {**finish, "render_info": render_info})
+    except JobCancelled as exc:
+        return _cancel_draft(job, exc)
+    except Exception as exc:
+        _fail_draft(job, str(exc))
+        raise
 
-        project.status = Project.Status.DRAFT_READY
-        project.save(update_fields=["status", "updated_at"])
 
-        job.status = Job.Status.SUCCESS
-        job.finished_at = timezone.now()
-        job.result_json = {"draft_id": str(draft.id), "draft_video": draft.draft_video.url}
-        job.save(update_fields=["status", "finished_at", "result_json", "updated_at"])
-        return job.result_json
+def _complete_draft(job: Job, finish: dict) -> dict:
+    # Everything after the render, whether it ran inside generate_draft_task or as a chord of chunk workers.
+    project = job.project
+    draft = project.draft
+    timeline, plan_json = finish["timeline"], finish["plan_json"]
+    render_info = finish["render_info"]
+    draft.draft_video.name = str(Path(finish["draft_path"]).relative_to(Path(settings.MEDIA_ROOT)))
+    draft.render_tier = Draft.RenderTier.FULL
+    draft.source_sha256 = finish["source_sha256"]
+    draft.status = Draft.Status.READY
+    draft.save(update_fields=["draft_video", "render_tier", "source_sha256", "status", "updated_at"])
+    rebuild_overlays(draft, timeline)
+    plan_json["render_plan"] = render_info.get("stream_plan", {})
+    persist_edit_plan(project, draft, plan_json, finish["quality_report"], source=finish["plan_source"])
+    persist_draft_version(draft, timeline, source="initial_generate", render_json=render_info)
+
+    project.status = Project.Status.DRAFT_READY
+    project.save(update_fields=["status", "updated_at"])
+
+    job.status = Job.Status.SUCCESS
+    job.finished_at = timezone.now()
+    job.result_json = {"draft_id": str(draft.id), "draft_video": draft.draft_video.url}
+    job.save(update_fields=["status", "finished_at", "result_json", "updated_at"])
+    return job.result_json
+
+
+def _cancel_draft(job: Job, exc: JobCancelled) -> dict:
+    Draft.objects.update_or_create(project=job.project, defaults={"status": Draft.Status.FAILED, "error": str(exc)})
+    return _mark_cancelled(job, exc)
+
+
+def _fail_draft(job: Job, msg: str) -> None:
+    Draft.objects.update_or_create(project=job.project, defaults={"status": Draft.Status.FAILED, "error": msg})
+    job.status = Job.Status.FAILED
+    job.error = msg
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at", "updated_at"])
+    job.project.status = Project.Status.FAILED
+    job.project.save(update_fields=["status", "updated_at"])
+
+
+@shared_task
+def render_chunk_task(
+    src: str,
+    dst: str,
+    overlays: list[dict],
+    project_id: str,
+    start_sec: float,
+    end_sec: float,
+    tier_name: str,
+    job_id: str,
+) -> str:
+    project = Project.objects.get(id=project_id)
+    # Tracked under the draft's job, so cancelling it also stops a chunk that is already encoding.
+    with track_job(job_id):
+        raise_if_cancelled("chunk render")
+        render_chunk(Path(src), Path(dst), overlays, project, start_sec, end_sec, get_render_tier(tier_name))
+    return dst
+
+
+@shared_task
+def concat_chunks_task(chunks: list[str], job_id: str, audio_src: str, finish: dict) -> dict:
+    # The chord callback: joins the chunks into the draft and finishes the job nobody is waiting on.
+    job = Job.objects.get(id=job_id)
+    try:
+        if job.status == Job.Status.CANCELLED:
+            return job.result_json
+        with track_job(job_id):
+            raise_if_cancelled("chunk concat")
+            draft_path = Path(finish["draft_path"])
+            concat_chunks([Path(chunk) for chunk in chunks], Path(audio_src), draft_path)
+        get_render_cache().store(finish["render_info"]["cache_key"], draft_path)
+        return _complete_draft(job, finish)
+    except JobCancelled as exc:
+        return _cancel_draft(job, exc)
     except Exception as exc:
-        msg = str(exc)
-        Draft.objects.update_or_create(project=job.project, defaults={"status": Draft.Status.FAILED, "error": msg})
-        job.status = Job.Status.FAILED
-        job.error = msg
-        job.finished_at = timezone.now()
-        job.save(update_fields=["status", "error", "finished_at", "updated_at"])
-        job.project.status = Project.Status.FAILED
-        job.project.save(update_fields=["status", "updated_at"])
+        _fail_draft(job, str(exc))
         raise
+    finally:
+        shutil.rmtree(_chunk_dir(job_id), ignore_errors=True)
+
+
+@shared_task
+def chunks_failed_task(request, exc, traceback, job_id: str) -> None:
+    # Errback of the chord: a failed or revoked chunk means concat_chunks_task never runs.
+    shutil.rmtree(_chunk_dir(job_id), ignore_errors=True)
+    job = Job.objects.get(id=job_id)
+    if job.status in (Job.Status.PENDING, Job.Status.RUNNING):
+        _fail_draft(job, f"Chunk render failed: {exc}")
+
+
+def _chunk_dir(job_id: str) -> Path:
+    return Path(settings.MEDIA_ROOT) / "drafts" / f".chunks-{job_id}"
+
+
+def dispatch_chunked_draft(job: Job, asset: Asset, metadata: dict, finish: dict) -> bool:
+    """Hand a long first draft to the render_chunks queue as a chord, without waiting for it.
+
+    Returns False when the draft should be rendered in-process instead: chunking is not in celery mode, the
+    source is too short to split, or the render is a stream copy or already cached.
+    """
+    ranges = chunk_plan(float(metadata.get("duration_sec", 0.0)))
+    if settings.RENDER_CHUNK_MODE != "celery" or not ranges:
+        return False
+    project = job.project
+    normalized, normalize_info = normalized_source(asset, metadata)
+    timeline = finish["timeline"]
+    plan, render_info = draft_render_info(normalized, timeline, project, FULL, normalized_metadata(asset, normalized))
+    if plan.video == COPY or get_render_cache().fetch(render_info["cache_key"], Path(finish["draft_path"])):
+        return False
+
+    workdir = _chunk_dir(str(job.id))
+    workdir.mkdir(parents=True, exist_ok=True)
+    chunk_ids = [str(uuid.uuid4()) for _ in ranges]
+    header = [
+        render_chunk_task.s(
+            str(normalized),
+            str(workdir / f"chunk_{index:05d}.mp4"),
+            timeline.get("overlays", []),
+            str(project.id),
+            start,
+            end,
+            FULL.name,
+            str(job.id),
+        ).set(task_id=chunk_id)
+        for index, ((start, end), chunk_id) in enumerate(zip(ranges, chunk_ids, strict=True))
+    ]
+    render_info = {
+        **render_info,
+        "mode": "chunked",
+        "chunk_mode": "celery",
+        "chunks": len(ranges),
+        "cache": "miss",
+        "normalize": normalize_info,
+    }
+    callback = concat_chunks_task.s(str(job.id), str(normalized), {**finish, "render_info": render_info})
+    # Recorded before dispatch so a cancel can revoke chunks that have not started yet.
+    job.result_json = {"chunk_task_ids": chunk_ids}
+    job.save(update_fields=["result_json", "updated_at"])
+    chord(header)(callback.on_error(chunks_failed_task.s(str(job.id))))
+    return True
+
+
+def revoke_chunk_tasks(job: Job) -> None:
+    # Chunks already encoding are stopped by their supervisor once the job is cancelled; queued ones are revoked.
+    chunk_ids = (job.result_json or {}).get("chunk_task_ids") or []
+    if not chunk_ids:
+        return
+    try:
+        current_app.control.revoke(chunk_ids)
+    except Exception:
+        # The job is already cancelled; chunks that still run stop at their first progress poll.
+        logger.exception("revoking chunks of job %s failed", job.id)
+
+
+@shared_task
+def version_filmstrip_task(version_id: str) -> dict:
+    version = DraftVersion.objects.get(id=version_id)
+    version.filmstrip_json = version_filmstrip(version)
+    version.save(update_fields=["filmstrip_json", "updated_at"])
+    return version.filmstrip_json
+
+
+def queue_version_filmstrip(version: DraftVersion) -> None:
+    try:
+        version_filmstrip_task.delay(str(version.id))
+    except Exception:
+        # Thumbnails are optional; a version without them is still saved and rendered.
+        logger.exception("filmstrip for draft version %s was not queued", version.id)
+
+
+def _approved_draft(project: Project) -> Draft:
+    draft = project.draft
+    if not draft.approved:
+        raise PipelineError("Draft must be approved before export")
+    if not draft.draft_video:
+        raise PipelineError("Draft video missing")
+    return draft
+
+
+def _export_profile(job: Job) -> EncoderProfile:
+    try:
+        return get_encoder_profile(job.payload_json.get("profile") or settings.DEFAULT_EXPORT_PROFILE)
+    except ValueError as exc:
+        raise PipelineError(str(exc)) from exc
 
 
 @shared_task(bind=True)
+@_tracked
 def export_final_task(self, job_id: str) -> dict:
     job = Job.objects.get(id=job_id)
+    if job.status == Job.Status.CANCELLED:
+        return job.result_json
     job.status = Job.Status.RUNNING
     job.started_at = timezone.now()
     job.task_id = self.request.id
@@ -135,25 +377,22 @@ def export_final_task(self, job_id: str) -> dict:
 
     try:
         project = job.project
-        draft = project.draft
-        if not draft.approved:
-            raise PipelineError("Draft must be approved before export")
-        if not draft.draft_video:
-            raise PipelineError("Draft video missing")
-
-        src = Path(draft.draft_video.path)
+        draft = _approved_draft(project)
+        profile = _export_profile(job)
         dst = Path(settings.MEDIA_ROOT) / "exports" / f"{project.id}-{uuid.uuid4().hex[:6]}.mp4"
-        dst.parent.mkdir(parents=True, exist_ok=True)
 
-        # Export currently mirrors draft; hook for future final rendering differences.
-        dst.write_bytes(src.read_bytes())
+        # Drafts are encoded for turnaround; the deliverable is re-encoded from the normalized source per profile.
+        source_asset = source_video_asset(project)
+        normalized, _ = normalized_source(source_asset)
+        metadata = normalized_metadata(source_asset, normalized)
+        encode_info = render_export(normalized, dst, draft.timeline_json, project, profile, metadata=metadata)
 
         rel = dst.relative_to(Path(settings.MEDIA_ROOT))
         artifact = ExportArtifact.objects.create(
             project=project,
             draft=draft,
             file=str(rel),
-            metadata_json={"timeline": draft.timeline_json},
+            metadata_json={"timeline": draft.timeline_json, **encode_info},
         )
 
         project.status = Project.Status.EXPORTED
@@ -164,6 +403,149 @@ def export_final_task(self, job_id: str) -> dict:
         job.result_json = {"export_id": str(artifact.id), "file": artifact.file.url}
         job.save(update_fields=["status", "finished_at", "result_json", "updated_at"])
         return job.result_json
+    except JobCancelled as exc:
+        return _mark_cancelled(job, exc)
+    except Exception as exc:
+        job.status = Job.Status.FAILED
+        job.error = str(exc)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at", "updated_at"])
+        raise
+
+
+@shared_task(bind=True)
+@_tracked
+def export_batch_task(self, job_id: str) -> dict:
+    job = Job.objects.get(id=job_id)
+    if job.status == Job.Status.CANCELLED:
+        return job.result_json
+    job.status = Job.Status.RUNNING
+    job.started_at = timezone.now()
+    job.task_id = self.request.id
+    job.save(update_fields=["status", "started_at", "task_id"])
+
+    try:
+        project = job.project
+        draft = _approved_draft(project)
+        profile = _export_profile(job)
+        try:
+            formats = [get_output_format(name) for name in job.payload_json.get("formats") or OUTPUT_FORMATS]
+        except ValueError as exc:
+            raise PipelineError(str(exc)) from exc
+
+        # Every aspect ratio is laid out from the original upload, not the 9:16-padded intermediate.
+        source_asset = source_video_asset(project)
+        src = Path(source_asset.file.path)
+        batch_id = uuid.uuid4().hex[:6]
+        outputs = {
+            fmt: Path(settings.MEDIA_ROOT) / "exports" / f"{project.id}-{batch_id}-{fmt.name}.mp4"
+            for fmt in dict.fromkeys(formats)
+        }
+        encode_info = render_batch_export(
+            src, outputs, draft.timeline_json, project, profile, metadata=source_asset.metadata
+        )
+
+        exports = []
+        for fmt, dst in outputs.items():
+            artifact = ExportArtifact.objects.create(
+                project=project,
+                draft=draft,
+                file=str(dst.relative_to(Path(settings.MEDIA_ROOT))),
+                metadata_json={
+                    "timeline": draft.timeline_json,
+                    "profile": profile.name,
+                    "encoder": encode_info["encoder"],
+                    "batch_id": batch_id,
+                    "batch_encode_time_sec": encode_info["encode_time_sec"],
+                    "timing": encode_info["timing"],
+                    **encode_info["formats"][fmt.name],
+                },
+            )
+            exports.append(
+                {
+                    "format": fmt.label,
+                    "export_id": str(artifact.id),
+                    "file": artifact.file.url,
+                    "estimated_encode_time_sec": encode_info["formats"][fmt.name]["estimated_encode_time_sec"],
+                }
+            )
+
+        project.status = Project.Status.EXPORTED
+        project.save(update_fields=["status", "updated_at"])
+
+        job.status = Job.Status.SUCCESS
+        job.finished_at = timezone.now()
+        job.result_json = {"batch_id": batch_id, "encode_time_sec": encode_info["encode_time_sec"], "exports": exports}
+        job.save(update_fields=["status", "finished_at", "result_json", "updated_at"])
+        return job.result_json
+    except JobCancelled as exc:
+        return _mark_cancelled(job, exc)
+    except Exception as exc:
+        job.status = Job.Status.FAILED
+        job.error = str(exc)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at", "updated_at"])
+        raise
+
+
+def _wait_for_ingest(asset: Asset) -> None:
+    # Ingest produces exactly what the first draft needs; waiting for it beats normalizing the same upload twice.
+    pending = Job.objects.filter(
+        job_type=Job.JobType.INGEST_SOURCE,
+        payload_json__asset_id=str(asset.id),
+        status__in=[Job.Status.PENDING, Job.Status.RUNNING],
+    )
+    deadline = time.monotonic() + settings.INGEST_WAIT_SECONDS
+    while pending.exists() and time.monotonic() < deadline:
+        raise_if_cancelled("ingest finished")
+        time.sleep(INGEST_POLL_SECONDS)
+
+
+def ingest_job_for(asset: Asset) -> Job | None:
+    return (
+        Job.objects.filter(job_type=Job.JobType.INGEST_SOURCE, payload_json__asset_id=str(asset.id))
+        .order_by("-created_at")
+        .first()
+    )
+
+
+def start_ingest(asset: Asset) -> Job:
+    job = Job.objects.create(
+        project=asset.project, job_type=Job.JobType.INGEST_SOURCE, payload_json={"asset_id": str(asset.id)}
+    )
+    try:
+        task = ingest_source_task.delay(str(job.id))
+    except Exception:
+        # Eager mode runs ingest inside the upload request; the failure is on the job and draft generation
+        # redoes whatever is missing, so the upload itself still succeeds.
+        logger.exception("ingest of asset %s failed", asset.id)
+        return job
+    if not job.task_id:
+        job.task_id = getattr(task, "id", "") or ""
+        job.save(update_fields=["task_id", "updated_at"])
+    return job
+
+
+@shared_task(bind=True)
+@_tracked
+def ingest_source_task(self, job_id: str) -> dict:
+    job = Job.objects.get(id=job_id)
+    if job.status == Job.Status.CANCELLED:
+        return job.result_json
+    job.status = Job.Status.RUNNING
+    job.started_at = timezone.now()
+    job.task_id = self.request.id
+    job.save(update_fields=["status", "started_at", "task_id"])
+
+    try:
+        asset = Asset.objects.get(id=job.payload_json["asset_id"])
+        job.result_json = ingest_source(asset)
+        job.status = Job.Status.SUCCESS
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "finished_at", "result_json", "updated_at"])
+        return job.result_json
+    except JobCancelled as exc:
+        return _mark_cancelled(job, exc)
     except Exception as exc:
         job.status = Job.Status.FAILED
         job.error = str(exc)
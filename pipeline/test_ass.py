@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+from pipeline.ass import ass_color, compile_ass
+from pipeline.services import _overlay_filters, _text_x_expr
+
+
+def _overlays() -> list[dict]:
+    return [
+        {
+            "type": "headline",
+            "start_sec": 0.0,
+            "end_sec": 2.5,
+            "text": "BIG {HEADLINE}",
+            "position": {"x": 0.5, "y": 0.2, "anchor": "center"},
+            "style": {"font_size": 96, "color": "white", "box": "black@0.55", "box_border": 22},
+        },
+        {
+            "type": "cta",
+            "start_sec": 2.5,
+            "end_sec": 4.0,
+            "text": "PLAY NOW",
+            "position": {"x": 0.5, "y": 0.9, "anchor": "center"},
+            "style": {"font_size": 82, "color": "white", "bg": "#00A86B"},
+        },
+        {"type": "logo", "start_sec": 0.0, "end_sec": 4.0, "asset_ref": "x", "position": {}, "style": {}},
+    ]
+
+
+def test_ass_color_converts_to_bgr_with_inverted_alpha():
+    assert ass_color("white") == "&H00FFFFFF"
+    assert ass_color("#00A86B") == "&H006BA800"
+    assert ass_color("black@0.55") == "&H73000000"
+
+
+def test_compile_ass_emits_styles_boxes_and_timing():
+    script = compile_ass(_overlays(), 1080, 1920, "#00A86B")
+    dialogues = [line for line in script.splitlines() if line.startswith("Dialogue:")]
+    assert "PlayResX: 1080" in script
+    assert len(dialogues) == 3
+    assert "0:00:00.00,0:00:02.50" in dialogues[0]
+    assert "\\{HEADLINE\\}" in dialogues[0]
+    assert "\\p1" in dialogues[1]
+
+
+def test_ass_backend_uses_single_text_filter():
+    filters, current = _overlay_filters(_overlays(), [], "#00A86B", ass_path=Path("/tmp/overlays.ass"))
+    assert len(filters) == 2
+    assert "ass=filename='/tmp/overlays.ass'" in filters[1]
+    assert not any("drawtext" in row for row in filters)
+    assert current == "v1"
+
+
+def _callout(text: str, x: float, anchor: str) -> dict:
+    return {
+        "type": "callout",
+        "start_sec": 0.0,
+        "end_sec": 1.0,
+        "text": text,
+        "position": {"x": x, "y": 0.5, "anchor": anchor},
+        "style": {},
+    }
+
+
+def test_ass_and_drawtext_place_text_at_the_same_left_edge():
+    width, text_w = 1080, 300
+    overlays = [_callout("L", 0.1, "left"), _callout("R", 0.9, "right"), _callout("C", 0.5, "center")]
+    script = compile_ass(overlays, width, 1920, "#00A86B")
+    styles = [line.removeprefix("Style: ").split(",") for line in script.splitlines() if line.startswith("Style: s")]
+    alignments = {fields[0]: int(fields[18]) for fields in styles}
+    dialogues = [line for line in script.splitlines() if line.startswith("Dialogue:")]
+    for overlay, line in zip(overlays, dialogues, strict=True):
+        name = line.split(",")[3]
+        pos_x = int(re.search(r"\\pos\((\d+),", line).group(1))
+        ass_left = {4: pos_x, 5: pos_x - text_w / 2, 6: pos_x - text_w}[alignments[name]]
+        drawtext_left = eval(_text_x_expr(overlay["position"]), {}, {"w": width, "text_w": text_w})
+        assert abs(ass_left - drawtext_left) <= 1
+
+
+def test_off_center_text_is_drawn_by_drawtext_under_the_ass_backend():
+    overlays = [_callout("CENTER", 0.5, "center"), _callout("OFFSET", 0.2, "center")]
+    script = compile_ass(overlays, 1080, 1920, "#00A86B")
+    assert "CENTER" in script
+    assert "OFFSET" not in script
+    filters, _ = _overlay_filters(overlays, [], "#00A86B", ass_path=Path("/tmp/overlays.ass"))
+    drawn = [row for row in filters if "drawtext" in row]
+    assert len(drawn) == 1
+    assert "OFFSET" in drawn[0]
+    assert "x=(w-text_w)*0.2" in drawn[0]
+
+
+def test_invalid_primary_color_falls_back_to_brand_green():
+    cta = {**_overlays()[1], "style": {"font_size": 82, "color": "white"}}
+    for primary in ("not-a-colour", "#12", "#zzzzzz\\N"):
+        box = next(line for line in compile_ass([cta], 1080, 1920, primary).splitlines() if "\\p1" in line)
+        assert "\\1c&H6BA800&" in box
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pipeline import services
+from pipeline.audio import SAMPLE_RATE, analyze_samples, audio_envelopes, silent_analysis
+from pipeline.context import save_video_context
+from projects.models import Asset, Project
+
+
+def _clicks(bpm: float, seconds: float = 12.0, start: float = 0.25) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    track = 0.02 * rng.standard_normal(int(SAMPLE_RATE * seconds))
+    length = int(0.03 * SAMPLE_RATE)
+    click = 0.8 * np.exp(-np.arange(length) / 300) * np.sin(2 * np.pi * 1000 * np.arange(length) / SAMPLE_RATE)
+    for at in np.arange(start, seconds - 0.1, 60.0 / bpm):
+        index = int(at * SAMPLE_RATE)
+        track[index : index + length] += click
+    return track.astype(np.float32)
+
+
+@pytest.mark.parametrize("bpm", [90, 120, 150])
+def test_click_track_tempo_beats_and_onsets(bpm):
+    analysis = analyze_samples(_clicks(bpm))
+
+    assert analysis["tempo_bpm"] == pytest.approx(bpm, rel=0.02)
+    spacing = np.diff(analysis["beats"])
+    assert spacing.mean() == pytest.approx(60.0 / bpm, rel=0.02)
+    # Every click lands within a hop or two of a detected onset.
+    clicks = np.arange(0.25, 11.9, 60.0 / bpm)
+    onsets = np.array(analysis["onsets"])
+    assert np.abs(onsets[None, :] - clicks[:, None]).min(axis=1).max() < 0.05
+    assert len(analysis["waveform"]) == 200
+    assert max(analysis["waveform"]) > 150
+
+
+def test_envelopes_match_across_block_edges():
+    samples = _clicks(128)
+    whole = audio_envelopes(samples)
+    blocked = audio_envelopes(samples, block_hops=37)
+    assert all(np.allclose(a, b, atol=1e-5) for a, b in zip(whole, blocked, strict=True))
+
+
+def test_loudness_peak_and_silence():
+    track = 0.05 * np.sin(2 * np.pi * 220 * np.arange(SAMPLE_RATE * 10) / SAMPLE_RATE)
+    track[5 * SAMPLE_RATE : int(5.5 * SAMPLE_RATE)] *= 12
+    analysis = analyze_samples(track.astype(np.float32))
+
+    assert [peak["t"] for peak in analysis["loudness_peaks"]] == [pytest.approx(5.25, abs=0.3)]
+    assert analysis["tempo_bpm"] is None and analysis["beats"] == []
+
+    silent = silent_analysis()
+    assert (silent["beats"], silent["onsets"], silent["waveform"]) == ([], [], [])
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+def test_source_audio_cached_and_snaps_template_sections(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    settings.TARGET_WIDTH, settings.TARGET_HEIGHT, settings.TARGET_FPS = 180, 320, 15
+    (tmp_path / "assets").mkdir()
+    clip = tmp_path / "assets" / "beat.mp4"
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-f", "lavfi", "-i", "color=black:s=180x320:r=15:d=10",
+            "-f", "lavfi", "-i", "aevalsrc=0.8*sin(2*PI*1000*t)*lt(mod(t-0.1\\,0.5)\\,0.03):s=44100:d=10",
+            "-c:v", "libx264", "-c:a", "aac", "-shortest", str(clip),
+        ],
+        check=True,
+        capture_output=True,
+    )  # fmt: skip
+    project = Project.objects.create(name="beats")
+    asset = Asset.objects.create(project=project, asset_type=Asset.AssetType.SOURCE_VIDEO, file="assets/beat.mp4")
+    runs = []
+    real_run = services._run
+    monkeypatch.setattr(services, "_run", lambda cmd, **kwargs: runs.append(cmd) or real_run(cmd, **kwargs))
+
+    audio = services.source_audio(asset)
+    decodes = len(runs)
+    assert services.source_audio(asset) == audio
+    assert len(runs) == decodes
+
+    assert audio["tempo_bpm"] == pytest.approx(120, rel=0.02)
+    save_video_context(project, asset, services.probe_asset(asset), audio=audio)
+    project.refresh_from_db()
+    overlays = services.build_timeline(project, 10.0, {"headline": "H", "benefit": "B", "cta": "C"})["overlays"]
+    # 0.22 and 0.74 of ten seconds fall between beats; the sections start on the nearest beat instead.
+    starts = [overlay["start_sec"] for overlay in overlays[1:3]]
+    assert starts != [2.2, 7.4]
+    for start in starts:
+        assert min(abs(start - beat) for beat in audio["beats"]) < 0.01
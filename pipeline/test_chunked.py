@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from rest_framework.test import APIClient
+
+from pipeline import services, tasks
+from projects.models import Asset, Draft, Job, Project
+
+
+def _timeline() -> dict:
+    return {
+        "overlays": [
+            {
+                "type": "callout",
+                "start_sec": 3.0,
+                "end_sec": 5.0,
+                "text": "HELLO",
+                "position": {"x": 0.5, "y": 0.5},
+                "style": {},
+            }
+        ]
+    }
+
+
+@pytest.fixture
+def chunk_settings(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    settings.RENDER_SEGMENT_SECONDS = 2
+    settings.RENDER_CHUNK_SECONDS = 4
+    settings.RENDER_CACHE_MAX_BYTES = 0
+    (tmp_path / "src.mp4").write_bytes(b"normalized")
+    return settings
+
+
+@pytest.mark.django_db
+def test_local_chunks_render_clipped_ranges_then_concat(tmp_path: Path, chunk_settings, monkeypatch):
+    chunk_settings.RENDER_CHUNK_MODE = "local"
+    project = Project.objects.create(name="chunks")
+    chunk_settings.RENDER_CHUNK_TIMEOUT_SECONDS = 120
+    commands, concats, timeouts = [], [], []
+    monkeypatch.setattr(
+        services, "_run", lambda cmd, timeout_sec=None: commands.append(cmd) or timeouts.append(timeout_sec)
+    )
+    monkeypatch.setattr(services, "concat_chunks", lambda chunks, audio, dst: concats.append(chunks))
+
+    info = services.render_draft_video(tmp_path / "src.mp4", tmp_path / "out.mp4", _timeline(), project, None, 10.0)
+
+    assert info["mode"] == "chunked"
+    assert info["chunks"] == 3
+    # Each chunk's ffmpeg is killed once it runs past RENDER_CHUNK_TIMEOUT_SECONDS.
+    assert timeouts == [120] * 3
+    seeks = sorted(cmd[cmd.index("-ss") + 1] for cmd in commands)
+    assert seeks == ["0.000000", "4.000000", "8.000000"]
+    assert all("-an" in cmd for cmd in commands)
+    graphs = {cmd[cmd.index("-ss") + 1]: cmd[cmd.index("-filter_complex") + 1] for cmd in commands}
+    assert "between(t,3.0,4.0)" in graphs["0.000000"]
+    assert "between(t,0.0,1.0)" in graphs["4.000000"]
+    assert "drawtext" not in graphs["8.000000"]
+    assert [chunk.name for chunk in concats[0]] == ["chunk_00000.mp4", "chunk_00001.mp4", "chunk_00002.mp4"]
+
+
+def _chunk_job(project: Project) -> Job:
+    Draft.objects.create(project=project, timeline_json=_timeline())
+    return Job.objects.create(project=project, job_type=Job.JobType.GENERATE_DRAFT, status=Job.Status.RUNNING)
+
+
+@pytest.mark.django_db
+def test_celery_chunks_finish_the_job_from_the_chord_callback(tmp_path: Path, chunk_settings, monkeypatch):
+    chunk_settings.RENDER_CHUNK_MODE = "celery"
+    project = Project.objects.create(name="chunks")
+    asset = Asset.objects.create(project=project, asset_type=Asset.AssetType.SOURCE_VIDEO, file="src.mp4")
+    job = _chunk_job(project)
+    rendered = []
+
+    def fake_chunk(src, dst, overlays, project_obj, start, end, tier):
+        rendered.append((start, end, len(overlays)))
+        dst.write_bytes(b"chunk")
+
+    def fake_concat(chunks, audio_src, dst):
+        dst.write_bytes(b"".join(chunk.read_bytes() for chunk in chunks))
+
+    monkeypatch.setattr(tasks, "normalized_source", lambda asset, metadata: (tmp_path / "src.mp4", {"mode": "stored"}))
+    monkeypatch.setattr(tasks, "normalized_metadata", lambda asset, path: None)
+    monkeypatch.setattr(tasks, "render_chunk", fake_chunk)
+    monkeypatch.setattr(services, "_concat_segments", fake_concat)
+    finish = {
+        "draft_path": str(tmp_path / "drafts" / "draft.mp4"),
+        "source_sha256": "a" * 64,
+        "timeline": _timeline(),
+        "plan_json": {},
+        "quality_report": {"critical": [], "warnings": []},
+        "plan_source": "initial_generate",
+    }
+
+    # The dispatching task returns straight away; nothing blocks on the chord's result.
+    assert tasks.dispatch_chunked_draft(job, asset, {"duration_sec": 10.0}, finish)
+
+    job.refresh_from_db()
+    draft = Draft.objects.get(project=project)
+    assert job.status == Job.Status.SUCCESS
+    assert (draft.status, draft.draft_video.name) == (Draft.Status.READY, "drafts/draft.mp4")
+    assert sorted(rendered) == [(0.0, 4.0, 1), (4.0, 8.0, 1), (8.0, 10.0, 1)]
+    assert (tmp_path / "drafts" / "draft.mp4").read_bytes() == b"chunk" * 3
+    render_json = draft.versions.first().render_json
+    assert (render_json["chunk_mode"], render_json["chunks"]) == ("celery", 3)
+    assert not (tmp_path / "drafts" / f".chunks-{job.id}").exists()
+
+    # Requests that wait on the render keep their chunks local instead of blocking on a chord.
+    monkeypatch.setattr(services, "_run", lambda cmd, timeout_sec=None: None)
+    monkeypatch.setattr(services, "concat_chunks", lambda chunks, audio, dst: None)
+    info = services.render_draft_video(tmp_path / "src.mp4", tmp_path / "out.mp4", _timeline(), project, None, 10.0)
+    assert (info["mode"], info["chunk_mode"]) == ("chunked", "local")
+
+
+@pytest.mark.django_db
+def test_cancel_revokes_queued_chunks_and_failed_chord_fails_the_job(tmp_path: Path, chunk_settings, monkeypatch):
+    project = Project.objects.create(name="chunks")
+    job = _chunk_job(project)
+    job.result_json = {"chunk_task_ids": ["c1", "c2"]}
+    job.save(update_fields=["result_json"])
+    revoked = []
+    monkeypatch.setattr(tasks, "current_app", SimpleNamespace(control=SimpleNamespace(revoke=revoked.append)))
+
+    assert APIClient().post(f"/api/v1/jobs/{job.id}/cancel").status_code == 202
+    assert revoked == [["c1", "c2"]]
+
+    # The chord errback cleans up after revoked chunks without turning the cancel into a failure.
+    (tmp_path / "drafts" / f".chunks-{job.id}").mkdir(parents=True)
+    tasks.chunks_failed_task(None, RuntimeError("revoked"), None, str(job.id))
+    job.refresh_from_db()
+    assert job.status == Job.Status.CANCELLED
+    assert not (tmp_path / "drafts" / f".chunks-{job.id}").exists()
+
+    other = _chunk_job(Project.objects.create(name="broken"))
+    tasks.chunks_failed_task(None, RuntimeError("ffmpeg died"), None, str(other.id))
+    other.refresh_from_db()
+    assert (other.status, other.error) == (Job.Status.FAILED, "Chunk render failed: ffmpeg died")
+    assert Draft.objects.get(project=other.project).status == Draft.Status.FAILED
+
+
+def test_short_sources_are_not_chunked(chunk_settings):
+    chunk_settings.RENDER_CHUNK_MODE = "local"
+    assert services.chunk_plan(3.0) == []
+    chunk_settings.RENDER_CHUNK_MODE = "off"
+    assert services.chunk_plan(60.0) == []
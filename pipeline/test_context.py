@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from pipeline.context import build_video_context, save_video_context
+import numpy as np
+import pytest
+
+from pipeline.context import build_video_context, detect_cuts, frame_deltas, motion_field, save_video_context
+from pipeline.frames import FrameStore
 from projects.models import Asset, Project, VideoContext
 
 
@@ -32,3 +36,78 @@ def test_save_video_context_upserts(db):
     assert row1.id == row2.id
     assert VideoContext.objects.count() == 1
     assert float(row2.context_json["video"]["duration_sec"]) == 20.0
+
+
+def _shots(fps: float, shots: list[tuple[float, int]], size: tuple[int, int] = (48, 27)) -> FrameStore:
+    # Each shot pans a textured pattern of its own brightness, so frames keep changing between cuts too.
+    rng = np.random.default_rng(7)
+    frames = []
+    for duration, level in shots:
+        texture = rng.integers(0, 60, size=(size[0], size[1] * 4), dtype=np.uint8)
+        for i in range(round(duration * fps)):
+            frames.append(texture[:, i % (size[1] * 3) :][:, : size[1]] + level)
+    return FrameStore(np.stack(frames), fps)
+
+
+def test_scenes_follow_detected_cuts(db):
+    project = Project.objects.create(name="cuts")
+    frames = _shots(10.0, [(2.0, 20), (2.3, 150), (3.7, 80)])
+
+    context = build_video_context(project, {"duration_sec": 8.0}, frames)
+
+    assert context["cuts"] == [2.0, 4.3]
+    assert [(s["start_sec"], s["end_sec"]) for s in context["scenes"]] == [(0.0, 2.0), (2.0, 4.3), (4.3, 8.0)]
+    assert context["recommended_windows"]["hook"]["end_sec"] == 2.0
+    # 0.74 * 8s is 5.92s, too far from the 4.3s cut to move onto it.
+    assert context["recommended_windows"]["cta"]["start_sec"] == 5.92
+
+
+def test_steady_motion_and_fades_are_not_cuts():
+    panning = _shots(10.0, [(6.0, 40)])
+    assert detect_cuts(frame_deltas(panning), panning.fps) == []
+
+    ramp = np.linspace(0, 190, 60)[:, None, None]
+    flat = np.broadcast_to(ramp, (60, 48, 27)).astype(np.uint8)
+    textured = (panning.frames[:60] * (ramp / 190 + 0.2)).astype(np.uint8)
+    for fade in (flat, textured):
+        assert detect_cuts(frame_deltas(FrameStore(fade, 10.0)), 10.0) == []
+
+
+def test_deltas_match_across_batch_edges():
+    frames = _shots(10.0, [(3.0, 20), (3.0, 150)])
+    assert np.allclose(frame_deltas(frames), frame_deltas(frames, batch_size=7))
+
+
+def _pan(dx: float, phase: float, frames: int = 30) -> np.ndarray:
+    yy, xx = np.mgrid[0:64, 0:160]
+    shots = []
+    for i in range(frames):
+        x = xx - dx * i
+        shots.append(128 + 50 * np.sin(x / 6.0 + phase) * np.cos(yy / 9.0 - phase) + 30 * np.sin((x + yy) / 13.0))
+    return np.stack(shots)[:, :, :48].clip(0, 255).astype(np.uint8)
+
+
+def test_ad_score_ranks_scenes_by_motion(db):
+    project = Project.objects.create(name="motion")
+    # A dim still shot, a slow pan to the right, then a brighter, flatter fast pan to the left.
+    clip = np.concatenate([_pan(0.0, 0.0) // 3, _pan(1.0, 2.0), _pan(-3.0, 4.0) // 2 + 127])
+    frames = FrameStore(clip, 10.0)
+
+    scenes = build_video_context(project, {"duration_sec": 9.0}, frames)["scenes"]
+
+    assert [s["start_sec"] for s in scenes] == [0.0, 3.0, 6.0]
+    assert [s["motion_direction"] for s in scenes] == ["static", "right", "left"]
+    assert scenes[1]["motion_vector"][0] == pytest.approx(1.0, abs=0.1)
+    scores = [s["ad_score"] for s in scenes]
+    assert scores[0] == 0.0 < scores[1] < scores[2] <= 1.0
+    assert scenes[0]["summary"] == "Low motion segment"
+
+    unanalyzed = build_video_context(project, {"duration_sec": 9.0})["scenes"]
+    assert [(s["ad_score"], s["summary"]) for s in unanalyzed] == [(None, "Unanalyzed segment")]
+
+
+def test_motion_field_matches_across_batch_edges():
+    frames = FrameStore(_pan(2.0, 0.0), 10.0)
+    energy, flow = motion_field(frames)
+    batched_energy, batched_flow = motion_field(frames, batch_size=4)
+    assert np.allclose(energy, batched_energy) and np.allclose(flow, batched_flow, atol=1e-5)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+from rest_framework.test import APIClient
+
+from pipeline import services, tasks
+from pipeline.media_store import SPRITE_INDEX, get_media_store
+from pipeline.render_cache import file_digest
+from projects.models import Draft, Project
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+
+
+def _jpeg_size(path: Path) -> tuple[int, int]:
+    data = path.read_bytes()
+    pos = 2
+    while pos < len(data):
+        marker, length = data[pos + 1], int.from_bytes(data[pos + 2 : pos + 4], "big")
+        if marker in (0xC0, 0xC2):
+            return int.from_bytes(data[pos + 7 : pos + 9], "big"), int.from_bytes(data[pos + 5 : pos + 7], "big")
+        pos += 2 + length
+    raise AssertionError("no SOF marker")
+
+
+@needs_ffmpeg
+@pytest.mark.django_db
+def test_draft_filmstrip_is_one_decode_cached_by_content(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    settings.FILMSTRIP_INTERVAL_SECONDS = 1.0
+    settings.FILMSTRIP_TILE_WIDTH = 48
+    video = tmp_path / "drafts" / "draft.mp4"
+    video.parent.mkdir()
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=s=180x320:r=30:d=2.5", "-c:v", "libx264", str(video)],
+        check=True,
+        capture_output=True,
+    )
+    project = Project.objects.create(name="strip")
+    draft = Draft.objects.create(project=project, draft_video="drafts/draft.mp4", status=Draft.Status.READY)
+    runs = []
+    real_run = services._run
+    monkeypatch.setattr(services, "_run", lambda cmd, timeout_sec=None: runs.append(cmd) or real_run(cmd, timeout_sec))
+
+    queued = []
+    monkeypatch.setattr(tasks.version_filmstrip_task, "delay", queued.append)
+
+    # Saving the version only queues its filmstrip; the decode happens in the background task.
+    version = services.persist_draft_version(draft, {"overlays": []}, source="initial_generate")
+    assert (version.filmstrip_json, queued, runs) == ({}, [str(version.id)], [])
+    index = tasks.version_filmstrip_task(str(version.id))
+    version.refresh_from_db()
+
+    assert version.filmstrip_json == index
+    assert len(runs) == 1
+    assert (index["count"], index["columns"], index["rows"]) == (3, 3, 1)
+    assert [tile["t"] for tile in index["tiles"]] == [0.0, 1.0, 2.0]
+    assert index["tiles"][2] == {"t": 2.0, "x": 96, "y": 0}
+    assert _jpeg_size(tmp_path / index["sprite"]) == (3 * 48, index["tile_height"])
+    assert index["tile_height"] == 86
+    assert _jpeg_size(tmp_path / index["poster"])[1] == services.POSTER_HEIGHT
+    assert index["digest"] == file_digest(video)
+    assert get_media_store().fetch_json(file_digest(video), SPRITE_INDEX) == {
+        key: value for key, value in index.items() if key != "digest"
+    }
+
+    # Re-saving a version over the same bytes reuses the stored artifacts.
+    tasks.version_filmstrip_task(str(services.persist_draft_version(draft, {"overlays": []}, "api_overlay_edit").id))
+    assert len(runs) == 1
+
+    versions = APIClient().get(f"/api/v1/projects/{project.id}/draft/versions").json()
+    assert [v["version"] for v in versions] == [2, 1]
+    assert APIClient().get(f"/api/v1/projects/{project.id}/draft").json()["filmstrip"] == index
+
+    # Nothing references a draft video's digest, so the store may evict its sprite. The stale index is not
+    # served; reading it queues a rebuild instead.
+    get_media_store().release(index["digest"])
+    assert not (tmp_path / index["sprite"]).exists()
+    assert APIClient().get(f"/api/v1/projects/{project.id}/draft").json()["filmstrip"] == {}
+    assert queued[-1] == str(draft.versions.first().id)
+    tasks.version_filmstrip_task(queued[-1])
+    assert APIClient().get(f"/api/v1/projects/{project.id}/draft").json()["filmstrip"] == index
+
+
+@pytest.mark.django_db
+def test_draft_without_video_has_no_filmstrip():
+    draft = Draft.objects.create(project=Project.objects.create(name="empty"))
+    assert services.persist_draft_version(draft, {"overlays": []}, source="initial_generate").filmstrip_json == {}
+    assert services.filmstrip_layout(0.4, 1080, 1920)["count"] == 1
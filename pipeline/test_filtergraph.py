@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from pipeline.filtergraph import optimize
+from pipeline.segments import clip_overlays
+from pipeline.services import _overlay_filters, _overlay_graph
+
+
+def _logo(start: float, end: float, ref: str = "logo-1", x: float = 0.04) -> dict:
+    return {
+        "type": "logo",
+        "start_sec": start,
+        "end_sec": end,
+        "asset_ref": ref,
+        "position": {"x": x, "y": 0.04},
+        "style": {"scale_width": 220},
+    }
+
+
+def _cta(start: float, end: float) -> dict:
+    return {
+        "type": "cta",
+        "start_sec": start,
+        "end_sec": end,
+        "text": "PLAY NOW",
+        "position": {"x": 0.5, "y": 0.9, "anchor": "center"},
+        "style": {"font_size": 54},
+    }
+
+
+def test_cta_box_and_text_merge_into_one_chain():
+    graph = optimize(_overlay_graph([_cta(1.0, 3.0)], [], "#00A86B"))
+    kinds = [node["kind"] for node in graph.describe()]
+    assert kinds == ["base", "cta_box+text"]
+    merged = graph.render()[1]
+    assert merged.startswith("[v0]drawbox=")
+    assert ",drawtext=" in merged
+    assert merged.count("enable='between(t,1.0,3.0)'") == 2
+
+
+def test_identical_logo_scales_are_deduplicated():
+    graph = optimize(_overlay_graph([_logo(0, 2), _logo(1, 3, x=0.9)], ["logo-1"], "#00A86B"))
+    scales = [line for line in graph.render() if line.startswith("[1:v]")]
+    assert scales == ["[1:v]scale=220:-1,split=2[lg1][lg2]"]
+    assert "dedupe_logo_scales" in graph.stats()["passes"]
+
+
+def test_windows_without_frames_are_dropped():
+    overlays = [_cta(3.0, 2.0), _cta(5.0, 6.0), _logo(0, 1)]
+    graph = optimize(_overlay_graph(overlays, ["logo-1"], "#00A86B"), duration_sec=5.0)
+    assert [node["kind"] for node in graph.describe()] == ["base", "logo_scale", "logo"]
+    assert graph.render()[-1].startswith("[v0][lg5]overlay")
+
+
+def test_overlay_ending_on_a_segment_boundary_keeps_its_last_frame():
+    # A full render draws 0.5-2.0 on the frame at t=2.0, which is the first frame of the segment from 2.0.
+    clipped = clip_overlays([_cta(0.5, 2.0)], 2.0, 4.0)
+    assert (clipped[0]["start_sec"], clipped[0]["end_sec"]) == (0.0, 0.0)
+    filters, _ = _overlay_filters(clipped, [], "#00A86B", duration_sec=2.0)
+    assert len(filters) == 2
+    assert "enable='between(t,0.0,0.0)'" in filters[-1]
+
+
+def test_time_split_bypasses_frames_outside_every_window():
+    graph = optimize(_overlay_graph([_logo(1.0, 2.0)], ["logo-1"], "#00A86B"), duration_sec=4.0, time_split=True)
+    rendered = graph.render()
+    assert rendered[-1].endswith(f"concat=n=3:v=1:a=0[{graph.output}]")
+    kinds = [node["kind"] for node in graph.describe()]
+    assert kinds.count("interval") == 3
+    # Only the 1s-2s interval carries the overlay, and there it no longer needs an enable expression.
+    overlays = [line for line in rendered if "overlay=" in line]
+    assert len(overlays) == 2
+    assert "trim=start=1.0:end=2.0" in ";".join(rendered)
+    assert "enable" not in overlays[0]
+    assert "enable='between(t,0.0,0.0)'" in overlays[1]
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+from rest_framework.test import APIClient
+
+from pipeline import services
+from projects.models import Asset, Draft, Project
+
+
+def _ffmpeg(*args: str) -> None:
+    subprocess.run(["ffmpeg", "-v", "error", "-y", *args], check=True, capture_output=True)
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+def test_frame_preview_renders_one_seeked_frame_and_caches_it(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    settings.TARGET_WIDTH, settings.TARGET_HEIGHT, settings.TARGET_FPS = 180, 320, 15
+    (tmp_path / "assets").mkdir()
+    _ffmpeg("-f", "lavfi", "-i", "testsrc=s=180x320:r=15:d=3", "-c:v", "libx264", str(tmp_path / "assets/src.mp4"))
+    _ffmpeg("-f", "lavfi", "-i", "color=red:s=32x32", "-frames:v", "1", str(tmp_path / "assets/logo.png"))
+    project = Project.objects.create(name="frame")
+    source = Asset.objects.create(project=project, asset_type=Asset.AssetType.SOURCE_VIDEO, file="assets/src.mp4")
+    logo = Asset.objects.create(project=project, asset_type=Asset.AssetType.LOGO, file="assets/logo.png")
+    logo_overlay = {
+        "id": "ovl_logo",
+        "type": "logo",
+        "asset_ref": str(logo.id),
+        "start_sec": 0.0,
+        "end_sec": 1.0,
+        "position": {"x": 0.5, "y": 0.5},
+        "style": {"scale_width": 64},
+    }
+    Draft.objects.create(project=project, timeline_json={"overlays": [logo_overlay]})
+    runs = []
+    real_run = services._run
+    monkeypatch.setattr(services, "_run", lambda cmd, timeout_sec=None: runs.append(cmd) or real_run(cmd, timeout_sec))
+    client = APIClient()
+    url = f"/api/v1/projects/{project.id}/draft/frame"
+
+    # Before ingest has stored the intermediate the preview refuses rather than normalizing on the request.
+    assert client.post(url, {"t": 0.5}, format="json").status_code == 409
+    assert runs == []
+    services.normalized_source(source)
+    runs.clear()
+
+    with_logo = client.post(url, {"t": 0.5}, format="json")
+    assert with_logo.status_code == 200
+    assert with_logo["Content-Type"] == "image/jpeg"
+    assert with_logo.content[:2] == b"\xff\xd8"
+    frame_cmd = runs[-1]
+    assert frame_cmd[frame_cmd.index("-ss") + 1] == "0.500000"
+    assert frame_cmd.index("-ss") < frame_cmd.index("-i")
+    renders = len(runs)
+
+    # Same source, time and visible overlays: served from the cache, even with an off-screen overlay added.
+    assert client.post(url, {"t": 0.5}, format="json").content == with_logo.content
+    off_screen = {**logo_overlay, "id": "ovl_late", "start_sec": 2.0, "end_sec": 3.0}
+    assert services.render_frame(project, [logo_overlay, off_screen], 0.5) == with_logo.content
+    assert len(runs) == renders
+
+    # An explicit, unsaved overlay list replaces the draft's: here it drops the logo.
+    plain = client.post(url, {"t": 0.5, "overlays": []}, format="json")
+    assert plain.status_code == 200 and plain.content != with_logo.content
+    png = client.post(url, {"t": 0.5, "format": "png"}, format="json")
+    assert (png["Content-Type"], png.content[:4]) == ("image/png", b"\x89PNG")
+
+    assert client.post(url, {"t": 5.0}, format="json").status_code == 400
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pipeline import services
+from pipeline.frames import FrameStore, frame_layout
+from projects.models import Asset, Project
+
+
+def test_frame_store_views_share_the_mapping(tmp_path: Path):
+    layout = frame_layout(1080, 1920, 8, fps=4)
+    assert (layout["width"], layout["height"]) == (8, 14)
+    raw = tmp_path / "frames.raw"
+    np.arange(10, dtype=np.uint8).repeat(8 * 14).tofile(raw)
+
+    frames = FrameStore.open(raw, layout)
+
+    assert frames.frames.shape == (10, 14, 8)
+    assert frames.duration_sec == 2.5
+    window = frames.window(0.5, 1.5)
+    assert window[:, 0, 0].tolist() == [2, 3, 4, 5]
+    assert np.shares_memory(window, frames.frames)
+    batches = list(frames.batches(size=4, overlap=1))
+    assert [(start, len(batch)) for start, batch in batches] == [(0, 4), (3, 5), (7, 3)]
+    assert all(np.shares_memory(batch, frames.frames) for _, batch in batches)
+    assert frames.sample(0.0, 2.5, 3)[:, 0, 0].tolist() == [0, 4, 9]
+    assert frames.index_at(99.0) == 9
+
+    empty = tmp_path / "empty.raw"
+    empty.touch()
+    assert len(FrameStore.open(empty, layout)) == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+def test_source_frames_decoded_once_per_upload(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    settings.TARGET_WIDTH, settings.TARGET_HEIGHT, settings.TARGET_FPS = 180, 320, 15
+    settings.ANALYSIS_FPS, settings.ANALYSIS_FRAME_WIDTH = 5, 32
+    (tmp_path / "assets").mkdir()
+    clip = tmp_path / "assets" / "a.mp4"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "color=white:s=180x320:r=15:d=2", str(clip)],
+        check=True,
+        capture_output=True,
+    )
+    project = Project.objects.create(name="frames")
+    asset = Asset.objects.create(project=project, asset_type=Asset.AssetType.SOURCE_VIDEO, file="assets/a.mp4")
+    runs = []
+    real_run = services._run
+    monkeypatch.setattr(services, "_run", lambda cmd, **kwargs: runs.append(cmd) or real_run(cmd, **kwargs))
+
+    frames = services.source_frames(asset)
+    decodes = len(runs)
+    again = services.source_frames(asset)
+
+    assert frames.frames.shape == (10, 56, 32)
+    assert isinstance(again.frames, np.memmap)
+    assert len(runs) == decodes
+    assert runs[-1][-1] == "pipe:1"
+    assert int(again.window(0.0, 2.0).min()) > 230
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+
+from pipeline import services, tasks
+from pipeline.media_store import (
+    AUDIO,
+    FRAMES,
+    NORMALIZED,
+    PROBE,
+    PROXY,
+    SPRITE,
+    SPRITE_INDEX,
+    THUMBNAIL,
+    get_media_store,
+)
+from pipeline.supervisor import JobCancelled, track_job
+from projects.models import Asset, Job, Project, StoredMedia, VideoContext
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+def test_upload_starts_ingest_that_prepares_the_first_draft(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    settings.TARGET_WIDTH, settings.TARGET_HEIGHT, settings.TARGET_FPS = 180, 320, 15
+    clip = tmp_path / "clip.mp4"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=s=360x640:r=30:d=1", "-c:v", "libx264", str(clip)],
+        check=True,
+        capture_output=True,
+    )
+    project = Project.objects.create(name="ingest")
+    upload = SimpleUploadedFile("clip.mp4", clip.read_bytes(), content_type="video/mp4")
+
+    response = APIClient().post(
+        f"/api/v1/projects/{project.id}/assets", {"asset_type": "source_video", "file": upload}, format="multipart"
+    )
+
+    assert response.status_code == 201
+    job = Job.objects.get(id=response.json()["ingest_job_id"])
+    assert job.status == Job.Status.SUCCESS, job.error
+    assert list(job.result_json["stages"]) == [
+        "probe",
+        "hash",
+        "normalize",
+        "proxy",
+        "thumbnails",
+        "frames",
+        "audio",
+        "context",
+    ]
+    assert job.progress_json["stage"] == "context"
+    asset = Asset.objects.get(id=response.json()["id"])
+    assert asset.sha256 == job.result_json["digest"]
+    assert set(StoredMedia.objects.values_list("kind", flat=True)) == {
+        NORMALIZED,
+        PROBE,
+        PROXY,
+        THUMBNAIL,
+        SPRITE,
+        SPRITE_INDEX,
+        FRAMES,
+        AUDIO,
+    }
+    for key in ("proxy", "poster", "sprite"):
+        assert (tmp_path / job.result_json[key]).stat().st_size > 0
+    assert VideoContext.objects.get(project=project).source_asset_id == asset.id
+    # Draft generation finds the intermediate ingest stored rather than normalizing again.
+    assert services.normalized_source(asset)[1]["mode"] == "stored"
+    assert services.stored_proxy(asset)[1]["width"] == 90
+    assert len(services.source_frames(asset)) == job.result_json["frames"]
+    assert abs(job.result_json["frames"] - settings.ANALYSIS_FPS) <= 1
+
+
+@pytest.mark.django_db
+def test_draft_generation_waits_for_running_ingest(settings, monkeypatch):
+    settings.INGEST_WAIT_SECONDS = 60
+    project = Project.objects.create(name="wait")
+    asset = Asset.objects.create(project=project, asset_type=Asset.AssetType.SOURCE_VIDEO)
+    ingest = Job.objects.create(
+        project=project,
+        job_type=Job.JobType.INGEST_SOURCE,
+        status=Job.Status.RUNNING,
+        payload_json={"asset_id": str(asset.id)},
+    )
+    sleeps = []
+
+    def finish_ingest(seconds):
+        sleeps.append(seconds)
+        Job.objects.filter(id=ingest.id).update(status=Job.Status.SUCCESS)
+
+    monkeypatch.setattr(tasks.time, "sleep", finish_ingest)
+    tasks._wait_for_ingest(asset)
+    assert sleeps == [tasks.INGEST_POLL_SECONDS]
+
+    Job.objects.filter(id=ingest.id).update(status=Job.Status.RUNNING)
+    waiting = Job.objects.create(project=project, job_type=Job.JobType.GENERATE_DRAFT, status=Job.Status.CANCELLED)
+    with track_job(waiting.id), pytest.raises(JobCancelled):
+        tasks._wait_for_ingest(asset)
+
+
+@pytest.mark.django_db
+def test_failed_ingest_does_not_fail_the_upload(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    monkeypatch.setattr(services, "ffprobe_metadata", lambda path: {"duration_sec": 2.0})
+
+    def broken(asset, metadata=None):
+        raise services.PipelineError("ffmpeg exploded")
+
+    monkeypatch.setattr(services, "normalized_source", broken)
+    project = Project.objects.create(name="broken")
+    upload = SimpleUploadedFile("clip.mp4", b"not really a video", content_type="video/mp4")
+
+    response = APIClient().post(
+        f"/api/v1/projects/{project.id}/assets", {"asset_type": "source_video", "file": upload}, format="multipart"
+    )
+
+    assert response.status_code == 201
+    job = Job.objects.get(id=response.json()["ingest_job_id"])
+    assert (job.status, job.error) == (Job.Status.FAILED, "ffmpeg exploded")
+    assert not get_media_store().fetch(Asset.objects.get().sha256, NORMALIZED, services.normalize_variant())
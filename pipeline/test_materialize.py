@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from pipeline import materialize as mat
+
+
+def _source(tmp_path: Path) -> Path:
+    src = tmp_path / "src.mp4"
+    src.write_bytes(b"frame" * 300_000)
+    return src
+
+
+def test_materialize_prefers_hardlink(tmp_path: Path):
+    src = _source(tmp_path)
+    result = mat.materialize(src, tmp_path / "out" / "dst.mp4")
+
+    assert result.method == "hardlink"
+    assert (tmp_path / "out" / "dst.mp4").stat().st_ino == src.stat().st_ino
+    assert result.size_bytes == src.stat().st_size
+
+
+def test_materialize_without_link_copies_and_checksums(tmp_path: Path):
+    src = _source(tmp_path)
+    dst = tmp_path / "dst.mp4"
+    result = mat.materialize(src, dst, checksum=True, allow_link=False)
+
+    assert result.method in {"reflink", "kernel_copy"}
+    assert dst.stat().st_ino != src.stat().st_ino
+    assert result.sha256 == hashlib.sha256(src.read_bytes()).hexdigest()
+
+
+def test_materialize_falls_back_to_streaming_copy(tmp_path: Path, monkeypatch):
+    def unsupported(src: Path, dst: Path) -> None:
+        raise OSError(18, "Invalid cross-device link")
+
+    for name in ("_hardlink", "_reflink", "_kernel_copy"):
+        monkeypatch.setattr(mat, name, unsupported)
+    monkeypatch.setattr(mat, "CHUNK_BYTES", 4096)
+    src = _source(tmp_path)
+    dst = tmp_path / "dst.mp4"
+    dst.write_bytes(b"stale")
+    result = mat.materialize(src, dst)
+
+    assert result.method == "stream_copy"
+    assert dst.read_bytes() == src.read_bytes()
+    assert result.sha256 == hashlib.sha256(src.read_bytes()).hexdigest()
+    assert not list(tmp_path.glob(".*.tmp"))
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from pipeline import services, tasks
+from pipeline.media_store import NORMALIZED, PROBE, get_media_store
+from projects.models import Asset, Draft, Job, Project, StoredMedia
+
+
+def _source(tmp_path: Path, name: str, content: bytes) -> Asset:
+    upload = tmp_path / "assets" / name
+    upload.parent.mkdir(exist_ok=True)
+    upload.write_bytes(content)
+    project = Project.objects.create(name=name)
+    return Asset.objects.create(project=project, asset_type=Asset.AssetType.SOURCE_VIDEO, file=f"assets/{name}")
+
+
+@pytest.fixture
+def fake_normalize(monkeypatch):
+    calls = []
+
+    def normalize(src, dst, metadata=None, plan=None):
+        calls.append(src)
+        dst.write_bytes(b"normalized:" + src.read_bytes())
+        return {"mode": "encode"}
+
+    monkeypatch.setattr(services, "normalize_video", normalize)
+    return calls
+
+
+@pytest.mark.django_db
+def test_identical_uploads_share_one_normalized_intermediate(tmp_path: Path, settings, fake_normalize):
+    settings.MEDIA_ROOT = tmp_path
+    first = _source(tmp_path, "a.mp4", b"same bytes")
+    second = _source(tmp_path, "b.mp4", b"same bytes")
+
+    path_a, info_a = services.normalized_source(first)
+    path_b, info_b = services.normalized_source(second)
+
+    assert path_a == path_b
+    assert len(fake_normalize) == 1
+    assert info_a["mode"] == "encode"
+    assert info_b == {"mode": "stored", "digest": first.sha256}
+    assert get_media_store().refcount(first.sha256) == 2
+
+
+@pytest.mark.django_db
+def test_new_upload_never_reuses_previous_intermediate(tmp_path: Path, settings, fake_normalize):
+    settings.MEDIA_ROOT = tmp_path
+    old = _source(tmp_path, "old.mp4", b"old take")
+    old_path, _ = services.normalized_source(old)
+    new = Asset.objects.create(project=old.project, asset_type=Asset.AssetType.SOURCE_VIDEO, file="assets/new.mp4")
+    (tmp_path / "assets" / "new.mp4").write_bytes(b"new take")
+
+    new_path, _ = services.normalized_source(new)
+
+    assert new_path != old_path
+    assert new_path.read_bytes() == b"normalized:new take"
+
+
+@pytest.mark.django_db
+def test_quota_evicts_unreferenced_then_least_recently_used(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    settings.MEDIA_STORE_MAX_BYTES = 0
+    store = get_media_store()
+    project = Project.objects.create(name="quota")
+    Asset.objects.create(project=project, asset_type=Asset.AssetType.SOURCE_VIDEO, sha256="a" * 64)
+    Draft.objects.create(project=project, source_sha256="b" * 64)
+    for digest in ("a" * 64, "b" * 64, "c" * 64):
+        store.store_json(digest, PROBE, {"pad": "x" * 100})
+    store.fetch("b" * 64, PROBE)
+
+    store.max_bytes = StoredMedia.objects.get(digest="c" * 64).size_bytes * 2
+    store.store_json("d" * 64, PROBE, {"pad": "y" * 100})
+
+    remaining = set(StoredMedia.objects.values_list("digest", flat=True))
+    # The unreferenced entry goes first, then the referenced entry used longest ago; the new entry stays.
+    assert remaining == {"b" * 64, "d" * 64}
+    assert not store.path("c" * 64, PROBE).exists()
+    assert store.stats()["entries"] == 2
+
+
+@pytest.mark.django_db
+def test_failed_write_leaves_no_partial_entry(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    store = get_media_store()
+    with pytest.raises(RuntimeError), store.write("e" * 64, NORMALIZED) as staging:
+        staging.write_bytes(b"half an encode")
+        raise RuntimeError("encoder died")
+
+    assert store.fetch("e" * 64, NORMALIZED) is None
+    assert os.listdir(store.path("e" * 64, NORMALIZED).parent) == []
+    assert not StoredMedia.objects.exists()
+
+
+@pytest.mark.django_db
+def test_release_drops_entries_once_nothing_references_them(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    store = get_media_store()
+    asset = _source(tmp_path, "gone.mp4", b"bytes")
+    digest = services.asset_digest(asset)
+    store.store_json(digest, PROBE, {"duration_sec": 1.0})
+
+    assert store.release(digest) == 0
+    asset.delete()
+    assert store.fetch_json(digest, PROBE) is None
+    assert not StoredMedia.objects.exists()
+
+
+@pytest.mark.django_db
+def test_deleting_a_project_keeps_media_another_project_shares(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    store = get_media_store()
+    first = _source(tmp_path, "one.mp4", b"same bytes")
+    second = _source(tmp_path, "two.mp4", b"same bytes")
+    digest = services.asset_digest(first)
+    services.asset_digest(second)
+    Draft.objects.create(project=first.project, source_sha256=digest)
+    store.store_json(digest, PROBE, {"duration_sec": 1.0})
+
+    first.project.delete()
+    assert store.fetch_json(digest, PROBE) == {"duration_sec": 1.0}
+    second.project.delete()
+    assert store.fetch_json(digest, PROBE) is None
+
+
+@pytest.mark.django_db
+def test_quota_never_evicts_what_a_running_ingest_stored(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    store = get_media_store()
+    asset = _source(tmp_path, "ingesting.mp4", b"bytes")
+    digest = services.asset_digest(asset)
+    job = Job.objects.create(
+        project=asset.project,
+        job_type=Job.JobType.INGEST_SOURCE,
+        status=Job.Status.RUNNING,
+        payload_json={"asset_id": str(asset.id)},
+    )
+    store.store_json(digest, PROBE, {"pad": "x" * 100})
+    store.max_bytes = 1
+
+    # The stale unreferenced entry goes; the ingest's own probe survives even over quota.
+    store.store_json("f" * 64, PROBE, {"pad": "y" * 100})
+    store.store_json("0" * 64, PROBE, {"pad": "z" * 100})
+    assert set(StoredMedia.objects.values_list("digest", flat=True)) == {digest, "0" * 64}
+
+    job.status = Job.Status.SUCCESS
+    job.save(update_fields=["status"])
+    store.store_json("1" * 64, PROBE, {"pad": "z" * 100})
+    assert set(StoredMedia.objects.values_list("digest", flat=True)) == {"1" * 64}
+
+
+@pytest.mark.django_db
+def test_quota_never_evicts_the_source_of_a_running_draft_job(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    store = get_media_store()
+    asset = _source(tmp_path, "drafting.mp4", b"bytes")
+    digest = services.asset_digest(asset)
+    store.store_json(digest, PROBE, {"pad": "x" * 100})
+    # Chunk workers of a chord read the stored intermediate by path long after the job was dispatched.
+    Job.objects.create(project=asset.project, job_type=Job.JobType.GENERATE_DRAFT, status=Job.Status.RUNNING)
+    store.max_bytes = 1
+
+    store.store_json("2" * 64, PROBE, {"pad": "y" * 100})
+    assert store.fetch_json(digest, PROBE) == {"pad": "x" * 100}
+
+
+@pytest.fixture
+def fake_probe(monkeypatch):
+    calls = []
+
+    def probe(path):
+        calls.append(path)
+        return {"duration_sec": 4.0 if "over" not in path.name else 999.0, "width": 1080, "height": 1920}
+
+    monkeypatch.setattr(services, "ffprobe_metadata", probe)
+    return calls
+
+
+@pytest.mark.django_db
+def test_probe_results_reused_until_file_changes(tmp_path: Path, settings, fake_probe):
+    settings.MEDIA_ROOT = tmp_path
+    asset = _source(tmp_path, "src.mp4", b"bytes")
+
+    assert services.probe_asset(asset)["duration_sec"] == 4.0
+    assert services.probe_asset(Asset.objects.get(id=asset.id))["width"] == 1080
+    assert len(fake_probe) == 1
+
+    # Another asset record for the same file hits the stored probe rather than Asset.metadata.
+    twin = Asset.objects.create(project=asset.project, asset_type=asset.asset_type, file=asset.file.name)
+    services.probe_asset(twin)
+    assert len(fake_probe) == 1
+
+    path = Path(asset.file.path)
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+    services.probe_asset(Asset.objects.get(id=asset.id))
+    assert len(fake_probe) == 2
+
+
+@pytest.mark.django_db
+def test_over_length_source_rejected_before_normalizing(tmp_path: Path, settings, fake_probe, fake_normalize):
+    settings.MEDIA_ROOT = tmp_path
+    asset = _source(tmp_path, "over.mp4", b"long")
+    job = Job.objects.create(project=asset.project, job_type=Job.JobType.GENERATE_DRAFT)
+
+    with pytest.raises(services.InputRejected):
+        tasks.generate_draft_task.apply(args=[str(job.id)])
+
+    job.refresh_from_db()
+    assert job.status == Job.Status.FAILED
+    assert job.error.startswith("Input too long")
+    assert fake_normalize == []
+    assert len(fake_probe) == 1
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+import pytest
+
+from pipeline import services
+from pipeline.mp4meta import Mp4ParseError, read_mp4_metadata, read_partial_mp4_metadata
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+
+
+def _encode(path: Path, video: str, args: list[str], audio: str | None = None) -> Path:
+    cmd = ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", video]
+    if audio:
+        cmd += ["-f", "lavfi", "-i", audio]
+    subprocess.run([*cmd, *args, str(path)], check=True, capture_output=True)
+    return path
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize(
+    ("name", "video", "args", "expected"),
+    [
+        (
+            "plain.mp4",
+            "testsrc=s=360x640:r=30:d=1",
+            ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-b:a", "96k"],
+            {"width": 360, "height": 640, "fps": "30/1", "pix_fmt": "yuv420p", "audio_codec": "aac"},
+        ),
+        (
+            "ntsc.mov",
+            "testsrc=s=320x240:r=30000/1001:d=1",
+            ["-c:v", "libx264", "-pix_fmt", "yuvj420p", "-vf", "setsar=4/3", "-c:a", "aac"],
+            {"fps": "30000/1001", "pix_fmt": "yuvj420p", "sample_aspect_ratio": "4:3", "audio_codec": "aac"},
+        ),
+        (
+            "high10.mp4",
+            "testsrc=s=320x240:r=25:d=1",
+            ["-c:v", "libx264", "-pix_fmt", "yuv422p10le", "-an"],
+            {"fps": "25/1", "pix_fmt": "yuv422p10le", "audio_codec": None, "audio_bit_rate": 0},
+        ),
+    ],
+)
+def test_header_fields_match_encode(tmp_path: Path, name, video, args, expected):
+    path = _encode(tmp_path / name, video, args, audio="sine=d=1")
+    metadata = read_mp4_metadata(path)
+    assert metadata["codec_name"] == "h264"
+    assert metadata["format_name"] == "mov,mp4,m4a,3gp,3g2,mj2"
+    assert metadata["duration_sec"] == pytest.approx(1.0, abs=0.05)
+    assert metadata["rotation"] == 0
+    assert {key: metadata[key] for key in expected} == expected
+    if metadata["audio_codec"]:
+        assert 32_000 < metadata["audio_bit_rate"] < 200_000
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("degrees", [90, -90, 180])
+def test_rotation_follows_display_matrix(tmp_path: Path, degrees):
+    plain = _encode(tmp_path / "plain.mp4", "testsrc=s=64x64:d=0.2", ["-c:v", "libx264"])
+    rotated = tmp_path / "rotated.mp4"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-display_rotation", str(degrees), "-i", str(plain), "-c", "copy", str(rotated)],
+        check=True,
+        capture_output=True,
+    )
+    assert read_mp4_metadata(rotated)["rotation"] == (-180 if degrees == 180 else degrees)
+
+
+@needs_ffmpeg
+def test_payload_is_skipped_not_read(tmp_path: Path):
+    encoded = _encode(tmp_path / "small.mp4", "testsrc=s=64x64:d=0.5", ["-c:v", "libx264"])
+    boxes, data = {}, encoded.read_bytes()
+    pos = 0
+    while pos < len(data):
+        size, kind = int.from_bytes(data[pos : pos + 4], "big"), data[pos + 4 : pos + 8]
+        boxes[kind] = data[pos : pos + size]
+        pos += size
+    # A sparse 4 GiB mdat between ftyp and moov: reading it would take seconds, skipping it is free.
+    large = tmp_path / "large.mp4"
+    payload = 4 << 30
+    with large.open("wb") as fh:
+        fh.write(boxes[b"ftyp"])
+        fh.write((1).to_bytes(4, "big") + b"mdat" + (payload + 16).to_bytes(8, "big"))
+        fh.seek(payload, 1)
+        fh.write(boxes[b"moov"])
+
+    started = time.monotonic()
+    assert read_mp4_metadata(large)["width"] == 64
+    assert time.monotonic() - started < 1
+
+
+def test_non_mp4_inputs_are_rejected(tmp_path: Path):
+    matroska = tmp_path / "clip.mkv"
+    matroska.write_bytes(b"\x1aE\xdf\xa3" + b"\x00" * 64)
+    fragmented = tmp_path / "frag.mp4"
+    fragmented.write_bytes(b"\x00\x00\x00\x10ftypisom\x00\x00\x02\x00" + b"\x00\x00\x00\x08moof")
+    for path in (matroska, fragmented, tmp_path / "empty.mp4"):
+        path.touch()
+        with pytest.raises(Mp4ParseError):
+            read_mp4_metadata(path)
+
+
+def test_probe_falls_back_to_ffprobe(tmp_path: Path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(services, "_ffprobe", lambda path: calls.append(path) or {"duration_sec": 1.0})
+    clip = tmp_path / "clip.mkv"
+    clip.write_bytes(b"\x1aE\xdf\xa3" + b"\x00" * 64)
+
+    assert services.ffprobe_metadata(clip) == {"duration_sec": 1.0}
+    assert calls == [clip]
+
+
+@needs_ffmpeg
+def test_partial_read_waits_for_moov(tmp_path: Path):
+    encoded = _encode(tmp_path / "tail.mp4", "testsrc=s=64x64:d=0.5", ["-c:v", "libx264"])
+    data = encoded.read_bytes()
+    moov = data.index(b"moov") - 4
+    partial = tmp_path / "partial.mp4"
+    # ffmpeg writes moov last by default, so every prefix short of the whole file has no metadata yet.
+    for cut in (64, moov, moov + 16):
+        partial.write_bytes(data[:cut])
+        assert read_partial_mp4_metadata(partial) is None
+    partial.write_bytes(data)
+    assert read_partial_mp4_metadata(partial)["width"] == 64
+
+    partial.write_bytes(b"GIF89a" + b"\x00" * 64)
+    with pytest.raises(Mp4ParseError):
+        read_partial_mp4_metadata(partial)
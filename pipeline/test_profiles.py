@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from pipeline import services, tasks
+from pipeline.media_store import NORMALIZED, get_media_store
+from pipeline.profiles import (
+    FULL,
+    OUTPUT_FORMATS,
+    PROXY,
+    get_encoder_profile,
+    get_output_format,
+    get_render_tier,
+)
+from pipeline.services import _overlay_filters
+from projects.models import Asset, Draft, ExportArtifact, Job, Project
+
+
+def _overlays() -> list[dict]:
+    return [
+        {
+            "type": "headline",
+            "start_sec": 0.0,
+            "end_sec": 2.0,
+            "text": "HELLO",
+            "position": {"x": 0.5, "y": 0.2, "anchor": "center"},
+            "style": {"font_size": 96, "box_border": 22},
+        },
+        {
+            "type": "logo",
+            "start_sec": 0.0,
+            "end_sec": 2.0,
+            "asset_ref": "logo-1",
+            "position": {"x": 0.04, "y": 0.04},
+            "style": {"scale_width": 220},
+        },
+    ]
+
+
+def test_proxy_tier_renders_quarter_area_with_scaled_styles(settings):
+    settings.TARGET_WIDTH = 1080
+    settings.TARGET_HEIGHT = 1920
+    filters, _ = _overlay_filters(_overlays(), ["logo-1"], "#00A86B", tier=PROXY)
+    graph = ";".join(filters)
+    assert filters[0].startswith("[0:v]scale=540:960")
+    assert "fontsize=48" in graph
+    assert "boxborderw=11" in graph
+    assert "scale=110:-1" in graph
+
+
+def test_full_tier_keeps_target_resolution():
+    filters, _ = _overlay_filters(_overlays(), ["logo-1"], "#00A86B", tier=FULL)
+    assert filters[0] == "[0:v]format=yuv420p[v0]"
+    assert "fontsize=96" in ";".join(filters)
+
+
+def test_unknown_tier_rejected():
+    with pytest.raises(ValueError):
+        get_render_tier("cinema")
+
+
+def test_encoder_profiles_trade_preset_for_size():
+    high = get_encoder_profile("tiktok_high").video_args(30)
+    fast = get_encoder_profile("preview_fast").video_args(30)
+    assert high[high.index("-preset") + 1] == "slow"
+    assert fast[fast.index("-preset") + 1] == "veryfast"
+    assert high[high.index("-g") + 1] == "60"
+    assert int(high[high.index("-maxrate") + 1][:-1]) > int(fast[fast.index("-maxrate") + 1][:-1])
+    assert get_encoder_profile("reels_standard").container_args() == ["-movflags", "+faststart"]
+    with pytest.raises(ValueError):
+        get_encoder_profile("vhs")
+
+
+@pytest.mark.django_db
+def test_export_rerenders_from_normalized_source_with_profile(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    project = Project.objects.create(name="export")
+    draft = Draft.objects.create(
+        project=project,
+        approved=True,
+        draft_video="drafts/proxy.mp4",
+        render_tier=Draft.RenderTier.PROXY,
+        timeline_json={"overlays": _overlays()},
+    )
+    upload = tmp_path / "assets" / "src.mp4"
+    upload.parent.mkdir()
+    upload.write_bytes(b"source")
+    Asset.objects.create(
+        project=project, asset_type=Asset.AssetType.SOURCE_VIDEO, file="assets/src.mp4", sha256="ab" * 32
+    )
+    staged = tmp_path / "normalized.mp4"
+    staged.write_bytes(b"normalized")
+    normalized = get_media_store().put("ab" * 32, NORMALIZED, staged, services.normalize_variant())
+    rendered = []
+
+    def fake_export(src, dst, timeline, project_obj, profile, metadata=None):
+        rendered.append((src, profile.name))
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        dst.write_bytes(b"final")
+        return {"profile": profile.name, "encode_time_sec": 1.5, "size_bytes": 5}
+
+    monkeypatch.setattr(tasks, "render_export", fake_export)
+    monkeypatch.setattr(services, "ffprobe_metadata", lambda path: {"duration_sec": 4.0})
+    job = Job.objects.create(
+        project=project, job_type=Job.JobType.EXPORT_FINAL, payload_json={"profile": "tiktok_high"}
+    )
+    tasks.export_final_task.apply(args=[str(job.id)])
+
+    assert rendered == [(normalized, "tiktok_high")]
+    artifact = ExportArtifact.objects.get(draft=draft)
+    assert Path(artifact.file.path).read_bytes() == b"final"
+    assert artifact.metadata_json["encode_time_sec"] == 1.5
+    assert artifact.metadata_json["size_bytes"] == 5
+
+
+@pytest.mark.django_db
+def test_export_profile_args_replace_tier_encoding(tmp_path: Path):
+    project = Project.objects.create(name="args")
+    cmd = services._render_command(
+        tmp_path / "in.mp4", tmp_path / "out.mp4", [], project, profile=get_encoder_profile("reels_standard")
+    )
+    assert cmd[cmd.index("-preset") + 1] == "medium"
+    assert cmd[cmd.index("-b:a") + 1] == "128k"
+    assert "-force_key_frames" not in cmd
+    assert cmd[-3:-1] == ["-movflags", "+faststart"]
+
+
+def test_output_formats_keep_short_edge():
+    assert get_output_format("9x16").dimensions(1080, 1920) == (1080, 1920)
+    assert get_output_format("1x1").dimensions(1080, 1920) == (1080, 1080)
+    assert get_output_format("16x9").dimensions(1080, 1920) == (1920, 1080)
+
+
+@pytest.mark.django_db
+def test_batch_export_command_decodes_once_and_fans_out(tmp_path: Path, settings):
+    settings.TARGET_WIDTH = 1080
+    settings.TARGET_HEIGHT = 1920
+    project = Project.objects.create(name="batch")
+    outputs = [(fmt, tmp_path / f"{fmt.name}.mp4", None) for fmt in OUTPUT_FORMATS.values()]
+    cmd = services._batch_export_command(
+        tmp_path / "src.mp4", outputs, _overlays()[:1], project, get_encoder_profile("reels_standard")
+    )
+
+    assert cmd.count("-i") == 1
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert graph.startswith("[0:v]fps=30,split=3[s0][s1][s2]")
+    assert "crop=1080:1080" in graph
+    assert "pad=1920:1080" in graph
+    tails = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map" and cmd[i + 1].startswith("[")]
+    assert len(set(tails)) == 3
+    # Every deliverable carries only the first audio track, the one plan_audio planned.
+    audio = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map" and not cmd[i + 1].startswith("[")]
+    assert audio == ["0:a:0?"] * 3
+    assert [arg for arg in cmd if arg.endswith(".mp4")][1:] == [str(path) for _, path, _ in outputs]
+
+
+@pytest.mark.django_db
+def test_export_batch_task_writes_artifact_per_format(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    project = Project.objects.create(name="batch")
+    Asset.objects.create(project=project, asset_type=Asset.AssetType.SOURCE_VIDEO, file="uploads/src.mp4")
+    draft = Draft.objects.create(
+        project=project, approved=True, draft_video="drafts/d.mp4", timeline_json={"overlays": _overlays()}
+    )
+
+    def fake_batch(src, outputs, timeline, project_obj, profile, metadata=None):
+        formats = {}
+        for fmt, dst in outputs.items():
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            dst.write_bytes(fmt.name.encode())
+            formats[fmt.name] = {"format": fmt.label, "estimated_encode_time_sec": 0.5, "size_bytes": len(fmt.name)}
+        return {"encoder": {}, "encode_time_sec": 1.0, "timing": "apportioned_by_pixels", "formats": formats}
+
+    monkeypatch.setattr(tasks, "render_batch_export", fake_batch)
+    job = Job.objects.create(
+        project=project, job_type=Job.JobType.EXPORT_BATCH, payload_json={"formats": ["1x1", "16x9"]}
+    )
+    result = tasks.export_batch_task.apply(args=[str(job.id)]).get()
+
+    assert [row["format"] for row in result["exports"]] == ["1:1", "16:9"]
+    artifacts = ExportArtifact.objects.filter(draft=draft)
+    assert {a.metadata_json["format"] for a in artifacts} == {"1:1", "16:9"}
+    assert {a.metadata_json["batch_encode_time_sec"] for a in artifacts} == {1.0}
+    # Only the batch is timed; per-format shares are estimates and never pose as a measured encode time.
+    assert all("encode_time_sec" not in a.metadata_json for a in artifacts)
+    assert [row["estimated_encode_time_sec"] for row in result["exports"]] == [0.5, 0.5]
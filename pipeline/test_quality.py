@@ -1,8 +1,17 @@
 from __future__ import annotations
 
-from pipeline.services import build_safe_fallback_timeline
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from pipeline import services
+from pipeline.frames import FrameStore
 from pipeline.quality import validate_plan_quality
-from projects.models import Project
+from pipeline.services import build_safe_fallback_timeline, build_timeline, generate_copy
+from projects.models import Asset, Project
 
 
 def test_quality_gate_passes_valid_overlays():
@@ -79,3 +88,104 @@ def test_safe_fallback_timeline_has_required_overlays(db):
     assert timeline["template_id"] == "safe_fallback_v1"
     assert "headline" in kinds
     assert "cta" in kinds
+
+
+def _text_plan(box: str = "black@0.4", y: float = 0.5, text: str = "BEAT THE BOSS") -> list[dict]:
+    return [
+        {
+            "id": "h1",
+            "type": "headline",
+            "start_sec": 0.0,
+            "end_sec": 2.0,
+            "text": text,
+            "position": {"x": 0.5, "y": y, "anchor": "center"},
+            "style": {"font_size": 72, "color": "white", "box": box},
+        },
+        {
+            "id": "c1",
+            "type": "cta",
+            "start_sec": 2.0,
+            "end_sec": 4.0,
+            "text": "Play Free",
+            "position": {"x": 0.5, "y": 0.7, "anchor": "center"},
+            "style": {"font_size": 64, "color": "white", "bg": "#00A86B"},
+        },
+    ]
+
+
+def test_legibility_measured_on_sampled_frames():
+    bright = FrameStore(np.full((40, 170, 96), 250, dtype=np.uint8), 10.0)
+    dark = FrameStore(np.full((40, 170, 96), 10, dtype=np.uint8), 10.0)
+    busy = FrameStore(np.random.default_rng(3).integers(0, 256, (40, 170, 96), dtype=np.uint8), 10.0)
+
+    # White text without a box disappears into bright footage; the green CTA plate keeps its own contrast.
+    report = validate_plan_quality(_text_plan(box="black@0"), 4.0, bright)
+    assert report["critical"] == ["overlay[0] text is unreadable over the video (contrast 1.0:1)"]
+    assert [row["overlay"] for row in report["legibility"]] == [0, 1]
+
+    # The default translucent box lifts it to readable but still low contrast.
+    report = validate_plan_quality(_text_plan(), 4.0, bright)
+    assert report["critical"] == []
+    assert "overlay[0] text has low contrast over the video (1.7:1)" in report["warnings"]
+
+    assert validate_plan_quality(_text_plan(box="black@0"), 4.0, dark)["warnings"] == []
+    assert (
+        "overlay[0] text sits on a busy background"
+        in validate_plan_quality(_text_plan("black@0"), 4.0, busy)["warnings"]
+    )
+    assert "legibility" not in validate_plan_quality(_text_plan(), 4.0)
+
+
+def test_safe_zones_and_frame_bounds_checked_without_frames():
+    warnings = validate_plan_quality(_text_plan(y=0.95), 4.0)["warnings"]
+    assert warnings == ["overlay[0] is under the platform caption area"]
+
+    long_text = validate_plan_quality(_text_plan(text="X" * 40), 4.0)["warnings"]
+    assert long_text == ["overlay[0] text runs off the frame"]
+    # Landscape canvases have no vertical-app UI to avoid.
+    assert validate_plan_quality(_text_plan(y=0.95), 4.0, canvas=(1920, 1080))["warnings"] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+def test_plan_quality_reads_stored_analysis_frames(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    settings.TARGET_WIDTH, settings.TARGET_HEIGHT, settings.TARGET_FPS = 180, 320, 15
+    (tmp_path / "assets").mkdir()
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            "color=white:s=180x320:r=15:d=4",
+            str(tmp_path / "assets/w.mp4"),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    project = Project.objects.create(name="legible")
+    asset = Asset.objects.create(project=project, asset_type=Asset.AssetType.SOURCE_VIDEO, file="assets/w.mp4")
+    plan = {"overlays": _text_plan(box="black@0")}
+
+    # Before ingest there are no frames to sample, and the gate does not decode any.
+    assert "legibility" not in services.plan_quality(project, asset, plan, 4.0)
+    assert services.stored_frames(asset) is None
+
+    services.source_frames(asset)
+    report = services.plan_quality(project, asset, plan, 4.0)
+    assert report["critical"] == ["overlay[0] text is unreadable over the video (contrast 1.0:1)"]
+
+
+def test_default_templates_pass_cleanly(db):
+    project = Project.objects.create(name="defaults", prompt="Level up", template_id="hook_benefit_cta_v1")
+    copy = generate_copy(project.prompt, project.template_id)
+    for timeline in (build_timeline(project, 15.0, copy), build_safe_fallback_timeline(project, 15.0, copy)):
+        assert validate_plan_quality(timeline["overlays"], 15.0) == {"critical": [], "warnings": []}
+
+    # The longer "SOLUTION: ..." callout genuinely overflows a 1080px frame, but nothing sits under the app UI.
+    project.template_id = "problem_solution_cta_v1"
+    report = validate_plan_quality(build_timeline(project, 15.0, copy)["overlays"], 15.0)
+    assert report == {"critical": [], "warnings": ["overlay[1] text runs off the frame"]}
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from pipeline import services
+from pipeline.profiles import get_encoder_profile
+from pipeline.render_cache import RenderCache, render_cache_key
+from projects.models import Asset, Draft, DraftVersion, Project
+
+
+def _overlays(text: str = "PLAY NOW", overlay_id: str = "a") -> list[dict]:
+    return [
+        {
+            "id": overlay_id,
+            "type": "cta",
+            "start_sec": 1,
+            "end_sec": 2.0,
+            "text": text,
+            "position": {"x": 0.5, "y": 0.9, "anchor": "center"},
+            "style": {"font_size": 54},
+        }
+    ]
+
+
+def test_render_cache_key_ignores_ids_and_number_formatting():
+    key_a = render_cache_key("src", _overlays(overlay_id="a"), {}, {"preset": "veryfast"})
+    key_b = render_cache_key("src", _overlays(overlay_id="b"), {}, {"preset": "veryfast"})
+    assert key_a == key_b
+    assert key_a != render_cache_key("src", _overlays(text="INSTALL"), {}, {"preset": "veryfast"})
+    assert key_a != render_cache_key("src", _overlays(), {}, {"preset": "slow"})
+    assert key_a != render_cache_key("other", _overlays(), {}, {"preset": "veryfast"})
+
+
+def test_render_cache_evicts_least_recently_used(tmp_path: Path):
+    cache = RenderCache(tmp_path / "cache", max_bytes=25)
+    for idx, name in enumerate(["old", "mid", "new"]):
+        src = tmp_path / f"{name}.mp4"
+        src.write_bytes(b"x" * 10)
+        cache.store(name, src)
+        os.utime(tmp_path / "cache" / f"{name}.mp4", (1000 + idx, 1000 + idx))
+    cache.evict()
+
+    assert not (tmp_path / "cache" / "old.mp4").exists()
+    assert cache.fetch("new", tmp_path / "hit.mp4")
+    assert not cache.fetch("old", tmp_path / "miss.mp4")
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.django_db
+def test_render_draft_video_skips_ffmpeg_on_repeat(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    project = Project.objects.create(name="cache")
+    src = tmp_path / "normalized.mp4"
+    src.write_bytes(b"normalized-bytes")
+    calls = []
+
+    def fake_render(src_path, dst_path, timeline, project_obj, tier=None, plan=None):
+        calls.append(dst_path)
+        dst_path.parent.mkdir(parents=True, exist_ok=True)
+        dst_path.write_bytes(b"rendered")
+
+    monkeypatch.setattr(services, "render_with_overlays", fake_render)
+    first = services.render_draft_video(src, tmp_path / "drafts" / "a.mp4", {"overlays": _overlays()}, project)
+    second = services.render_draft_video(src, tmp_path / "drafts" / "b.mp4", {"overlays": _overlays()}, project)
+
+    assert first["cache"] == "miss"
+    assert second["cache"] == "hit"
+    assert len(calls) == 1
+    assert (tmp_path / "drafts" / "b.mp4").read_bytes() == b"rendered"
+
+
+@pytest.mark.django_db
+def test_render_export_checksums_while_materializing(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    project = Project.objects.create(name="export-cache")
+    src = tmp_path / "normalized.mp4"
+    src.write_bytes(b"normalized-bytes")
+    hashed = []
+    real_digest = services.file_digest
+
+    def fake_render(src_path, dst_path, *args, **kwargs):
+        dst_path.write_bytes(b"exported")
+
+    def counting_digest(path):
+        hashed.append(path.name)
+        return real_digest(path)
+
+    monkeypatch.setattr(services, "_render", fake_render)
+    monkeypatch.setattr(services, "file_digest", counting_digest)
+    profile = get_encoder_profile("reels_standard")
+    first = services.render_export(src, tmp_path / "exports" / "a.mp4", {"overlays": _overlays()}, project, profile)
+    second = services.render_export(src, tmp_path / "exports" / "b.mp4", {"overlays": _overlays()}, project, profile)
+
+    expected = hashlib.sha256(b"exported").hexdigest()
+    assert (first["cache"], second["cache"]) == ("miss", "hit")
+    assert first["sha256"] == second["sha256"] == expected
+    assert first["size_bytes"] == second["size_bytes"] == len(b"exported")
+    assert "a.mp4" not in hashed and "b.mp4" not in hashed
+
+
+@pytest.mark.django_db
+def test_incremental_render_needs_the_previous_encoder_settings(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    settings.RENDER_SEGMENT_SECONDS = 2.0
+    project = Project.objects.create(name="incremental", primary_color="#ff0000")
+    src = tmp_path / "normalized.mp4"
+    src.write_bytes(b"normalized-bytes")
+    rendered = []
+
+    def fake_render(src_path, dst_path, *args, **kwargs):
+        rendered.append(dst_path.name)
+        dst_path.parent.mkdir(parents=True, exist_ok=True)
+        dst_path.write_bytes(b"rendered")
+
+    monkeypatch.setattr(services, "render_with_overlays", fake_render)
+    monkeypatch.setattr(services, "_render", fake_render)
+    monkeypatch.setattr(services, "_split_segments", lambda path, workdir, duration, segment: [path] * 5)
+    monkeypatch.setattr(services, "_concat_segments", lambda segments, audio, dst: dst.write_bytes(b"joined"))
+    first = services.render_draft_video(src, tmp_path / "drafts/v1.mp4", {"overlays": _overlays()}, project)
+    draft = Draft.objects.create(project=project)
+    previous = DraftVersion.objects.create(
+        draft=draft,
+        version=1,
+        timeline_json={"overlays": _overlays()},
+        draft_video_name="drafts/v1.mp4",
+        render_json=first,
+    )
+    edited = {"overlays": _overlays(text="INSTALL")}
+
+    again = services.render_draft_video(src, tmp_path / "drafts/v2.mp4", edited, project, previous, 10.0)
+    assert (again["mode"], again["segments_rendered"]) == ("incremental", [0, 1])
+
+    # Only the colour changes, but every kept segment was drawn in the old one.
+    project.primary_color = "#00ff00"
+    rendered.clear()
+    recoloured = services.render_draft_video(src, tmp_path / "drafts/v3.mp4", edited, project, previous, 10.0)
+    assert recoloured["mode"] == "full"
+    assert rendered == ["v3.mp4"]
+
+
+@pytest.mark.django_db
+def test_fused_render_command_writes_normalized_and_draft_from_one_decode(tmp_path: Path, settings):
+    settings.TEXT_OVERLAY_BACKEND = "ass"
+    project = Project.objects.create(name="fused")
+    cmd = services._fused_render_command(
+        tmp_path / "src.mp4", tmp_path / "norm.mp4", tmp_path / "draft.mp4", [], project, tmp_path / "t.ass"
+    )
+
+    assert cmd.count("-i") == 1
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert "split=2[vnorm][vsrc]" in graph
+    assert "[vsrc]" in graph.split(";", 1)[1]
+    assert cmd.index(str(tmp_path / "norm.mp4")) < cmd.index(str(tmp_path / "draft.mp4"))
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+def test_fused_first_draft_is_found_by_later_renders(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    settings.TARGET_WIDTH, settings.TARGET_HEIGHT, settings.TARGET_FPS = 180, 320, 15
+    (tmp_path / "assets").mkdir()
+    # Off-size video and two MP3 tracks: normalize re-encodes both, unlike a render of the AAC intermediate.
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=s=200x300:r=15:d=2",
+            "-f", "lavfi", "-i", "sine=f=440:d=2", "-f", "lavfi", "-i", "sine=f=880:d=2",
+            "-map", "0", "-map", "1", "-map", "2", "-c:v", "libx264", "-c:a", "libmp3lame",
+            str(tmp_path / "assets/src.mp4"),
+        ],
+        check=True,
+        capture_output=True,
+    )  # fmt: skip
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            "color=red:s=32x32",
+            "-frames:v",
+            "1",
+            str(tmp_path / "logo.png"),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    project = Project.objects.create(name="fused-key")
+    asset = Asset.objects.create(project=project, asset_type=Asset.AssetType.SOURCE_VIDEO, file="assets/src.mp4")
+    logo = Asset.objects.create(project=project, asset_type=Asset.AssetType.LOGO, file="logo.png")
+    timeline = {
+        "overlays": [
+            {
+                "id": "logo",
+                "type": "logo",
+                "asset_ref": str(logo.id),
+                "start_sec": 0.0,
+                "end_sec": 2.0,
+                "position": {"x": 0.5, "y": 0.5},
+                "style": {"scale_width": 32},
+            }
+        ]
+    }
+
+    first = services.render_first_draft(
+        asset, tmp_path / "drafts/a.mp4", timeline, project, services.probe_asset(asset)
+    )
+    assert (first["mode"], first["normalize"]["audio"], first["stream_plan"]["audio"]) == ("fused", "encode", "copy")
+
+    normalized, _ = services.normalized_source(asset)
+    again = services.render_draft_video(
+        normalized,
+        tmp_path / "drafts/b.mp4",
+        timeline,
+        project,
+        metadata=services.normalized_metadata(asset, normalized),
+    )
+    assert (again["cache"], again["cache_key"]) == ("hit", first["cache_key"])
+    probe = subprocess.run(["ffmpeg", "-i", str(normalized)], check=False, capture_output=True, text=True)
+    assert probe.stderr.count("Audio:") == 1
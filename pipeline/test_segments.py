@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from pipeline.segments import chunk_ranges, clip_overlays, dirty_segments, segment_count, segments_for_window
+from pipeline.services import compute_overlay_diff
+
+
+def _overlay(overlay_id: str, start: float, end: float, text: str = "x") -> dict:
+    return {"id": overlay_id, "type": "callout", "start_sec": start, "end_sec": end, "text": text}
+
+
+def test_segment_count_rounds_up_partial_tail():
+    assert segment_count(60.0, 2.0) == 30
+    assert segment_count(7.0, 2.0) == 4
+    assert segment_count(0.0, 2.0) == 0
+
+
+def test_segments_for_window_includes_boundary_frame():
+    assert list(segments_for_window(0.0, 2.0, 10.0, 2.0)) == [0, 1]
+    assert list(segments_for_window(2.5, 3.5, 10.0, 2.0)) == [1]
+    assert list(segments_for_window(9.0, 10.0, 10.0, 2.0)) == [4]
+
+
+def test_dirty_segments_only_cover_edited_overlay():
+    previous = [_overlay("a", 0.0, 3.0), _overlay("cta", 57.0, 60.0, "Play")]
+    current = [_overlay("a", 0.0, 3.0), _overlay("cta", 57.0, 60.0, "Install")]
+    diff = compute_overlay_diff(previous, current)
+    assert dirty_segments(diff, 60.0, 2.0) == [28, 29]
+
+
+def test_clip_overlays_shifts_into_segment_time():
+    clipped = clip_overlays([_overlay("a", 1.0, 5.0), _overlay("b", 7.0, 8.0)], 4.0, 6.0)
+    assert len(clipped) == 1
+    assert clipped[0]["start_sec"] == 0.0
+    assert clipped[0]["end_sec"] == 1.0
+
+
+def test_chunk_ranges_align_to_keyframe_grid():
+    assert chunk_ranges(25.0, 10.0, 2.0) == [(0.0, 10.0), (10.0, 20.0), (20.0, 25.0)]
+    assert chunk_ranges(9.0, 3.0, 2.0) == [(0.0, 4.0), (4.0, 8.0), (8.0, 9.0)]
+    assert chunk_ranges(9.0, 5.0) == [(0.0, 5.0), (5.0, 9.0)]
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from pipeline import services
+from pipeline.stream_plan import ENCODE_ALL, missing_keyframes, plan_streams
+from projects.models import Project
+
+
+def _metadata(**overrides) -> dict:
+    return {
+        "duration_sec": 6.0,
+        "width": 1080,
+        "height": 1920,
+        "fps": "30/1",
+        "codec_name": "h264",
+        "pix_fmt": "yuv420p",
+        "sample_aspect_ratio": "1:1",
+        "audio_codec": "aac",
+        "audio_bit_rate": 128000,
+        **overrides,
+    }
+
+
+def test_untouched_conforming_source_is_remuxed():
+    plan = plan_streams(_metadata(), False, 1080, 1920, 30)
+    assert (plan.mode, plan.video, plan.audio) == ("remux", "copy", "copy")
+
+
+def test_video_encoded_when_overlays_or_target_differ():
+    assert plan_streams(_metadata(), True, 1080, 1920, 30).as_dict()["video"] == "encode"
+    plan = plan_streams(_metadata(fps="25/1", pix_fmt="yuv444p"), False, 1080, 1920, 30)
+    assert plan.video == "encode"
+    assert plan.audio == "copy"
+    assert "fps 25/1" in plan.reasons[0] and "pix_fmt yuv444p" in plan.reasons[0]
+    assert plan_streams(_metadata(), False, 540, 960, 30).video == "encode"
+
+
+def test_audio_plan_follows_codec_and_bitrate():
+    assert plan_streams(_metadata(audio_codec="opus"), False, 1080, 1920, 30).audio == "encode"
+    assert plan_streams(_metadata(audio_codec=None), False, 1080, 1920, 30).audio == "none"
+    assert plan_streams(_metadata(), False, 1080, 1920, 30, max_audio_kbps=96).audio == "encode"
+    assert plan_streams(_metadata(), False, 1080, 1920, 30, max_audio_kbps=192).audio == "copy"
+    assert plan_streams(None, False, 1080, 1920, 30) == ENCODE_ALL
+
+
+@pytest.mark.django_db
+def test_overlays_without_frames_do_not_force_video_encode(settings):
+    settings.TARGET_WIDTH, settings.TARGET_HEIGHT, settings.TARGET_FPS = 1080, 1920, 30
+    project = Project.objects.create(name="plan")
+    empty = [{"type": "callout", "start_sec": 3.0, "end_sec": 2.0, "text": "HI", "position": {}, "style": {}}]
+    past_end = [{**empty[0], "start_sec": 6.0, "end_sec": 8.0}]
+    assert services.plan_render_streams(_metadata(), empty, project).mode == "remux"
+    assert services.plan_render_streams(_metadata(), past_end, project).mode == "remux"
+    # An instant still draws the one frame at its timestamp.
+    instant = [{**empty[0], "start_sec": 2.0}]
+    assert services.plan_render_streams(_metadata(), instant, project).video == "encode"
+
+
+@pytest.mark.django_db
+def test_remux_plan_skips_filters_and_is_recorded(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    settings.RENDER_CACHE_MAX_BYTES = 0
+    settings.TARGET_WIDTH, settings.TARGET_HEIGHT, settings.TARGET_FPS = 1080, 1920, 30
+    project = Project.objects.create(name="plan")
+    src = tmp_path / "normalized.mp4"
+    src.write_bytes(b"normalized")
+    commands = []
+    monkeypatch.setattr(services, "_run", lambda cmd, timeout_sec=None: commands.append(cmd))
+
+    info = services.render_draft_video(src, tmp_path / "out.mp4", {"overlays": []}, project, metadata=_metadata())
+
+    assert info["mode"] == "remux"
+    assert info["stream_plan"]["video"] == "copy"
+    [cmd] = commands
+    assert "-filter_complex" not in cmd
+    assert cmd[cmd.index("-c:v") + 1] == "copy"
+    assert cmd[cmd.index("-c:a") + 1] == "copy"
+
+
+def test_missing_keyframes_checks_each_segment_boundary():
+    assert missing_keyframes([0.0, 2.0, 4.0333], 6.0, 2.0, 30) == []
+    assert missing_keyframes([0.0, 4.0], 6.0, 2.0, 30) == [2.0]
+    assert missing_keyframes([0.0, 2.1], 4.0, 2.0, 30) == [2.0]
+    assert missing_keyframes([0.0], 6.0, 0.0, 30) == []
+
+
+@pytest.mark.parametrize(
+    ("overrides", "keyframes", "video_args", "audio_codec"),
+    [
+        ({}, [0.0, 2.0, 4.0], ["-c:v", "copy"], "copy"),
+        ({"audio_codec": "opus"}, [0.0, 2.0, 4.0], ["-c:v", "copy"], "aac"),
+        ({}, [0.0, 5.0], ["-vf"], "copy"),
+        ({"width": 720, "height": 1280}, [0.0, 2.0, 4.0], ["-vf"], "copy"),
+    ],
+)
+def test_normalize_remuxes_conforming_streams(
+    tmp_path: Path, settings, monkeypatch, overrides, keyframes, video_args, audio_codec
+):
+    settings.TARGET_WIDTH, settings.TARGET_HEIGHT, settings.TARGET_FPS = 1080, 1920, 30
+    settings.RENDER_SEGMENT_SECONDS = 2
+    commands = []
+    monkeypatch.setattr(services, "_run", lambda cmd, timeout_sec=None: commands.append(cmd))
+    monkeypatch.setattr(services, "probe_keyframes", lambda path: keyframes)
+
+    info = services.normalize_video(tmp_path / "src.mov", tmp_path / "norm.mp4", _metadata(**overrides))
+
+    [cmd] = commands
+    start = cmd.index(video_args[0])
+    assert cmd[start : start + len(video_args)] == video_args
+    assert cmd[cmd.index("-c:a") + 1] == audio_codec
+    assert info["video"] == ("copy" if video_args[-1] == "copy" else "encode")
+    assert services.normalize_video(tmp_path / "src.mov", tmp_path / "n2.mp4")["mode"] == "encode"
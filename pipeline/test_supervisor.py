@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import sys
+import time
+
+import pytest
+from rest_framework.test import APIClient
+
+from pipeline import services
+from pipeline.supervisor import JobCancelled, parse_progress_block, run_supervised, track_job
+from projects.models import Job, Project
+
+
+def _python(code: str) -> list[str]:
+    return [sys.executable, "-c", code]
+
+
+def test_progress_block_parsed_into_numbers():
+    block = ["frame=120", "fps=59.9", "out_time_us=4000000", "speed=2.01x", "bitrate=N/A", "progress=continue"]
+    assert parse_progress_block(block) == {
+        "frame": 120,
+        "fps": 59.9,
+        "speed": 2.01,
+        "out_time_sec": 4.0,
+        "state": "continue",
+    }
+    assert parse_progress_block(["speed=N/A", "out_time_us=N/A", "progress=end"]) == {"state": "end"}
+
+
+def test_stderr_kept_as_bounded_tail(settings):
+    settings.MEDIA_STDERR_TAIL_LINES = 3
+    proc = run_supervised(_python("import sys\nfor i in range(1000): print(f'line {i}', file=sys.stderr)\nsys.exit(3)"))
+    assert proc.returncode == 3
+    assert proc.stderr_tail.splitlines() == ["line 997", "line 998", "line 999"]
+
+
+def test_stdout_captured_for_probe_style_commands():
+    proc = run_supervised(_python("print('{\"ok\": true}')"), capture_stdout=True)
+    assert proc.returncode == 0
+    assert proc.stdout.strip() == '{"ok": true}'
+
+
+def test_timeout_kills_process_group(settings):
+    started = time.monotonic()
+    # The child spawns a grandchild; both share the supervised session and must die together.
+    cmd = _python(
+        "import subprocess, sys, time\nsubprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\ntime.sleep(30)"
+    )
+    with pytest.raises(services.PipelineError, match="timed out"):
+        services._run(cmd, timeout_sec=0.5)
+    assert time.monotonic() - started < 10
+
+
+@pytest.mark.django_db
+def test_cancelled_job_stops_running_process(settings):
+    settings.MEDIA_PROGRESS_INTERVAL_SECONDS = 0.1
+    job = Job.objects.create(project=Project.objects.create(name="cancel"), job_type=Job.JobType.EXPORT_FINAL)
+    Job.objects.filter(id=job.id).update(status=Job.Status.CANCELLED)
+    started = time.monotonic()
+    with track_job(job.id), pytest.raises(JobCancelled):
+        run_supervised(_python("import time; time.sleep(30)"))
+    assert time.monotonic() - started < 10
+
+
+@pytest.mark.django_db
+def test_cancel_endpoint_only_cancels_unfinished_jobs():
+    project = Project.objects.create(name="cancel")
+    running = Job.objects.create(project=project, job_type=Job.JobType.EXPORT_FINAL, status=Job.Status.RUNNING)
+    done = Job.objects.create(project=project, job_type=Job.JobType.EXPORT_FINAL, status=Job.Status.SUCCESS)
+    client = APIClient()
+
+    response = client.post(f"/api/v1/jobs/{running.id}/cancel")
+    assert response.status_code == 202
+    assert response.json()["status"] == "cancelled"
+    assert client.post(f"/api/v1/jobs/{done.id}/cancel").status_code == 409
+    done.refresh_from_db()
+    assert done.status == Job.Status.SUCCESS
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import hashlib
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+from rest_framework.test import APIClient
+
+from pipeline import uploads
+from projects.models import Asset, Job, Project, UploadSession
+
+
+def _put(client: APIClient, url: str, offset: int, chunk: bytes):
+    return client.put(url, data=chunk, content_type="application/octet-stream", HTTP_UPLOAD_OFFSET=str(offset))
+
+
+def _start(client: APIClient, project: Project, asset_type: str, name: str, size: int) -> str:
+    response = client.post(
+        f"/api/v1/projects/{project.id}/uploads",
+        {"asset_type": asset_type, "filename": name, "size_bytes": size},
+        format="json",
+    )
+    assert response.status_code == 201
+    return f"/api/v1/projects/{project.id}/uploads/{response.json()['id']}"
+
+
+@pytest.mark.django_db
+def test_chunked_upload_resumes_and_dedupes_on_finalize(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    client = APIClient()
+    project = Project.objects.create(name="chunks")
+    payload = bytes(range(256)) * 40
+    url = _start(client, project, "logo", "logo.png", len(payload))
+
+    assert _put(client, url, 0, payload[:4000]).json()["received_bytes"] == 4000
+    # A client that lost track of the offset is told where to resume instead of corrupting the file.
+    mismatch = _put(client, url, 1000, payload[1000:5000])
+    assert (mismatch.status_code, mismatch.json()["offset"]) == (409, 4000)
+    assert client.get(url).json()["received_bytes"] == 4000
+    assert client.post(f"{url}/finalize").status_code == 409
+    assert _put(client, url, 4000, payload[4000:]).json()["received_bytes"] == len(payload)
+
+    response = client.post(f"{url}/finalize")
+    assert response.status_code == 201
+    first = Asset.objects.get(id=response.json()["id"])
+    assert first.sha256 == hashlib.sha256(payload).hexdigest()
+    assert Path(first.file.path).read_bytes() == payload
+
+    # The same bytes uploaded again end up pointing at the stored file rather than a second copy.
+    again = _start(client, project, "logo", "logo-again.png", len(payload))
+    _put(client, again, 0, payload)
+    second = Asset.objects.get(id=client.post(f"{again}/finalize").json()["id"])
+    assert second.file.name == first.file.name
+    assert len(list(Path(first.file.path).parent.iterdir())) == 1
+    assert UploadSession.objects.filter(status=UploadSession.Status.COMPLETE).count() == 2
+
+
+@pytest.mark.django_db
+def test_non_video_source_rejected_on_first_chunk(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    client = APIClient()
+    project = Project.objects.create(name="junk")
+    url = _start(client, project, "source_video", "clip.mp4", 200_000)
+
+    response = _put(client, url, 0, b"<html>not a video</html>" * 3000)
+
+    assert response.status_code == 400
+    upload = UploadSession.objects.get()
+    assert (upload.status, upload.error) == (UploadSession.Status.REJECTED, "Not a supported video container")
+    assert not uploads.session_path(upload).exists()
+    assert _put(client, url, 0, b"\x1aE\xdf\xa3").status_code == 400
+
+
+@pytest.mark.django_db
+def test_oversized_upload_refused_before_any_bytes(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    settings.UPLOAD_MAX_BYTES = 1024
+    project = Project.objects.create(name="huge")
+
+    response = APIClient().post(
+        f"/api/v1/projects/{project.id}/uploads",
+        {"asset_type": "source_video", "filename": "clip.mp4", "size_bytes": 2048},
+        format="json",
+    )
+
+    assert response.status_code == 413
+    assert not UploadSession.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+def test_over_length_faststart_source_rejected_from_its_header(tmp_path: Path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    settings.VIDEO_MAX_DURATION_SECONDS = 1
+    monkeypatch.setattr(uploads, "SNIFF_BYTES", 4096)
+    clip = tmp_path / "long.mp4"
+    subprocess.run(
+        [
+            "ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=s=160x284:r=15:d=3",
+            "-c:v", "libx264", "-movflags", "+faststart", str(clip),
+        ],
+        check=True,
+        capture_output=True,
+    )  # fmt: skip
+    data = clip.read_bytes()
+    client = APIClient()
+    project = Project.objects.create(name="long")
+    url = _start(client, project, "source_video", "long.mp4", len(data))
+
+    offset, response = 0, None
+    while offset < len(data):
+        response = _put(client, url, offset, data[offset : offset + 4096])
+        if response.status_code != 200:
+            break
+        offset += 4096
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Video duration exceeds 1s"
+    assert offset < len(data) // 2
+    assert UploadSession.objects.get().metadata["duration_sec"] == pytest.approx(3.0, abs=0.1)
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+def test_retried_finalize_returns_the_first_asset_and_ingest(tmp_path: Path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    settings.TARGET_WIDTH, settings.TARGET_HEIGHT, settings.TARGET_FPS = 180, 320, 15
+    clip = tmp_path / "clip.mp4"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=s=180x320:r=15:d=1", "-c:v", "libx264", str(clip)],
+        check=True,
+        capture_output=True,
+    )
+    data = clip.read_bytes()
+    client = APIClient()
+    project = Project.objects.create(name="retry")
+    url = _start(client, project, "source_video", "clip.mp4", len(data))
+    _put(client, url, 0, data)
+
+    first = client.post(f"{url}/finalize")
+    again = client.post(f"{url}/finalize")
+
+    assert (first.status_code, again.status_code) == (201, 200)
+    assert again.json()["id"] == first.json()["id"]
+    assert again.json()["ingest_job_id"] == first.json()["ingest_job_id"]
+    assert Job.objects.filter(job_type=Job.JobType.INGEST_SOURCE).count() == 1
@@ -12,6 +12,14 @@ def test_build_timeline_has_three_overlays(db):
     assert timeline["overlays"][0]["type"] == "headline"
 
 
+def test_build_timeline_overlay_ids_are_stable(db):
+    project = Project.objects.create(name="ids", prompt="Awesome game")
+    copy = {"headline": "H", "benefit": "B", "cta": "C"}
+    first = build_timeline(project, duration_sec=30.0, copy=copy)
+    second = build_timeline(project, duration_sec=20.0, copy=copy)
+    assert [row["id"] for row in first["overlays"]] == [row["id"] for row in second["overlays"]]
+
+
 def test_provider_defaults_to_local(monkeypatch):
     monkeypatch.delenv("AI_PROVIDER", raising=False)
     monkeypatch.delenv("GEMINI_API_KEY", raising=False)
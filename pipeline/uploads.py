@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import IO, Any
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from pipeline.mp4meta import TOP_LEVEL_START, Mp4ParseError, read_partial_mp4_metadata
+from pipeline.render_cache import file_digest
+from projects.models import Asset, Project, UploadSession
+
+COPY_BLOCK_BYTES = 1024 * 1024
+# Enough of the file to tell the container apart and, for faststart MP4s, to hold the whole moov box.
+SNIFF_BYTES = 64 * 1024
+_HASHER_LIMIT = 256
+
+# upload id -> (bytes hashed so far, running sha256). Appends are strictly sequential, so the digest is
+# ready at finalize without re-reading the file; a session resumed on another worker just hashes on finalize.
+_hashers: dict[str, tuple[int, Any]] = {}
+
+
+class UploadRejected(Exception):
+    pass
+
+
+class OffsetMismatch(Exception):
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+def sniff_container(head: bytes) -> str | None:
+    if len(head) >= 8 and head[4:8] in TOP_LEVEL_START:
+        return "mp4"
+    if head[:4] == b"\x1aE\xdf\xa3":
+        return "matroska"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return "avi"
+    if head[:1] == b"\x47" and (len(head) <= 188 or head[188:189] == b"\x47"):
+        return "mpegts"
+    return None
+
+
+def session_path(session: UploadSession) -> Path:
+    return Path(default_storage.path(session.file_name))
+
+
+def init_upload(project: Project, asset_type: str, filename: str, size_bytes: int) -> UploadSession:
+    if size_bytes > settings.UPLOAD_MAX_BYTES:
+        raise UploadRejected(f"Upload exceeds {settings.UPLOAD_MAX_BYTES} bytes")
+    # Chunks are written straight into the asset's final location; finalize only creates the row.
+    name = Asset._meta.get_field("file").generate_filename(None, filename)
+    name = default_storage.get_available_name(name)
+    path = Path(default_storage.path(name))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    return UploadSession.objects.create(
+        project=project, asset_type=asset_type, filename=filename, file_name=name, size_bytes=size_bytes
+    )
+
+
+def _check_head(session: UploadSession, path: Path) -> str:
+    if session.asset_type != Asset.AssetType.SOURCE_VIDEO or "duration_sec" in session.metadata:
+        return ""
+    if session.received_bytes < min(SNIFF_BYTES, session.size_bytes):
+        return ""
+    if "container" not in session.metadata:
+        with path.open("rb") as fh:
+            container = sniff_container(fh.read(SNIFF_BYTES))
+        if container is None:
+            return "Not a supported video container"
+        session.metadata = {"container": container}
+    if session.metadata["container"] != "mp4":
+        return ""
+    try:
+        metadata = read_partial_mp4_metadata(path)
+    except Mp4ParseError as exc:
+        return f"Invalid MP4: {exc}"
+    if metadata is None:
+        return ""
+    session.metadata = {**session.metadata, **metadata}
+    if metadata["duration_sec"] > settings.VIDEO_MAX_DURATION_SECONDS:
+        return f"Video duration exceeds {settings.VIDEO_MAX_DURATION_SECONDS}s"
+    return ""
+
+
+def append_chunk(session_id: str, offset: int, stream: IO[bytes], length: int) -> UploadSession:
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(id=session_id)
+        if session.status != UploadSession.Status.OPEN:
+            raise UploadRejected(f"Upload is {session.status}")
+        if offset != session.received_bytes:
+            raise OffsetMismatch(session.received_bytes)
+        if length <= 0 or length > settings.UPLOAD_CHUNK_MAX_BYTES or offset + length > session.size_bytes:
+            raise UploadRejected(f"Chunk of {length} bytes does not fit at offset {offset}")
+
+        key = str(session.id)
+        hashed, hasher = _hashers.pop(key, (0, None))
+        if offset == 0:
+            hashed, hasher = 0, hashlib.sha256()
+        if hashed != offset:
+            hasher = None
+        path = session_path(session)
+        written = 0
+        with path.open("r+b") as fh:
+            # Drop anything past the acknowledged offset left by an interrupted request.
+            fh.truncate(offset)
+            fh.seek(offset)
+            while written < length:
+                block = stream.read(min(COPY_BLOCK_BYTES, length - written))
+                if not block:
+                    break
+                fh.write(block)
+                if hasher is not None:
+                    hasher.update(block)
+                written += len(block)
+        session.received_bytes = offset + written
+        if hasher is not None:
+            if len(_hashers) >= _HASHER_LIMIT:
+                _hashers.clear()
+            _hashers[key] = (session.received_bytes, hasher)
+        if error := _check_head(session, path):
+            session.status = UploadSession.Status.REJECTED
+            session.error = error
+        session.save(update_fields=["received_bytes", "metadata", "status", "error", "updated_at"])
+
+    if session.status == UploadSession.Status.REJECTED:
+        _hashers.pop(key, None)
+        path.unlink(missing_ok=True)
+        raise UploadRejected(session.error)
+    if written != length:
+        raise OffsetMismatch(session.received_bytes)
+    return session
+
+
+def finalize_upload(session_id: str) -> tuple[Asset, bool]:
+    # The flag is False when an earlier call already finalized the session, so a retry can skip the follow-up work.
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(id=session_id)
+        if session.status == UploadSession.Status.COMPLETE and session.asset is not None:
+            return session.asset, False
+        if session.status != UploadSession.Status.OPEN:
+            raise UploadRejected(session.error or f"Upload is {session.status}")
+        if session.received_bytes != session.size_bytes:
+            raise OffsetMismatch(session.received_bytes)
+
+        path = session_path(session)
+        hashed, hasher = _hashers.pop(str(session.id), (0, None))
+        digest = hasher.hexdigest() if hasher is not None and hashed == session.size_bytes else file_digest(path)
+        name = session.file_name
+        duplicate = (
+            Asset.objects.filter(sha256=digest, asset_type=session.asset_type).exclude(file="").order_by("created_at")
+        )
+        for existing in duplicate:
+            if default_storage.exists(existing.file.name):
+                # Same bytes already on disk: the new asset points at them and the uploaded copy goes away.
+                path.unlink(missing_ok=True)
+                name = existing.file.name
+                break
+        asset = Asset.objects.create(project=session.project, asset_type=session.asset_type, file=name, sha256=digest)
+        session.status = UploadSession.Status.COMPLETE
+        session.asset = asset
+        session.save(update_fields=["status", "asset", "updated_at"])
+    return asset, True
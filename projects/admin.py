@@ -1,6 +1,18 @@
 from django.contrib import admin
 
-from .models import Asset, Draft, DraftVersion, EditPlanArtifact, ExportArtifact, Job, Overlay, Project, VideoContext
+from .models import (
+    Asset,
+    Draft,
+    DraftVersion,
+    EditPlanArtifact,
+    ExportArtifact,
+    Job,
+    Overlay,
+    Project,
+    StoredMedia,
+    UploadSession,
+    VideoContext,
+)
 
 admin.site.register(Project)
 admin.site.register(Asset)
@@ -11,3 +23,5 @@ admin.site.register(DraftVersion)
 admin.site.register(Overlay)
 admin.site.register(ExportArtifact)
 admin.site.register(Job)
+admin.site.register(StoredMedia)
+admin.site.register(UploadSession)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_editplanartifact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='draftversion',
+            name='render_json',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-17 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_draftversion_render_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='draft',
+            name='render_tier',
+            field=models.CharField(choices=[('full', 'Full'), ('proxy', 'Proxy')], default='full', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='draftversion',
+            name='render_tier',
+            field=models.CharField(choices=[('full', 'Full'), ('proxy', 'Proxy')], default='full', max_length=16),
+        ),
+    ]
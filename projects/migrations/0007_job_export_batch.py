@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-17 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_render_tier'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='job_type',
+            field=models.CharField(choices=[('generate_draft', 'Generate Draft'), ('export_final', 'Export Final'), ('export_batch', 'Export Batch')], max_length=32),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-17 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_job_export_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='progress_json',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('success', 'Success'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-17 06:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_media_store'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='job_type',
+            field=models.CharField(choices=[('generate_draft', 'Generate Draft'), ('export_final', 'Export Final'), ('export_batch', 'Export Batch'), ('ingest_source', 'Ingest Source')], max_length=32),
+        ),
+    ]
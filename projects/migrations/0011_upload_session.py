@@ -0,0 +1,36 @@
+# Generated by Django 6.1.2 on 2026-10-17 06:37
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_job_ingest_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('asset_type', models.CharField(choices=[('source_video', 'Source Video'), ('logo', 'Logo'), ('font', 'Font')], max_length=20)),
+                ('filename', models.CharField(max_length=255)),
+                ('file_name', models.CharField(max_length=255)),
+                ('size_bytes', models.BigIntegerField()),
+                ('received_bytes', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('complete', 'Complete'), ('rejected', 'Rejected')], default='open', max_length=16)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('asset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='projects.asset')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='projects.project')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
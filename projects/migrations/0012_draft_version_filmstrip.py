@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-17 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0011_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='draftversion',
+            name='filmstrip_json',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
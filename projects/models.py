@@ -4,6 +4,7 @@ import uuid
 
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 
 class TimestampedModel(models.Model):
@@ -43,6 +44,7 @@ class Asset(TimestampedModel):
     asset_type = models.CharField(max_length=20, choices=AssetType.choices)
     file = models.FileField(upload_to="assets/%Y/%m/%d")
     metadata = models.JSONField(default=dict, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
 
     class Meta:
         indexes = [models.Index(fields=["project", "asset_type"])]
@@ -87,13 +89,19 @@ class Draft(TimestampedModel):
         READY = "ready", "Ready"
         FAILED = "failed", "Failed"
 
+    class RenderTier(models.TextChoices):
+        FULL = "full", "Full"
+        PROXY = "proxy", "Proxy"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     project = models.OneToOneField(Project, on_delete=models.CASCADE, related_name="draft")
     status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
     draft_video = models.FileField(upload_to="drafts/%Y/%m/%d", blank=True)
+    render_tier = models.CharField(max_length=16, choices=RenderTier.choices, default=RenderTier.FULL)
     timeline_json = models.JSONField(default=dict, blank=True)
     approved = models.BooleanField(default=False)
     error = models.TextField(blank=True)
+    source_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
 
 
 class DraftVersion(TimestampedModel):
@@ -104,6 +112,9 @@ class DraftVersion(TimestampedModel):
     timeline_json = models.JSONField(default=dict, blank=True)
     overlay_diff_json = models.JSONField(default=dict, blank=True)
     draft_video_name = models.CharField(max_length=255, blank=True)
+    render_tier = models.CharField(max_length=16, choices=Draft.RenderTier.choices, default=Draft.RenderTier.FULL)
+    render_json = models.JSONField(default=dict, blank=True)
+    filmstrip_json = models.JSONField(default=dict, blank=True)
 
     class Meta:
         constraints = [models.UniqueConstraint(fields=["draft", "version"], name="unique_draft_version")]
@@ -146,12 +157,15 @@ class Job(TimestampedModel):
     class JobType(models.TextChoices):
         GENERATE_DRAFT = "generate_draft", "Generate Draft"
         EXPORT_FINAL = "export_final", "Export Final"
+        EXPORT_BATCH = "export_batch", "Export Batch"
+        INGEST_SOURCE = "ingest_source", "Ingest Source"
 
     class Status(models.TextChoices):
         PENDING = "pending", "Pending"
         RUNNING = "running", "Running"
         SUCCESS = "success", "Success"
         FAILED = "failed", "Failed"
+        CANCELLED = "cancelled", "Cancelled"
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="jobs")
@@ -160,6 +174,41 @@ class Job(TimestampedModel):
     task_id = models.CharField(max_length=80, blank=True)
     payload_json = models.JSONField(default=dict, blank=True)
     result_json = models.JSONField(default=dict, blank=True)
+    progress_json = models.JSONField(default=dict, blank=True)
     error = models.TextField(blank=True)
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
+
+
+class StoredMedia(TimestampedModel):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    digest = models.CharField(max_length=64, db_index=True)
+    kind = models.CharField(max_length=24)
+    variant = models.CharField(max_length=16, blank=True)
+    path = models.CharField(max_length=255)
+    size_bytes = models.BigIntegerField(default=0)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["digest", "kind", "variant"], name="unique_stored_media_variant")
+        ]
+
+
+class UploadSession(TimestampedModel):
+    class Status(models.TextChoices):
+        OPEN = "open", "Open"
+        COMPLETE = "complete", "Complete"
+        REJECTED = "rejected", "Rejected"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="uploads")
+    asset_type = models.CharField(max_length=20, choices=Asset.AssetType.choices)
+    filename = models.CharField(max_length=255)
+    file_name = models.CharField(max_length=255)
+    size_bytes = models.BigIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.OPEN)
+    metadata = models.JSONField(default=dict, blank=True)
+    asset = models.ForeignKey(Asset, on_delete=models.SET_NULL, null=True, blank=True)
+    error = models.TextField(blank=True)
@@ -42,3 +42,4 @@ class EditPlan(BaseModel):
     overlays: list[OverlayItem]
     constraints: dict = Field(default_factory=dict)
     reasoning_summary: str = ""
+    render_plan: dict = Field(default_factory=dict)
@@ -2,7 +2,10 @@ from __future__ import annotations
 
 from rest_framework import serializers
 
-from .models import Asset, Draft, ExportArtifact, Job, Overlay, Project
+from pipeline.profiles import ENCODER_PROFILES, OUTPUT_FORMATS
+from pipeline.services import current_version_filmstrip, stored_filmstrip
+
+from .models import Asset, Draft, DraftVersion, ExportArtifact, Job, Overlay, Project, UploadSession
 
 
 class ProjectCreateSerializer(serializers.ModelSerializer):
@@ -19,6 +22,29 @@ class AssetUploadSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "metadata", "created_at"]
 
 
+class UploadCreateSerializer(serializers.Serializer):
+    asset_type = serializers.ChoiceField(choices=Asset.AssetType.choices)
+    filename = serializers.CharField(max_length=200)
+    size_bytes = serializers.IntegerField(min_value=1)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = [
+            "id",
+            "asset_type",
+            "filename",
+            "size_bytes",
+            "received_bytes",
+            "status",
+            "metadata",
+            "asset",
+            "error",
+            "created_at",
+        ]
+
+
 class OverlaySerializer(serializers.ModelSerializer):
     class Meta:
         model = Overlay
@@ -35,10 +61,51 @@ class OverlaySerializer(serializers.ModelSerializer):
 
 class DraftSerializer(serializers.ModelSerializer):
     overlays = OverlaySerializer(many=True, read_only=True)
+    filmstrip = serializers.SerializerMethodField()
+    source_filmstrip = serializers.SerializerMethodField()
 
     class Meta:
         model = Draft
-        fields = ["id", "status", "approved", "draft_video", "timeline_json", "error", "overlays", "updated_at"]
+        fields = [
+            "id",
+            "status",
+            "approved",
+            "draft_video",
+            "render_tier",
+            "timeline_json",
+            "error",
+            "overlays",
+            "filmstrip",
+            "source_filmstrip",
+            "updated_at",
+        ]
+
+    def get_filmstrip(self, obj: Draft) -> dict:
+        latest = obj.versions.first()
+        return current_version_filmstrip(latest) if latest else {}
+
+    def get_source_filmstrip(self, obj: Draft) -> dict:
+        return stored_filmstrip(obj.source_sha256) or {}
+
+
+class DraftVersionSerializer(serializers.ModelSerializer):
+    filmstrip_json = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DraftVersion
+        fields = [
+            "id",
+            "version",
+            "source",
+            "draft_video_name",
+            "render_tier",
+            "overlay_diff_json",
+            "filmstrip_json",
+            "created_at",
+        ]
+
+    def get_filmstrip_json(self, obj: DraftVersion) -> dict:
+        return current_version_filmstrip(obj)
 
 
 class DraftUpdateSerializer(serializers.Serializer):
@@ -46,6 +113,19 @@ class DraftUpdateSerializer(serializers.Serializer):
     overlays = OverlaySerializer(many=True, required=False)
 
 
+class FramePreviewSerializer(serializers.Serializer):
+    t = serializers.FloatField(min_value=0)
+    overlays = OverlaySerializer(many=True, required=False)
+    format = serializers.ChoiceField(choices=["jpeg", "png"], default="jpeg")
+
+
+class ExportCreateSerializer(serializers.Serializer):
+    profile = serializers.ChoiceField(choices=sorted(ENCODER_PROFILES), required=False)
+    formats = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(OUTPUT_FORMATS)), required=False, allow_empty=False
+    )
+
+
 class JobSerializer(serializers.ModelSerializer):
     class Meta:
         model = Job
@@ -56,6 +136,7 @@ class JobSerializer(serializers.ModelSerializer):
             "task_id",
             "payload_json",
             "result_json",
+            "progress_json",
             "error",
             "started_at",
             "finished_at",
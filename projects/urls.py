@@ -2,20 +2,36 @@ from django.urls import path
 
 from .views import (
     DraftDetailView,
+    DraftFrameView,
     DraftGenerateView,
+    DraftVersionListView,
     ExportCreateView,
+    JobCancelView,
     JobDetailView,
     ProjectArtifactsView,
     ProjectAssetUploadView,
     ProjectCreateView,
+    UploadCreateView,
+    UploadDetailView,
+    UploadFinalizeView,
 )
 
 urlpatterns = [
     path("projects", ProjectCreateView.as_view(), name="project-create"),
     path("projects/<uuid:project_id>/assets", ProjectAssetUploadView.as_view(), name="project-asset-upload"),
+    path("projects/<uuid:project_id>/uploads", UploadCreateView.as_view(), name="upload-create"),
+    path("projects/<uuid:project_id>/uploads/<uuid:upload_id>", UploadDetailView.as_view(), name="upload-detail"),
+    path(
+        "projects/<uuid:project_id>/uploads/<uuid:upload_id>/finalize",
+        UploadFinalizeView.as_view(),
+        name="upload-finalize",
+    ),
     path("projects/<uuid:project_id>/drafts/generate", DraftGenerateView.as_view(), name="draft-generate"),
     path("jobs/<uuid:job_id>", JobDetailView.as_view(), name="job-detail"),
+    path("jobs/<uuid:job_id>/cancel", JobCancelView.as_view(), name="job-cancel"),
     path("projects/<uuid:project_id>/draft", DraftDetailView.as_view(), name="draft-detail-update"),
+    path("projects/<uuid:project_id>/draft/frame", DraftFrameView.as_view(), name="draft-frame-preview"),
+    path("projects/<uuid:project_id>/draft/versions", DraftVersionListView.as_view(), name="draft-version-list"),
     path("projects/<uuid:project_id>/export", ExportCreateView.as_view(), name="export-create"),
     path("projects/<uuid:project_id>/artifacts", ProjectArtifactsView.as_view(), name="artifacts-list"),
 ]
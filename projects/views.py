@@ -1,26 +1,37 @@
 from __future__ import annotations
 
-from pathlib import Path
-
 from django.conf import settings
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from pipeline.context import save_video_context
-from pipeline.services import ffprobe_metadata, rerender_draft
-from pipeline.tasks import export_final_task, generate_draft_task
-from projects.models import Asset, Draft, ExportArtifact, Job, Overlay, Project
+from pipeline.services import PipelineError, SourceNotReady, probe_upload, render_frame, rerender_draft
+from pipeline.tasks import (
+    export_batch_task,
+    export_final_task,
+    generate_draft_task,
+    ingest_job_for,
+    revoke_chunk_tasks,
+    start_ingest,
+)
+from pipeline.uploads import OffsetMismatch, UploadRejected, append_chunk, finalize_upload, init_upload
+from projects.models import Asset, Draft, ExportArtifact, Job, Overlay, Project, UploadSession
 from projects.schemas import DraftTimeline
 from projects.serializers import (
     AssetUploadSerializer,
     DraftSerializer,
     DraftUpdateSerializer,
+    DraftVersionSerializer,
+    ExportCreateSerializer,
     ExportSerializer,
+    FramePreviewSerializer,
     JobSerializer,
     ProjectCreateSerializer,
+    UploadCreateSerializer,
+    UploadSessionSerializer,
 )
 
 
@@ -41,19 +52,77 @@ class ProjectAssetUploadView(APIView):
         serializer.is_valid(raise_exception=True)
         asset = serializer.save(project=project)
 
-        if asset.asset_type == Asset.AssetType.SOURCE_VIDEO:
-            metadata = ffprobe_metadata(Path(asset.file.path))
-            if metadata["duration_sec"] > settings.VIDEO_MAX_DURATION_SECONDS:
-                asset.delete()
-                return Response(
-                    {"detail": f"Video duration exceeds {settings.VIDEO_MAX_DURATION_SECONDS}s"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            asset.metadata = metadata
-            asset.save(update_fields=["metadata", "updated_at"])
-            save_video_context(project, asset, metadata)
+        return _accept_asset(asset)
+
+
+def _accept_asset(asset: Asset) -> Response:
+    ingest = {}
+    if asset.asset_type == Asset.AssetType.SOURCE_VIDEO:
+        metadata = probe_upload(asset)
+        if metadata["duration_sec"] > settings.VIDEO_MAX_DURATION_SECONDS:
+            asset.delete()
+            return Response(
+                {"detail": f"Video duration exceeds {settings.VIDEO_MAX_DURATION_SECONDS}s"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Normalizing, proxies, thumbnails and video context are built in the background from here on.
+        ingest = {"ingest_job_id": str(start_ingest(asset).id)}
+
+    return Response({**AssetUploadSerializer(asset).data, **ingest}, status=status.HTTP_201_CREATED)
+
+
+class UploadCreateView(APIView):
+    def post(self, request, project_id):
+        project = get_object_or_404(Project, id=project_id)
+        serializer = UploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            upload = init_upload(project, **serializer.validated_data)
+        except UploadRejected as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        return Response(UploadSessionSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+
+class UploadDetailView(APIView):
+    def get(self, request, project_id, upload_id):
+        upload = get_object_or_404(UploadSession, id=upload_id, project_id=project_id)
+        return Response(UploadSessionSerializer(upload).data)
+
+    def put(self, request, project_id, upload_id):
+        upload = get_object_or_404(UploadSession, id=upload_id, project_id=project_id)
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.headers.get("Content-Length", ""))
+        except ValueError:
+            return Response(
+                {"detail": "Upload-Offset and Content-Length headers are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # The body is copied to disk straight from the request stream, never parsed or buffered whole.
+        try:
+            upload = append_chunk(upload.id, offset, request.stream, length)
+        except OffsetMismatch as exc:
+            return Response({"detail": str(exc), "offset": exc.offset}, status=status.HTTP_409_CONFLICT)
+        except UploadRejected as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(UploadSessionSerializer(upload).data)
 
-        return Response(AssetUploadSerializer(asset).data, status=status.HTTP_201_CREATED)
+
+class UploadFinalizeView(APIView):
+    def post(self, request, project_id, upload_id):
+        upload = get_object_or_404(UploadSession, id=upload_id, project_id=project_id)
+        try:
+            asset, created = finalize_upload(upload.id)
+        except OffsetMismatch as exc:
+            return Response({"detail": str(exc), "offset": exc.offset}, status=status.HTTP_409_CONFLICT)
+        except UploadRejected as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if created:
+            return _accept_asset(asset)
+        # A retried finalize answers with what the first one started instead of probing and ingesting again.
+        ingest = ingest_job_for(asset) if asset.asset_type == Asset.AssetType.SOURCE_VIDEO else None
+        extra = {"ingest_job_id": str(ingest.id)} if ingest is not None else {}
+        return Response({**AssetUploadSerializer(asset).data, **extra}, status=status.HTTP_200_OK)
 
 
 class DraftGenerateView(APIView):
@@ -73,6 +142,23 @@ class JobDetailView(APIView):
         return Response(JobSerializer(job).data)
 
 
+class JobCancelView(APIView):
+    def post(self, request, job_id):
+        job = get_object_or_404(Job, id=job_id)
+        # Running ffmpeg is supervised per Job and killed on its next progress poll once the row flips.
+        updated = Job.objects.filter(id=job.id, status__in=[Job.Status.PENDING, Job.Status.RUNNING]).update(
+            status=Job.Status.CANCELLED
+        )
+        job.refresh_from_db()
+        if not updated:
+            return Response(
+                {"detail": f"Job already {job.status}", "job": JobSerializer(job).data},
+                status=status.HTTP_409_CONFLICT,
+            )
+        revoke_chunk_tasks(job)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
 class DraftDetailView(APIView):
     def get(self, request, project_id):
         project = get_object_or_404(Project, id=project_id)
@@ -98,7 +184,8 @@ class DraftDetailView(APIView):
             draft.overlays.all().delete()
             overlay_rows = []
             timeline_items = []
-            for item in overlays_in:
+            previous_items = (draft.timeline_json or {}).get("overlays", [])
+            for idx, item in enumerate(overlays_in):
                 overlay_rows.append(
                     Overlay(
                         draft=draft,
@@ -110,17 +197,11 @@ class DraftDetailView(APIView):
                         style=item.get("style", {}),
                     )
                 )
-                timeline_items.append(
-                    {
-                        "id": str(item.get("id", "")),
-                        "type": item["overlay_type"],
-                        "start_sec": item["start_sec"],
-                        "end_sec": item["end_sec"],
-                        "text": item.get("text", ""),
-                        "position": item.get("position", {}),
-                        "style": item.get("style", {}),
-                    }
-                )
+                overlay_id = str(item.get("id", ""))
+                if not overlay_id and idx < len(previous_items):
+                    # Keep timeline identity stable so version diffs and incremental renders line up.
+                    overlay_id = str(previous_items[idx].get("id", ""))
+                timeline_items.append(_timeline_overlay(item, overlay_id))
             Overlay.objects.bulk_create(overlay_rows)
             timeline = draft.timeline_json or {}
             timeline["overlays"] = timeline_items
@@ -130,20 +211,67 @@ class DraftDetailView(APIView):
                 "copy_variants": timeline.get("copy_variants", {}),
             })
             draft.timeline_json = timeline
-            rerender_draft(project, draft, timeline, source="api_overlay_edit")
+            rerender_draft(project, draft, timeline, source="api_overlay_edit", tier=settings.PREVIEW_RENDER_TIER)
 
         draft.save()
         return Response(DraftSerializer(draft).data)
 
 
+class DraftFrameView(APIView):
+    def post(self, request, project_id):
+        project = get_object_or_404(Project, id=project_id)
+        serializer = FramePreviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+        if "overlays" in payload:
+            overlays = [_timeline_overlay(item, str(item.get("id", ""))) for item in payload["overlays"]]
+        else:
+            draft = Draft.objects.filter(project=project).first()
+            overlays = (draft.timeline_json or {}).get("overlays", []) if draft else []
+        try:
+            image = render_frame(project, overlays, payload["t"], payload["format"])
+        except SourceNotReady as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_409_CONFLICT)
+        except PipelineError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return HttpResponse(image, content_type=f"image/{payload['format']}")
+
+
+class DraftVersionListView(APIView):
+    def get(self, request, project_id):
+        project = get_object_or_404(Project, id=project_id)
+        draft = get_object_or_404(Draft, project=project)
+        return Response(DraftVersionSerializer(draft.versions.all(), many=True).data)
+
+
+def _timeline_overlay(item: dict, overlay_id: str) -> dict:
+    return {
+        "id": overlay_id,
+        "type": item["overlay_type"],
+        "start_sec": item["start_sec"],
+        "end_sec": item["end_sec"],
+        "text": item.get("text", ""),
+        "position": item.get("position", {}),
+        "style": item.get("style", {}),
+    }
+
+
 class ExportCreateView(APIView):
     def post(self, request, project_id):
         project = get_object_or_404(Project, id=project_id)
         if not hasattr(project, "draft"):
             return Response({"detail": "No draft available."}, status=status.HTTP_400_BAD_REQUEST)
 
-        job = Job.objects.create(project=project, job_type=Job.JobType.EXPORT_FINAL, payload_json=request.data)
-        task = export_final_task.delay(str(job.id))
+        serializer = ExportCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = dict(serializer.validated_data)
+        # Asking for formats switches to the batch job: one decode fans out to every aspect ratio.
+        if payload.get("formats"):
+            job = Job.objects.create(project=project, job_type=Job.JobType.EXPORT_BATCH, payload_json=payload)
+            task = export_batch_task.delay(str(job.id))
+        else:
+            job = Job.objects.create(project=project, job_type=Job.JobType.EXPORT_FINAL, payload_json=payload)
+            task = export_final_task.delay(str(job.id))
         if not job.task_id:
             job.task_id = getattr(task, "id", "") or ""
             job.save(update_fields=["task_id", "updated_at"])